@@ -0,0 +1,65 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from sgftools.batch import expand_inputs, load_games
+from sgftools.parser import SgfParser
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        for name in ['test9x9.sgf', 'test_gameinfo.sgf', 'problems9x9.sgf']:
+            shutil.copy(os.path.join('testdata', name), self.directory)
+        with open(os.path.join(self.directory, 'broken.sgf'), 'w') as file:
+            file.write("(;GM[2])")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_expand_inputs(self):
+        self.assertEqual(4, len(list(expand_inputs(self.directory))))
+        self.assertEqual(2, len(list(expand_inputs(os.path.join(self.directory, 'test*.sgf')))))
+        self.assertEqual(['a.sgf'], list(expand_inputs('a.sgf')))
+
+    def test_load_games_ordered(self):
+        for processes in [1, 2]:
+            results = list(load_games(self.directory, processes=processes, chunksize=1))
+            self.assertEqual(sorted(expand_inputs(self.directory)), [x.path for x in results])
+
+            errors = [x for x in results if x.error is not None]
+            self.assertEqual(1, len(errors))
+            self.assertTrue(errors[0].path.endswith('broken.sgf'))
+            self.assertIsNone(errors[0].result)
+
+            games = {os.path.basename(x.path): x.result for x in results if x.error is None}
+            self.assertEqual('W+0.50', games['test9x9.sgf'].game_info.result)
+            self.assertEqual(4, len(games['problems9x9.sgf'].root.next_nodes))
+
+    def test_load_games_unordered(self):
+        results = list(load_games(self.directory, processes=2, ordered=False))
+        self.assertEqual(sorted(expand_inputs(self.directory)), sorted(x.path for x in results))
+
+    def test_pickle_long_game(self):
+        sgf = "(;GM[1]PB[black]C[root](;B[aa]" + ";W[bb];B[cc]" * 5000 + ")(;W[dd](;B[ee])(;B[ff])))"
+        game = SgfParser().load_game_from_string(sgf)
+
+        actual = pickle.loads(pickle.dumps(game))
+
+        self.assertEqual(game.game_info, actual.game_info)
+        self.assertEqual(game.root, actual.root)
+        self.assertEqual(2, len(actual.root.next_nodes))
+        self.assertEqual(game.root.next_nodes[1].next_nodes, actual.root.next_nodes[1].next_nodes)
+
+        length = 0
+        node = actual.root
+        while node is not None:
+            length += 1
+            node = node.next_node
+        self.assertEqual(2 + 2 * 5000, length)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import random
+import unittest
+
+from sgftools.board import Board, ImpossibleMove
+from sgftools.game import Game, GameNode, Move, Point, Stone
+from sgftools.parser import SgfParser
+
+try:
+    import numpy
+    from sgftools.batchreplay import replay_games, replay_moves
+except ImportError:
+    numpy = None
+
+
+def random_game(generator, size, moves):
+    game = Game(size)
+    game.root = GameNode()
+    game.root.add_black = [Point(generator.randint(1, size), generator.randint(1, size)) for _ in range(3)]
+    node = game.root
+    for _ in range(moves):
+        next_node = GameNode()
+        point = None if generator.random() < 0.02 else Point(generator.randint(1, size), generator.randint(1, size))
+        next_node.move = Move(generator.choice([Stone.Black, Stone.White]), point)
+        node.add_next_node(next_node)
+        node = next_node
+    return game
+
+
+def board_replay(game):
+    """ Позиция и номер невозможного хода при последовательном Board.apply """
+    board = Board(game.game_info.board_size)
+    node = game.root
+    moves = 0
+    while node is not None:
+        try:
+            board.apply(node)
+        except ImpossibleMove:
+            return board, moves
+        if node.move is not None:
+            moves += 1
+        node = node.next_node
+    return board, -1
+
+
+@unittest.skipIf(numpy is None, "numpy is not installed")
+class BatchReplayTest(unittest.TestCase):
+    def test_matches_board(self):
+        generator = random.Random(1)
+        games = [random_game(generator, 7, generator.randint(0, 150)) for _ in range(200)]
+        self._check_games(games)
+        self._check_games([SgfParser().load_game(os.path.join('testdata', 'test9x9.sgf'))])
+
+    def _check_games(self, games):
+        result = replay_games(games)
+        for number, game in enumerate(games):
+            board, failed = board_replay(game)
+            self.assertEqual(failed, result.failed[number])
+            self.assertEqual(bytes(board._stones), result.final[number].tobytes())
+
+    def test_record(self):
+        moves = [Move(Stone.Black, Point(1, 2)), Move(Stone.White, Point(1, 1)), Move(Stone.Black, Point(2, 1))]
+        result = replay_moves([moves, moves[:1]], size=5, record=(0, 2, 10))
+
+        self.assertEqual((2, 3, 5, 5), result.positions.shape)
+        self.assertEqual(0, result.positions[0, 0].sum())
+        self.assertEqual(Stone.White.value, result.positions[0, 1, 0, 0])
+        # белый камень снят третьим ходом
+        self.assertEqual(0, result.final[0, 0, 0])
+        self.assertEqual(Stone.Black.value, result.final[0, 1, 0])
+        self.assertTrue((result.final == result.positions[:, 2]).all())
+        self.assertEqual([-1, -1], list(result.failed))
+
+    def test_setup_outside_root(self):
+        game = Game(9)
+        game.root = GameNode()
+        game.root.add_next_node(GameNode())
+        game.root.next_node.add_white = [Point(1, 1)]
+        self.assertRaises(ValueError, replay_games, [game])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import io
+import random
+import unittest
+
+from sgftools import binaryformat
+from sgftools.game import Point, Stone, Move, Label
+from sgftools.parser import SgfParser
+
+
+class BinaryFormatTest(unittest.TestCase):
+    def assertTreeEqual(self, expected, actual):
+        stack = [(expected, actual)]
+        while len(stack) > 0:
+            left, right = stack.pop()
+            self.assertEqual(left, right)
+            self.assertEqual(left.__dict__.keys(), right.__dict__.keys())
+            self.assertEqual(len(left.next_nodes), len(right.next_nodes))
+            stack.extend(zip(left.next_nodes, right.next_nodes))
+
+    def assertGameEqual(self, expected, actual):
+        self.assertEqual(expected.game_info, actual.game_info)
+        self.assertDictEqual(expected.game_info._info, actual.game_info._info)
+        self.assertTreeEqual(expected.root, actual.root)
+
+    def test_round_trip_testdata(self):
+        parser = SgfParser()
+        for name in ['test9x9.sgf', 'problems9x9.sgf', 'test_gameinfo.sgf', 'test_cp1251.sgf']:
+            game = parser.load_game('testdata/' + name)
+            self.assertGameEqual(game, binaryformat.loads(binaryformat.dumps(game)))
+
+    def test_round_trip_all_fields(self):
+        sgf = "(;GM[1]SZ[13]PB[black]KM[6.5]C[root]" \
+              "(;B[aa]MN[3]PL[W]GB[]CR[aa]LB[bb:A][cc:xyz]AB[dd:ee]AW[ff]AE[gg]N[name]C[a\\]b];W[]XX[1][2])" \
+              "(;W[bb]TR[cc]SQ[dd]MA[ee]UC[]))"
+        game = SgfParser().load_game_from_string(sgf)
+        game.root.extra['INT'] = 2 ** 40
+        game.root.extra['FLOAT'] = 1.5
+        game.root.extra['POINTS'] = [Point(1, 2), Point(3, 4)]
+        game.root.extra['MOVE'] = Move(Stone.Black, Point(5, 5))
+        game.root.extra['NONE'] = None
+
+        actual = binaryformat.loads(binaryformat.dumps(game))
+
+        self.assertGameEqual(game, actual)
+        self.assertIn((Label('xyz'), Point(3, 3)), actual.root.next_nodes[0].markups)
+        self.assertEqual(13, actual.game_info.board_size)
+
+    def test_dump_load_stream(self):
+        game = SgfParser().load_game('testdata/test9x9.sgf')
+        stream = io.BytesIO()
+        binaryformat.dump(game, stream)
+        stream.seek(0)
+
+        self.assertGameEqual(game, binaryformat.load(stream))
+
+    def test_wrong_data(self):
+        with self.assertRaises(ValueError):
+            binaryformat.loads(b"(;GM[1])")
+
+        data = binaryformat.dumps(SgfParser().load_game_from_string("(;B[aa];W[bb])"))
+        with self.assertRaises(ValueError):
+            binaryformat.loads(data[:-1])
+
+    def test_corrupted_payload(self):
+        game = SgfParser().load_game('testdata/problems9x9.sgf')
+        data = binaryformat.dumps(game)
+        header = binaryformat._header.size
+
+        # порча данных без изменения размеров: либо игра читается, либо ValueError
+        generator = random.Random(1)
+        for _ in range(500):
+            corrupted = bytearray(data)
+            for _ in range(generator.randint(1, 4)):
+                corrupted[generator.randrange(header, len(data))] = generator.randrange(256)
+            try:
+                binaryformat.loads(bytes(corrupted))
+            except ValueError:
+                pass
+
+        # корень без детей при нескольких вершинах, лишние дети корня, неизвестный тип массива
+        game = SgfParser().load_game_from_string("(;C[a];B[aa]C[b];W[bb])")
+        data = binaryformat.dumps(game)
+        self.assertEqual(b'BB-', data[header - 3:header])
+        children = header + 2 * 3
+        for offset, value in [(children, 0), (children, 200), (header - 3, ord('X')), (children + 3, 200)]:
+            corrupted = bytearray(data)
+            corrupted[offset] = value
+            self.assertRaises(ValueError, binaryformat.loads, bytes(corrupted))
+
+    def test_compact(self):
+        moves = ''.join(";{}[{}{}]".format('BW'[i % 2], chr(97 + i % 19), chr(97 + i // 19)) for i in range(300))
+        sgf = "(;GM[1]FF[4]SZ[19]KM[6.5]PB[black]PW[white]{})".format(moves)
+        data = binaryformat.dumps(SgfParser().load_game_from_string(sgf))
+        self.assertLess(len(data), len(sgf) * 2 // 3)
+
+        # ход без комментария - 3 байта: число детей и 16-битный ключ хода
+        longer = binaryformat.dumps(SgfParser().load_game_from_string(sgf[:-1] + ";B[ss])"))
+        self.assertEqual(3, len(longer) - len(data))
+
+    def test_none_points(self):
+        game = SgfParser().load_game_from_string("(;AB[aa][tt]AE[tt];B[bb]CR[tt])")
+        self.assertIn(None, game.root.add_black)
+
+        actual = binaryformat.loads(binaryformat.dumps(game))
+        self.assertGameEqual(game, actual)
+        self.assertEqual([None], actual.root.empty)
+
+    def test_unsupported_value(self):
+        game = SgfParser().load_game_from_string("(;B[aa])")
+        game.root.extra['OBJ'] = object()
+        with self.assertRaises(TypeError):
+            binaryformat.dumps(game)
+
+
+if __name__ == '__main__':
+    unittest.main()
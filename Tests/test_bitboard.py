@@ -0,0 +1,126 @@
+import random
+import unittest
+
+from sgftools.bitboard import BitBoard
+from sgftools.board import Board, ImpossibleMove
+from sgftools.game import Circle, GameNode, Move, Point, Stone
+from sgftools.parser import SgfParser
+from sgftools.positionindex import GamePositionIndex
+from sgftools.replay import replay
+from sgftools.validation import validate_game
+
+
+class BitBoardTest(unittest.TestCase):
+    @staticmethod
+    def _random_node(generator, size):
+        game_node = GameNode()
+        if generator.random() < 0.1:
+            game_node.add_black = [Point(generator.randint(1, size), generator.randint(1, size))]
+            game_node.empty = [Point(generator.randint(1, size), generator.randint(1, size))]
+        else:
+            point = Point(generator.randint(1, size), generator.randint(1, size))
+            game_node.move = Move(generator.choice([Stone.Black, Stone.White]), point)
+        return game_node
+
+    def test_matches_board(self):
+        generator = random.Random(1)
+        for size in [5, 9, 19]:
+            for strict in [False, True]:
+                board = Board(size, strict)
+                bit_board = BitBoard(size, strict)
+                for _ in range(size * size * 3):
+                    game_node = self._random_node(generator, size)
+                    try:
+                        board.apply(game_node)
+                    except ImpossibleMove as ex:
+                        with self.assertRaises(type(ex)):
+                            bit_board.apply(game_node)
+                        continue
+
+                    bit_board.apply(game_node)
+                    self.assertEqual(board.stone_values(), bit_board.stone_values())
+                    self.assertEqual(board.position_hash, bit_board.position_hash)
+                    self.assertCountEqual(board.last_changes(), bit_board.last_changes())
+                    self.assertEqual(board.bounding_box(), bit_board.bounding_box())
+                    self.assertEqual(board, bit_board)
+
+                for _ in range(10):
+                    board.undo()
+                    bit_board.undo()
+                    self.assertEqual(board, bit_board)
+
+    def test_no_board_state(self):
+        board = BitBoard(9)
+        self.assertNotIsInstance(board, Board)
+        self.assertFalse(hasattr(board, '_stones') or hasattr(board, '_chains'))
+
+    def test_undo_and_restore(self):
+        board = BitBoard(9)
+        board.white(1, 1)
+        snapshot = board.snapshot()
+        game_node = GameNode()
+        game_node.move = Move(Stone.Black, Point(1, 2))
+        board.apply(game_node)
+        game_node.move = Move(Stone.Black, Point(2, 1))
+        board.apply(game_node)
+        self.assertIsNone(board[1, 1].stone)
+
+        board.undo()
+        self.assertEqual(Stone.White, board[1, 1].stone)
+        board.apply(game_node)
+        self.assertIsNone(board[1, 1].stone)
+
+        board.restore(snapshot)
+        board.apply(game_node)
+        self.assertEqual(Stone.White, board[1, 1].stone)
+        copy = board.copy()
+        game_node.move = Move(Stone.Black, Point(1, 2))
+        copy.apply(game_node)
+        self.assertIsNone(copy[1, 1].stone)
+        self.assertEqual(Stone.White, board[1, 1].stone)
+
+        # снимки совместимы с Board
+        other = Board(9)
+        other.restore(board.snapshot())
+        self.assertEqual(other, board)
+
+    def test_markers(self):
+        board = BitBoard(9).black(2, 3).circle(5, 6).label(7, 1, 'A')
+        expected = Board(9).black(2, 3).circle(5, 6).label(7, 1, 'A')
+        self.assertEqual(expected, board)
+        self.assertEqual(list(expected), list(board))
+        self.assertEqual((2, 1, 7, 6), board.bounding_box())
+
+        clear = GameNode()
+        clear.empty = [Point(5, 6)]
+        board.apply(clear)
+        self.assertIsNone(board[5, 6].marker)
+        board.undo()
+        self.assertEqual(Circle(), board[5, 6].marker)
+
+    def test_callers(self):
+        game = SgfParser().load_game('testdata/test9x9.sgf')
+        expected = [(x.path, x.board) for x in replay(game, snapshots=True)]
+        self.assertEqual(expected, [(x.path, x.board) for x in replay(game, snapshots=True, board_class=BitBoard)])
+        self.assertIsInstance(next(replay(game, board_class=BitBoard)).board, BitBoard)
+
+        index = GamePositionIndex(game, interval=4, board_class=BitBoard)
+        self.assertIsInstance(index.position_at(10), BitBoard)
+        self.assertEqual(expected[10][1], index.position_at(10))
+
+        game.root.next_node.next_node.move = Move(Stone.Black, game.root.next_node.move.point)
+        expected = [(x.path, type(x.error)) for x in validate_game(game)]
+        self.assertEqual(1, len(expected))
+        self.assertEqual(expected, [(x.path, type(x.error)) for x in validate_game(game, board_class=BitBoard)])
+
+    def test_equality_is_symmetric(self):
+        self.assertTrue(Board(9) == BitBoard(9))
+        self.assertTrue(BitBoard(9) == Board(9))
+        self.assertTrue(Board(9).black(1, 1) != BitBoard(9))
+        self.assertTrue(BitBoard(9) != Board(9).black(1, 1))
+        self.assertFalse(Board(9) == object())
+        self.assertTrue(Board(9) != object())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,8 +2,8 @@ import unittest
 
 import functools
 
-from sgftools.board import Board, Node, ImpossibleMove
-from sgftools.game import Stone, Point, Square, GameNode, Move, Triangle, Circle
+from sgftools.board import Board, Node, ImpossibleMove, SuicideMove, KoViolation, SuperkoViolation, neighbour_table
+from sgftools.game import Stone, Point, Square, GameNode, Move, Triangle, Circle, Label
 
 
 class TestBoard(unittest.TestCase):
@@ -205,6 +205,238 @@ class TestBoard(unittest.TestCase):
 
         self.assertEqual(board_expected, board)
 
+    def test_iteration(self):
+        board = Board(9).white(5, 1).black(1, 5).label(1, 5, "A").circle(9, 9)
+
+        cells = [(x.x, x.y, x.node) for x in board]
+
+        self.assertEqual([
+            (1, 5, Node(Stone.Black, Label("A"))),
+            (5, 1, Node(Stone.White)),
+            (9, 9, Node(marker=Circle()))
+        ], cells)
+
+    def test_neighbour_table(self):
+        table = neighbour_table(3)
+
+        self.assertEqual(9, len(table))
+        self.assertEqual({1, 3}, set(table[0]))
+        self.assertEqual({1, 3, 5, 7}, set(table[4]))
+        self.assertEqual({5, 7}, set(table[8]))
+        self.assertIs(table, neighbour_table(3))
+
+    def test_zobrist_hash(self):
+        board = Board(9)
+        self.assertEqual(0, board.position_hash)
+
+        board.apply(self._move(Stone.Black, 3, 3))
+        self.assertNotEqual(0, board.position_hash)
+        self.assertEqual(Stone.White, board.turn_to_play)
+        self.assertNotEqual(board.position_hash, board.zobrist_hash)
+
+        # тот же результат расстановкой
+        other = Board(9)
+        other.black(3, 3)
+        self.assertEqual(board.position_hash, other.position_hash)
+        self.assertEqual(hash(board), hash(other))
+        self.assertEqual(board, other)
+
+        other[3, 3] = None
+        self.assertEqual(0, other.position_hash)
+
+    def test_zobrist_hash_capture(self):
+        board = Board(9)
+        board.apply(self._move(Stone.White, 1, 1))
+        board.apply(self._move(Stone.Black, 2, 1))
+        before = board.position_hash
+        board.apply(self._move(Stone.White, 5, 5))
+        board.apply(self._move(Stone.Black, 1, 2))
+
+        expected = Board(9)
+        for x, y in [(2, 1), (5, 5), (1, 2)]:
+            expected[x, y] = board[x, y]
+        self.assertEqual(expected.position_hash, board.position_hash)
+        self.assertNotEqual(before, board.position_hash)
+
+    def test_zobrist_hash_turn_to_play(self):
+        board = Board(9)
+        game_node = GameNode()
+        game_node.turn_to_play = Stone.Black
+        board.apply(game_node)
+        black_to_play = board.zobrist_hash
+
+        game_node.turn_to_play = Stone.White
+        board.apply(game_node)
+        self.assertNotEqual(black_to_play, board.zobrist_hash)
+        self.assertEqual(0, board.position_hash)
+
+    def test_undo_capture(self):
+        board = Board(9)
+        board.apply(self._move(Stone.White, 1, 1))
+        board.apply(self._move(Stone.Black, 2, 1))
+        expected = Board(9)
+        expected.white(1, 1).black(2, 1)
+
+        board.apply(self._move(Stone.Black, 1, 2))
+        board.undo()
+        self.assertEqual(expected, board)
+        self.assertEqual(Stone.White, board.turn_to_play)
+
+        # после отмены группы и дамэ восстановлены
+        board.apply(self._move(Stone.Black, 1, 2))
+        self.assertEqual(Node(), board[1, 1])
+
+    def test_undo_setup_and_markers(self):
+        board = self.create_board_13x13()
+        expected = self.create_board_13x13()
+        game_node = GameNode()
+        game_node.empty = [Point(1, 1)]
+        game_node.add_white = [Point(5, 5)]
+        game_node.markups = [(Circle(), Point(1, 1)), (Triangle(), Point(7, 7))]
+        board.apply(game_node)
+        self.assertNotEqual(expected, board)
+
+        board.undo()
+        self.assertEqual(expected, board)
+        self.assertRaises(IndexError, board.undo)
+
+    def test_impossible_move_keeps_board(self):
+        game_node = GameNode()
+        game_node.add_white = [Point(5, 5)]
+        game_node.move = Move(Stone.Black, Point(1, 1))
+        board = self.create_board_13x13()
+
+        self.assertRaises(ImpossibleMove, functools.partial(board.apply, game_node))
+        self.assertEqual(self.create_board_13x13(), board)
+        self.assertRaises(IndexError, board.undo)
+
+    def test_bounding_box(self):
+        board = Board(9)
+        self.assertIsNone(board.bounding_box())
+
+        board.black(3, 4).white(6, 2).circle(5, 8)
+        self.assertEqual((3, 2, 6, 8), board.bounding_box())
+
+        board[5, 8] = None
+        board.apply(self._move(Stone.Black, 6, 1))
+        board.apply(self._move(Stone.Black, 7, 2))
+        board.apply(self._move(Stone.Black, 6, 3))
+        board.apply(self._move(Stone.Black, 5, 2))
+        self.assertEqual((3, 1, 7, 4), board.bounding_box())
+        self.assertEqual([(3, 4), (5, 2), (6, 1), (6, 3), (7, 2)], [(x.x, x.y) for x in board])
+
+        board.undo()
+        self.assertEqual((3, 1, 7, 4), board.bounding_box())
+        self.assertEqual(Node(Stone.White), board[6, 2])
+
+    def test_strict_suicide(self):
+        for strict in [False, True]:
+            board = Board(9, strict=strict)
+            board.black(1, 2).black(2, 1)
+            game_node = self._move(Stone.White, 1, 1)
+            if strict:
+                self.assertRaises(SuicideMove, board.apply, game_node)
+                self.assertIsNone(board[1, 1].stone)
+            else:
+                board.apply(game_node)
+                self.assertEqual(Stone.White, board[1, 1].stone)
+
+    def test_strict_ko(self):
+        board = Board(9, strict=True)
+        board.black(2, 1).black(1, 2).black(2, 3).white(3, 1).white(4, 2).white(3, 3)
+        board.apply(self._move(Stone.Black, 3, 2))
+        board.apply(self._move(Stone.White, 2, 2))
+        self.assertIsNone(board[3, 2].stone)
+
+        self.assertRaises(KoViolation, board.apply, self._move(Stone.Black, 3, 2))
+        self.assertEqual(Stone.White, board[2, 2].stone)
+
+        # после ходов в другом месте ко можно взять
+        board.apply(self._move(Stone.Black, 9, 9))
+        board.apply(self._move(Stone.White, 8, 8))
+        board.apply(self._move(Stone.Black, 3, 2))
+        self.assertIsNone(board[2, 2].stone)
+
+        board.undo()
+        board.undo()
+        board.undo()
+        self.assertRaises(KoViolation, board.apply, self._move(Stone.Black, 3, 2))
+
+        # расстановка, изменившая доску, снимает запрет
+        setup = GameNode()
+        setup.add_white = [Point(9, 9)]
+        board.apply(setup)
+        board.apply(self._move(Stone.Black, 3, 2))
+        self.assertIsNone(board[2, 2].stone)
+
+    def test_strict_superko(self):
+        board = Board(9, strict=True)
+        setup = GameNode()
+        setup.add_black = [Point(1, 1)]
+        board.apply(setup)
+        clear = GameNode()
+        clear.empty = [Point(1, 1)]
+        board.apply(clear)
+        # позиция после расстановки не запоминается
+        board.apply(self._move(Stone.Black, 1, 1))
+
+        # а позиция после хода не может повториться
+        board.apply(clear)
+        self.assertRaises(SuperkoViolation, board.apply, self._move(Stone.Black, 1, 1))
+        board.apply(self._move(Stone.White, 1, 1))
+
+        board.undo()
+        board.undo()
+        board.undo()
+        board.apply(self._move(Stone.Black, 1, 1))
+
+    def test_снятие_камней_большая_группа(self):
+        board = Board(9)
+        for x in range(1, 10):
+            board.white(x, 1)
+        for x in range(2, 10):
+            board.black(x, 2)
+
+        game_node = GameNode()
+        game_node.move = Move(Stone.Black, Point(1, 2))
+        board.apply(game_node)
+
+        expected = Board(9)
+        for x in range(1, 10):
+            expected.black(x, 2)
+        self.assertEqual(expected, board)
+
+    def test_снятие_камней_после_расстановки(self):
+        board = Board(9)
+        board.white(1, 1)
+        board.black(2, 1)
+        board.apply(self._move(Stone.White, 5, 5))
+        board.black(3, 3)
+
+        board.apply(self._move(Stone.Black, 1, 2))
+        self.assertEqual(Node(), board[1, 1])
+
+    def test_объединение_групп_и_снятие(self):
+        board = Board(9)
+        board.apply(self._move(Stone.White, 1, 2))
+        board.apply(self._move(Stone.White, 2, 2))
+        board.apply(self._move(Stone.Black, 1, 1))
+        board.apply(self._move(Stone.Black, 3, 1))
+        # ход объединяет два чёрных камня в одну группу
+        board.apply(self._move(Stone.Black, 2, 1))
+        board.apply(self._move(Stone.White, 4, 1))
+        self.assertEqual(Node(Stone.Black), board[2, 1])
+
+        board.apply(self._move(Stone.White, 3, 2))
+        for x in range(1, 4):
+            self.assertEqual(Node(), board[x, 1])
+
+    @staticmethod
+    def _move(stone, x, y):
+        game_node = GameNode()
+        game_node.move = Move(stone, Point(x, y))
+        return game_node
+
     def test_toString(self):
         raise NotImplementedError()
 
@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from sgftools.cache import GameCache
+from sgftools.parser import SgfParser
+
+
+class GameCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_hit_and_miss(self):
+        cache = GameCache(self.directory)
+        parser = SgfParser(cache=cache)
+
+        expected = SgfParser().load_game('testdata/test9x9.sgf')
+        first = parser.load_game('testdata/test9x9.sgf')
+        second = parser.load_game('testdata/test9x9.sgf')
+
+        self.assertEqual(1, cache.misses)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(expected.game_info, second.game_info)
+        self.assertEqual(expected.root, second.root)
+        self.assertEqual(first.root.next_node, second.root.next_node)
+
+        stats = cache.stats()
+        self.assertEqual(1, stats['entries'])
+        self.assertGreater(stats['size'], 0)
+
+    def test_key_depends_on_content(self):
+        self.assertEqual(GameCache.key(b"(;B[aa])"), GameCache.key(b"(;B[aa])"))
+        self.assertNotEqual(GameCache.key(b"(;B[aa])"), GameCache.key(b"(;B[bb])"))
+        self.assertNotEqual(GameCache.key(b"(;B[aa])"), GameCache.key(b"(;B[aa])", options='mainline'))
+
+    @staticmethod
+    def _set_mtime(cache, key, mtime):
+        os.utime(cache._path(key), (mtime, mtime))
+
+    @staticmethod
+    def _games(count):
+        parser = SgfParser()
+        return [parser.load_game_from_string("(;B[{}])".format(chr(ord('a') + x) * 2)) for x in range(count)]
+
+    def test_lru_eviction(self):
+        games = self._games(3)
+        cache = GameCache(self.directory, max_size=1)
+        entry_size = max(len(cache._dumps(x)) for x in games)
+        cache.max_size = 2 * entry_size + entry_size // 2
+
+        cache.put('a' * 40, games[0])
+        self._set_mtime(cache, 'a' * 40, 1000)
+        cache.put('b' * 40, games[1])
+        self._set_mtime(cache, 'b' * 40, 2000)
+        self.assertIsNotNone(cache.get('a' * 40))  # 'a' становится последней использованной
+        cache.put('c' * 40, games[2])
+
+        self.assertEqual(1, cache.evictions)
+        self.assertIsNone(cache.get('b' * 40))
+        self.assertIsNotNone(cache.get('a' * 40))
+        self.assertIsNotNone(cache.get('c' * 40))
+
+    def test_eviction_to_low_water(self):
+        games = self._games(5)
+        keys = [chr(ord('a') + x) * 40 for x in range(5)]
+        other = GameCache(self.directory)
+        for number, (key, game) in enumerate(zip(keys[:4], games)):
+            other.put(key, game)
+            self._set_mtime(other, key, 1000 * (number + 1))
+
+        # размер берётся из каталога, поэтому записи другого процесса тоже учитываются
+        entry_size = max(len(other._dumps(x)) for x in games)
+        cache = GameCache(self.directory, max_size=4 * entry_size + entry_size // 2)
+        cache.low_water = 0.5
+        cache.put(keys[4], games[4])
+
+        self.assertEqual(3, cache.evictions)
+        self.assertEqual([None, None, None], [cache.get(x) for x in keys[:3]])
+        self.assertIsNotNone(cache.get(keys[3]))
+        self.assertIsNotNone(cache.get(keys[4]))
+        self.assertEqual(2, cache.stats()['entries'])
+
+    def test_corrupted_entry_is_miss(self):
+        cache = GameCache(self.directory)
+        cache.put('a' * 40, SgfParser().load_game_from_string("(;B[aa])"))
+        with open(cache._path('a' * 40), 'wb') as file:
+            file.write(b'garbage')
+
+        self.assertIsNone(cache.get('a' * 40))
+        self.assertEqual(1, cache.misses)
+        self.assertFalse(os.path.exists(cache._path('a' * 40)))
+
+
+if __name__ == '__main__':
+    unittest.main()
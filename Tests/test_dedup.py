@@ -0,0 +1,64 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from sgftools.dedup import find_duplicates, fingerprint
+from sgftools.parser import SgfParser
+
+
+class DedupTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @staticmethod
+    def _game(text):
+        return SgfParser().load_game_from_string(text)
+
+    def test_fingerprint(self):
+        game = fingerprint(self._game("(;SZ[19]AB[dd][pp];W[qd];B[dp])"))
+        # заголовки, комментарии, порядок расстановки, варианты и пасы в конце не важны
+        self.assertEqual(game, fingerprint(self._game(
+            "(;SZ[19]PB[Someone]RE[B+R]AB[pp][dd];W[qd]C[comment](;B[dp];W[];B[tt])(;B[qq]))")))
+        self.assertNotEqual(game, fingerprint(self._game("(;SZ[19]AB[dd][pp];W[qd];B[pd])")))
+        self.assertNotEqual(game, fingerprint(self._game("(;SZ[19]AB[dd][pp];B[qd];W[dp])")))
+        self.assertNotEqual(game, fingerprint(self._game("(;SZ[13]AB[dd][pp];W[qd];B[dp])")))
+        self.assertNotEqual(game, fingerprint(self._game("(;SZ[19]AB[dd][pp];W[qd];W[];B[dp])")))
+        self.assertIsNone(fingerprint(self._game("(;SZ[19]C[empty])")))
+
+    def test_symmetric(self):
+        game = self._game("(;SZ[19];B[pd];W[dc];B[];W[qp])")
+        # поворот на 90 градусов
+        other = self._game("(;SZ[19];B[dd];W[cp];B[];W[pc])")
+        self.assertNotEqual(fingerprint(game), fingerprint(other))
+        self.assertEqual(fingerprint(game, symmetric=True), fingerprint(other, symmetric=True))
+
+    def test_find_duplicates(self):
+        files = {
+            'a.sgf': "(;SZ[19]PB[A];B[pd];W[dp])",
+            'b.sgf': "(;SZ[19]PB[B]GC[copy];B[pd];W[dp]C[resign])",
+            'c.sgf': "(;SZ[19];B[dp];W[pd])",
+            'd.sgf': "(;SZ[19];B[pd];W[pp])",
+            'e.sgf': "(;SZ[19]C[no moves])",
+            'f.sgf': "(;SZ[19]C[no moves either])",
+            'broken.sgf': "(;GM[2])",
+        }
+        for name, text in files.items():
+            with open(os.path.join(self.directory, name), 'w') as file:
+                file.write(text)
+
+        path = lambda name: os.path.join(self.directory, name)
+        report = find_duplicates(self.directory, processes=1)
+        self.assertEqual([[path('a.sgf'), path('b.sgf')]], report.clusters)
+        self.assertEqual(6, report.files)
+        self.assertEqual([path('broken.sgf')], [x.path for x in report.errors])
+
+        report = find_duplicates(self.directory, symmetric=True, processes=2, chunksize=1)
+        self.assertEqual([[path('a.sgf'), path('b.sgf'), path('c.sgf')]], report.clusters)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -119,6 +119,43 @@ class GameBuilderTest(unittest.TestCase):
         self.assertListEqual(expected.next_nodes, root.next_nodes)
         self.assertEqual(expected.next_nodes[0].next_node, root.next_nodes[0].next_node)
 
+    def test_leaf_has_no_next_nodes(self):
+        root = self.load_root_node("(;C[start](;B[dd])(;B[cd]))")
+
+        self.assertListEqual([], root.next_nodes[0].next_nodes)
+        self.assertListEqual([], root.next_nodes[1].next_nodes)
+
+    def test_empty_nodes(self):
+        root = self.load_root_node("(;GM[1];;B[dd])")
+
+        self.assertEqual(GameNode(), root)
+        self.assertEqual(GameNode(), root.next_node)
+        self.assertEqual(Move(Stone.Black, Point(4, 4)), root.next_node.next_node.move)
+
+    def test_long_mainline(self):
+        count = 50000
+        root = self.load_root_node("(" + ";B[aa];W[bb]" * (count // 2) + ")")
+
+        length = 0
+        node = root
+        while node is not None:
+            length += 1
+            node = node.next_node
+        self.assertEqual(count, length)
+
+    def test_deep_variations(self):
+        depth = 5000
+        root = self.load_root_node("(;C[start]" + "(;B[aa]" * depth + ")" * depth + "(;W[bb]))")
+
+        self.assertEqual(2, len(root.next_nodes))
+        self.assertEqual(Move(Stone.White, Point(2, 2)), root.next_nodes[1].move)
+        length = 0
+        node = root.next_nodes[0]
+        while node is not None:
+            length += 1
+            node = node.next_node
+        self.assertEqual(depth, length)
+
     def test_compressed_pointlist(self):
         expected = GameNode()
         expected.add_black = [
@@ -127,6 +164,12 @@ class GameBuilderTest(unittest.TestCase):
         root = self.load_root_node("(;AB[aa:bb][dd])")
         self.assertEqual(expected, root)
 
+    def test_territory_points(self):
+        root = self.load_root_node("(;SZ[9];B[];W[]TB[aa:ab][ee]TW[ii])")
+        node = root.next_node.next_node
+        self.assertEqual([Point(1, 1), Point(1, 2), Point(5, 5)], node.extra['TB'])
+        self.assertEqual([Point(9, 9)], node.extra['TW'])
+
     def get_expected_GameInfo(self):
         info = GameInfo()
         info.author = 'gamer'
@@ -0,0 +1,104 @@
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from sgftools.game import Move, Point, Stone
+from sgftools.openingtree import OpeningTree, build_opening_tree, winner
+from sgftools.parser import SgfParser
+from sgftools.writer import SgfWriter
+
+
+class OpeningTreeTest(unittest.TestCase):
+    games = [
+        "(;SZ[19]RE[B+R];B[pd];W[dp];B[pq])",
+        # та же партия в другом углу
+        "(;SZ[19]RE[W+2.5];B[dp];W[pd];B[qp])",
+        "(;SZ[19]RE[B+T];B[pd];W[dd])",
+        "(;SZ[19]RE[Void];B[pd];W[dp];B[];W[dd])",
+        "(;SZ[19]HA[2]AB[dd][pp];W[pd])",
+        "(;SZ[9];B[ee])",
+    ]
+
+    @classmethod
+    def _tree(cls, texts, **kwargs):
+        tree = OpeningTree(**kwargs)
+        parser = SgfParser()
+        for text in texts:
+            tree.add_game(parser.load_game_from_string(text))
+        return tree
+
+    def _paths(self, tree, index=0, prefix=()):
+        """ Все вершины как {последовательность ходов: (игры, победы чёрных, победы белых)} """
+        result = dict()
+        for child in tree.children(index):
+            node = tree.node(child)
+            path = prefix + (str(node.move),)
+            result[path] = node[1:]
+            result.update(self._paths(tree, child, path))
+        return result
+
+    def test_winner(self):
+        self.assertEqual(Stone.Black, winner("B+R"))
+        self.assertEqual(Stone.White, winner(" w+0.5"))
+        self.assertIsNone(winner("0"))
+        self.assertIsNone(winner(""))
+
+    def test_add_game(self):
+        tree = self._tree(self.games, depth=3)
+        self.assertEqual(4, tree.games)
+        self.assertEqual(2, tree.skipped)
+        self.assertEqual((4, 2, 1), tree.node(0)[1:])
+
+        # ходы в ориентации с наименьшими координатами
+        paths = self._paths(tree)
+        first = str(Move(Stone.Black, Point(4, 4)))
+        self.assertEqual((4, 2, 1), paths[(first,)])
+        self.assertEqual((1, 1, 0), paths[(first, str(Move(Stone.White, Point(4, 16))))])
+        second = (first, str(Move(Stone.White, Point(16, 16))))
+        self.assertEqual((3, 1, 1), paths[second])
+        self.assertEqual((2, 1, 1), paths[second + (str(Move(Stone.Black, Point(4, 17))),)])
+        self.assertEqual((1, 0, 0), paths[second + (str(Move(Stone.Black, None)),)])
+        # глубина 3
+        self.assertEqual(6, len(tree))
+
+        tree = self._tree(self.games, depth=3, symmetric=False)
+        self.assertEqual(2, len(list(tree.children(0))))
+
+    def test_merge(self):
+        tree = self._tree(self.games)
+        merged = self._tree(self.games[:2])
+        merged.merge(pickle.loads(pickle.dumps(self._tree(self.games[2:]))))
+        self.assertEqual(self._paths(tree), self._paths(merged))
+        self.assertEqual(tree.skipped, merged.skipped)
+        self.assertRaises(ValueError, merged.merge, OpeningTree(9))
+
+    def test_to_game(self):
+        game = self._tree(self.games).to_game(min_games=2)
+        self.assertEqual(1, len(game.root.next_nodes))
+        node = game.root.next_nodes[0]
+        self.assertEqual(Move(Stone.Black, Point(4, 4)), node.move)
+        self.assertEqual("Games: 4, B+: 50%, W+: 25%", node.comment)
+        self.assertEqual([Move(Stone.White, Point(16, 16))], [x.move for x in node.next_nodes])
+        self.assertIn(";B[dd]C[Games: 4", SgfWriter().dumps(game))
+
+    def test_build_opening_tree(self):
+        directory = tempfile.mkdtemp()
+        try:
+            for number, text in enumerate(self.games + ["(;GM[2])"]):
+                with open(os.path.join(directory, "{}.sgf".format(number)), 'w') as file:
+                    file.write(text)
+
+            expected = self._paths(self._tree(self.games))
+            for processes in [1, 3]:
+                report = build_opening_tree(directory, processes=processes)
+                self.assertEqual(expected, self._paths(report.tree))
+                self.assertEqual(4, report.tree.games)
+                self.assertEqual([os.path.join(directory, '6.sgf')], [x.path for x in report.errors])
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from sgftools.board import Board
+from sgftools.diskindex import DiskIndex
+from sgftools.game import Game, GameNode, Move, Point, Stone
+from sgftools.patternindex import PatternIndex, corner_keys
+
+
+class PatternIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'patterns.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @staticmethod
+    def _game(moves):
+        game = Game(19)
+        game.root = GameNode()
+        node = game.root
+        for stone, x, y in moves:
+            next_node = GameNode()
+            next_node.move = Move(stone, Point(x, y))
+            node.add_next_node(next_node)
+            node = next_node
+        return game
+
+    def test_corner_keys_symmetry(self):
+        board = Board(19).black(4, 4).white(3, 6)
+        keys = corner_keys(board)
+        self.assertIsNotNone(keys[0])
+        self.assertEqual([None, None, None], keys[1:])
+
+        # поворот в другой угол с транспонированием и обменом цветов
+        other = Board(19).white(19 + 1 - 4, 4).black(19 + 1 - 6, 3)
+        self.assertEqual(keys[0], corner_keys(other)[1])
+
+        self.assertEqual(keys[0], corner_keys(Board(19).black(4, 4).white(6, 3))[0])
+        self.assertNotEqual(keys[0], corner_keys(Board(19).black(4, 4).black(3, 6))[0])
+
+    def test_search(self):
+        index = PatternIndex(self.path)
+        index.add_game(self._game([(Stone.Black, 4, 4), (Stone.White, 16, 16), (Stone.Black, 16, 4),
+                                   (Stone.White, 3, 6)]), 'first')
+        index.add_game(self._game([(Stone.Black, 16, 16), (Stone.White, 4, 4)]), 'second')
+        index.close()
+
+        index = PatternIndex(self.path)
+        self.assertEqual(2, len(index))
+        # 4-4 в каждом из углов, где он появился
+        self.assertEqual([('first', 1), ('first', 2), ('first', 3), ('second', 1), ('second', 2)],
+                         index.search(Board(19).black(4, 4)))
+        self.assertEqual([('first', 4)], index.search(Board(19).white(16, 16).black(17, 14)))
+        self.assertEqual([], index.search(Board(19).black(3, 3)))
+        self.assertRaises(ValueError, index.search, Board(19).black(10, 10))
+        self.assertRaises(ValueError, index.search, Board(19).black(4, 4).black(16, 16))
+        # совпадение только по всему квадрату: 4-4 с камнем 3-6 рядом не находится по одному 4-4
+        self.assertNotIn(('first', 4), index.search(Board(19).black(4, 4)))
+        self.assertEqual([('first', 4)], index.search(Board(19).black(4, 4).white(3, 6)))
+        index.close()
+
+    def test_disk_index_is_abstract(self):
+        self.assertRaises(TypeError, DiskIndex, self.path)
+
+    def test_add_files(self):
+        index = PatternIndex(self.path, window=5)
+        errors = index.add_files(os.path.join('testdata', '*9x9.sgf'), processes=1)
+        self.assertEqual([], errors)
+        self.assertEqual(2, len(index))
+        self.assertEqual(5, index.window)
+        index.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import unittest
+
+from sgftools.board import Board
+from sgftools.game import GameNode, Move, Point, Stone
+from sgftools.parser import SgfParser
+from sgftools.positionindex import GamePositionIndex
+
+
+class GamePositionIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.game = SgfParser().load_game(os.path.join('testdata', 'test9x9.sgf'))
+
+    def test_position_at(self):
+        expected = []
+        board = Board(9)
+        node = self.game.root
+        while node is not None:
+            board.apply(node)
+            expected.append(board.copy())
+            node = node.next_node
+
+        for interval in [1, 3, 1000]:
+            index = GamePositionIndex(self.game, interval=interval)
+            self.assertEqual(len(expected), len(index))
+            for number, board in enumerate(expected):
+                actual = index.position_at(number)
+                self.assertEqual(board, actual)
+                self.assertEqual(board.zobrist_hash, actual.zobrist_hash)
+
+        self.assertEqual(expected[-1], index.position_at(-1))
+        self.assertRaises(IndexError, index.position_at, len(expected))
+
+    def test_variation_path(self):
+        variation = GameNode()
+        variation.move = Move(Stone.White, Point(9, 9))
+        self.game.root.next_nodes[0].add_next_node(variation)
+
+        index = GamePositionIndex(self.game, path=(0, 1), interval=2)
+        self.assertEqual(3, len(index))
+        self.assertIs(variation, index.node_at(2))
+        self.assertEqual(Stone.White, index.position_at(2)[9, 9].stone)
+
+
+if __name__ == '__main__':
+    unittest.main()
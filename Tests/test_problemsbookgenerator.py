@@ -2,7 +2,8 @@ import unittest
 
 from sgftools.diagramgenerators import ProblemsBookGenerator
 from sgftools.board import Board
-from sgftools.game import GameNode, Point, Game, GameInfo
+from sgftools.game import GameNode, Point, Game, GameInfo, Move, Stone, Triangle
+from sgftools.parser import SgfParser
 
 
 class ProblemsBookGeneratorTest(unittest.TestCase):
@@ -42,6 +43,36 @@ class ProblemsBookGeneratorTest(unittest.TestCase):
         actual = [x for x in generator.generate(game, title="Problem")]
         self.assertEqual(expected, actual)
 
-
-
-
+    @staticmethod
+    def _problems9x9(setup):
+        """ Ожидаемые доски testdata/problems9x9.sgf; setup(board) добавляет то, что задано в корне """
+        stones = [[(5, 1), (7, 1), (3, 2)], [(3, 1), (5, 1), (7, 1)], [(3, 1), (5, 1), (3, 2)],
+                  [(1, 1), (3, 1), (2, 2)]]
+        boards = []
+        for number, points in enumerate(stones):
+            board = setup(Board(9))
+            for x, y in points:
+                board.white(x, y)
+            board.name = "Problem {}".format(number + 1)
+            boards.append(board)
+        return boards
+
+    def test_problems_testdata(self):
+        game = SgfParser().load_game('testdata/problems9x9.sgf')
+        actual = list(ProblemsBookGenerator().generate(game, title="Problem"))
+        self.assertEqual(self._problems9x9(lambda board: board), actual)
+        self.assertEqual(["Problem 1", "Problem 2", "Problem 3", "Problem 4"], [x.name for x in actual])
+
+    def test_root_setup_without_markups(self):
+        game = SgfParser().load_game('testdata/problems9x9.sgf')
+        game.root.add_black = [Point(9, 9), Point(8, 9)]
+        game.root.markups = [(Triangle(), Point(8, 8))]
+        # ход на занятую точку - не задача, и он не мешает остальным
+        wrong = GameNode()
+        wrong.move = Move(Stone.Black, Point(9, 9))
+        game.root.add_next_node(wrong)
+
+        actual = list(ProblemsBookGenerator().generate(game, title="Problem"))
+        expected = self._problems9x9(lambda board: board.black(9, 9).black(8, 9))
+        self.assertEqual(expected, actual)
+        self.assertEqual([x.name for x in expected], [x.name for x in actual])
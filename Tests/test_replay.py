@@ -0,0 +1,70 @@
+import os
+import unittest
+
+from sgftools.board import Board, Node
+from sgftools.game import Game, GameNode, Move, Point, Stone
+from sgftools.parser import SgfParser
+from sgftools.replay import replay
+
+
+class ReplayTest(unittest.TestCase):
+    def setUp(self):
+        # корень - ход 1 - (ход 2a - ход 3 | ход 2b)
+        self.root = GameNode()
+        self.move1 = self._node(Stone.Black, 3, 3)
+        self.move2a = self._node(Stone.White, 4, 4)
+        self.move3 = self._node(Stone.Black, 5, 5)
+        self.move2b = self._node(Stone.White, 6, 6)
+        self.root.add_next_node(self.move1)
+        self.move1.add_next_node(self.move2a)
+        self.move1.add_next_node(self.move2b)
+        self.move2a.add_next_node(self.move3)
+        self.game = Game(9)
+        self.game.root = self.root
+
+    @staticmethod
+    def _node(stone, x, y):
+        node = GameNode()
+        node.move = Move(stone, Point(x, y))
+        return node
+
+    def test_all_nodes(self):
+        items = [(x.node, tuple(x.path), x.board[4, 4].stone, x.board[6, 6].stone) for x in replay(self.game)]
+        self.assertEqual([
+            (self.root, (), None, None),
+            (self.move1, (0,), None, None),
+            (self.move2a, (0, 0), Stone.White, None),
+            (self.move3, (0, 0, 0), Stone.White, None),
+            (self.move2b, (0, 1), None, Stone.White)
+        ], items)
+
+    def test_filters(self):
+        self.assertEqual([self.move3, self.move2b], [x.node for x in replay(self.game, leaves_only=True)])
+        self.assertEqual([self.root, self.move1, self.move2a, self.move3],
+                         [x.node for x in replay(self.game, mainline_only=True)])
+        self.assertEqual([self.root, self.move2a, self.move2b], [x.node for x in replay(self.game, every=2)])
+        self.assertEqual([self.root, self.move1], [x.node for x in replay(self.game, max_depth=1)])
+
+    def test_snapshots(self):
+        boards = [x.board for x in replay(self.game, snapshots=True)]
+        expected = Board(9).black(3, 3).white(6, 6)
+        self.assertEqual(expected, boards[4])
+        self.assertEqual(Node(Stone.Black), boards[3][5, 5])
+        self.assertEqual(5, len(set(id(x) for x in boards)))
+
+    def test_mainline_matches_apply(self):
+        game = SgfParser().load_game(os.path.join('testdata', 'test9x9.sgf'))
+        expected = Board(9)
+        node = game.root
+        while node is not None:
+            expected.apply(node)
+            node = node.next_node
+
+        last = None
+        for item in replay(game, mainline_only=True):
+            last = item
+        self.assertEqual(expected, last.board)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from sgftools.board import Board
+from sgftools.game import Game, GameNode, Move, Point, Stone
+from sgftools.parser import SgfParser
+from sgftools.replay import replay
+from sgftools.reverseindex import ReversePositionIndex, format_variations, parse_variations
+
+
+class ReversePositionIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'positions.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @staticmethod
+    def _node(stone, x, y):
+        node = GameNode()
+        node.move = Move(stone, Point(x, y))
+        return node
+
+    def _game(self):
+        """ 1: B 4-4, 2: W 16-16 или вариант W 3-3; 3: B 16-4 после 16-16 """
+        game = Game(19)
+        game.root = GameNode()
+        first = self._node(Stone.Black, 4, 4)
+        game.root.add_next_node(first)
+        second = self._node(Stone.White, 16, 16)
+        first.add_next_node(second)
+        first.add_next_node(self._node(Stone.White, 3, 3))
+        second.add_next_node(self._node(Stone.Black, 16, 4))
+        return game
+
+    def test_variations(self):
+        self.assertEqual('', format_variations((0, 0, 0)))
+        self.assertEqual('2:1,4:3', format_variations((0, 1, 0, 3)))
+        self.assertEqual((0, 1, 0, 3), parse_variations('2:1,4:3', 4))
+        self.assertEqual((0, 0), parse_variations('', 2))
+
+    def test_search(self):
+        index = ReversePositionIndex(self.path)
+        index.add_game(self._game(), 'first')
+        # та же позиция другим порядком ходов
+        other = Game(19)
+        other.root = GameNode()
+        other.root.add_next_node(self._node(Stone.White, 16, 16))
+        other.root.next_nodes[0].add_next_node(self._node(Stone.Black, 4, 4))
+        index.add_game(other, 'second')
+        index.close()
+
+        index = ReversePositionIndex(self.path)
+        self.assertEqual(2, len(index))
+        self.assertEqual([('first', (0, 0)), ('second', (0, 0))],
+                         index.search(Board(19).black(4, 4).white(16, 16)))
+        self.assertEqual([('first', (0, 1))], index.search(Board(19).black(4, 4).white(3, 3)))
+        self.assertEqual([('first', (0,))], index.search(Board(19).black(4, 4)))
+        self.assertEqual([], index.search(Board(19).white(4, 4)))
+        self.assertEqual([], index.search(Board(19)))
+
+        # повторное добавление заменяет записи игры
+        index.add_game(other, 'first')
+        self.assertEqual([], index.search(Board(19).black(4, 4).white(3, 3)))
+        index.close()
+
+    def test_delete_uses_game_index(self):
+        index = ReversePositionIndex(self.path)
+        plan = index._connection.execute("EXPLAIN QUERY PLAN DELETE FROM postings WHERE game = 1").fetchall()
+        self.assertIn('postings_game', ' '.join(x[-1] for x in plan))
+        index.close()
+
+    def test_add_files(self):
+        index = ReversePositionIndex(self.path)
+        pattern = os.path.join('testdata', '*9x9.sgf')
+        self.assertEqual([], index.add_files(pattern, processes=1))
+        self.assertEqual(2, len(index))
+
+        # каждая найденная вершина даёт искомую позицию
+        name = os.path.join('testdata', 'problems9x9.sgf')
+        for item in replay(SgfParser().load_game(name), max_depth=3):
+            found = index.search(item.board)
+            if item.board.position_hash != 0 and len(item.board.last_changes()) != 0:
+                self.assertIn((name, tuple(item.path)), found)
+        index.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
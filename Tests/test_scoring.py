@@ -0,0 +1,71 @@
+import unittest
+
+from sgftools.board import Board
+from sgftools.game import Point
+from sgftools.parser import SgfParser
+from sgftools.scoring import format_result, margin, parse_result, score_board, score_position, verify_result
+from sgftools.writer import SgfWriter
+
+
+class ScoringTest(unittest.TestCase):
+    @staticmethod
+    def _walls():
+        """ 5x5: чёрная стена x = 2, белая x = 4, между ними нейтральные точки """
+        board = Board(5)
+        for y in range(1, 6):
+            board.black(2, y).white(4, y)
+        return board
+
+    def test_score_position(self):
+        score = score_board(self._walls(), komi=0.5)
+        self.assertEqual((10, 10, 5, 5, 5), score[:5])
+        self.assertEqual(-0.5, margin(score))
+
+        # белый камень на чёрной территории, снятый как мёртвый
+        board = self._walls().white(1, 3)
+        score = score_board(board, komi=0.5, dead=[Point(1, 3)], captures=(2, 1))
+        self.assertEqual((10, 10, 5, 5, 5), score[:5])
+        self.assertEqual(1, score.dead_white)
+        # по территории: 5 + 2 пленных + 1 мёртвый против 5 + 1 + 0.5
+        self.assertEqual(1.5, margin(score, territory=True))
+
+        # подсказки: территорией считаются только отмеченные точки
+        score = score_position(self._walls().stone_values(), 5, owners={0: 2, 1: 2, 24: 1})
+        self.assertEqual((7, 6, 2, 1, 12), score[:5])
+
+    def test_results(self):
+        self.assertEqual('B+3.5', format_result(3.5))
+        self.assertEqual('W+7', format_result(-7.0))
+        self.assertEqual('0', format_result(0))
+        self.assertEqual(-0.5, parse_result('W+0.50'))
+        self.assertEqual(12, parse_result(' b+12 '))
+        self.assertEqual(0, parse_result('Draw'))
+        self.assertIsNone(parse_result('B+R'))
+        self.assertIsNone(parse_result('W+'))
+        self.assertIsNone(parse_result('Void'))
+
+    def test_verify_result(self):
+        game = SgfParser().load_game('testdata/test9x9.sgf')
+        check = verify_result(game)
+        self.assertEqual(('W+0.50', 'W+0.5', 'match'), check[:3])
+        # без TB/TW белым засчитывается нейтральная точка
+        self.assertEqual(('W+1.5', 'mismatch'), verify_result(game, hints=False)[1:3])
+
+        game = SgfParser().load_game_from_string(SgfWriter().dumps(game))
+        self.assertEqual('match', verify_result(game).status)
+
+        game.game_info.result = 'B+Resign'
+        self.assertEqual('unverifiable', verify_result(game).status)
+        game.game_info.result = ''
+        self.assertEqual('missing', verify_result(game).status)
+
+    def test_area_rules(self):
+        game = SgfParser().load_game_from_string("(;SZ[5]KM[0.5]RU[Chinese]RE[W+0.5]"
+                                                 ";B[ba];W[da];B[bb];W[db];B[bc];W[dc];B[bd];W[dd];B[be];W[de])")
+        check = verify_result(game)
+        self.assertEqual('match', check.status)
+        self.assertEqual(10, check.score.black_area)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,9 @@
 ﻿import sys
 sys.path.append('..')
 
+import io
 import unittest
-from sgftools.parser import SgfParser, SgfPyParser
+from sgftools.parser import SgfParser, SgfPyParser, SgfTokenizer, extract_encoding
 
 
 class TestSgfParser(unittest.TestCase):
@@ -56,6 +57,124 @@ class TestSgfParser(unittest.TestCase):
 
         self.assertSequenceEqual(expected, actual)
 
+        parser = SgfTokenizer()
+        actual = parser.parse_string(sgf)
+
+        self.assertSequenceEqual(expected, actual)
+
+    def test_SgfTokenizer_escapes(self):
+        parser = SgfTokenizer()
+        actual = parser.parse_string("(;C[a\\]b\r\n[b\\\\c]AB[aa]\r\n[bb])")
+
+        self.assertSequenceEqual([[['C', 'a]b\r\n[b\\c'], ['AB', 'aa', 'bb']]], actual)
+
+    def test_SgfTokenizer_same_as_SgfPyParser(self):
+        for name in ['test9x9.sgf', 'problems9x9.sgf', 'test_gameinfo.sgf']:
+            with open('testdata/' + name, encoding='utf-8-sig') as file:
+                sgf = file.read()
+            self.assertEqual(SgfPyParser().parse_string(sgf), SgfTokenizer().parse_string(sgf), name)
+
+    def test_SgfTokenizer_errors(self):
+        parser = SgfTokenizer()
+        for sgf in ["(;B[aa]", "(;B)", "()", "(;B[aa](;W[bb]);B[cc])", "(;[aa])"]:
+            with self.assertRaises(ValueError):
+                parser.parse_string(sgf)
+
+    def test_pyparsing_backend(self):
+        parser = SgfParser(SgfPyParser())
+        game = parser.load_game('testdata/test9x9.sgf')
+        self.assertEqual(game.game_info.white_player, 'Gray85')
+
+    def test_iter_games(self):
+        sgf = "(;PB[first]C[a(b\\]c\\\\];B[aa])\r\n(;PB[second](;B[bb])(;W[cc]))(;PB[third])\r\n".encode('utf-8')
+        parser = SgfParser()
+        for chunk_size in [1, 2, 5, 1024]:
+            games = list(parser.iter_games(io.BytesIO(sgf), chunk_size=chunk_size))
+            self.assertEqual(['first', 'second', 'third'], [x.game_info.black_player for x in games])
+            self.assertEqual('a(b]c\\', games[0].root.comment)
+            self.assertEqual(2, len(games[1].root.next_nodes))
+
+    def test_iter_games_from_file(self):
+        games = list(SgfParser().iter_games('testdata/test9x9.sgf'))
+        self.assertEqual(1, len(games))
+        self.assertEqual('W+0.50', games[0].game_info.result)
+
+    def test_iter_games_garbage_between_games(self):
+        with self.assertRaises(ValueError):
+            list(SgfParser().iter_games(io.BytesIO(b"(;B[aa]) x (;B[bb])")))
+
+    def test_load_game_info(self):
+        parser = SgfParser()
+        for name in ['test_gameinfo.sgf', 'test_cp1251.sgf', 'test9x9.sgf']:
+            expected = parser.load_game('testdata/' + name).game_info
+            for prefix_size in [1, 16, 4096]:
+                self.assertEqual(expected, parser.load_game_info('testdata/' + name, prefix_size=prefix_size), name)
+
+    def test_load_game_info_stops_after_root(self):
+        stream = io.BytesIO(b"(;PB[black]PW[white];B[aa]C[not closed")
+        info = SgfParser().load_game_info_from_stream(stream)
+        self.assertEqual('black', info.black_player)
+        self.assertEqual('white', info.white_player)
+
+    def test_load_game_info_reads_only_prefix(self):
+        data = b"(;PB[black]PW[white];B[aa]" + b";W[bb]" * 10000 + b")"
+        stream = io.BytesIO(data)
+        self.assertEqual('black', SgfParser().load_game_info_from_stream(stream, prefix_size=64).black_player)
+        self.assertEqual(64, stream.tell())
+
+        # вершина длиннее префикса дочитывается
+        stream = io.BytesIO(b"(;GC[" + b"x" * 100 + b"])")
+        self.assertEqual('x' * 100, SgfParser().load_game_info_from_stream(stream, prefix_size=16).game_comment)
+        self.assertRaises(ValueError, SgfParser().load_game_info_from_stream, io.BytesIO(b"(;GC[abc"))
+
+    def test_load_game_info_long_comment_before_charset(self):
+        data = "(;GC[{}]CA[windows-1251]PB[Чёрный])".format('Комментарий ' * 1000).encode('cp1251')
+        expected = SgfParser().load_game_from_bytes(data).game_info
+        self.assertEqual('Чёрный', expected.black_player)
+        for prefix_size in [16, 4096]:
+            info = SgfParser().load_game_info_from_stream(io.BytesIO(data), prefix_size=prefix_size)
+            self.assertEqual(expected, info)
+
+    def test_encoding_not_on_first_line(self):
+        sgf = "(;GM[1]FF[4]\r\nSZ[19]\r\nCA[windows-1251]GC[Комментарий])".encode('cp1251')
+        parser = SgfParser()
+
+        self.assertEqual('Комментарий', parser.load_game_from_stream(io.BytesIO(sgf)).game_info.game_comment)
+        self.assertEqual('Комментарий', list(parser.iter_games(io.BytesIO(sgf)))[0].game_info.game_comment)
+
+    def test_extract_encoding(self):
+        self.assertEqual('utf-8', extract_encoding(b"(;GM[1])"))
+        self.assertEqual('utf-8-sig', extract_encoding(b"\xef\xbb\xbf(;GM[1]CA[cp1251])"))
+        self.assertEqual('cp1251', extract_encoding(b"(;GM[1]\nCA[cp1251])"))
+        self.assertEqual('utf-8', extract_encoding(b"(;PCA[cp1251])"))
+
+    def test_iter_games_multibyte_chunks(self):
+        sgf = "(;C[Комментарий])(;C[Второй])".encode('utf-8')
+        games = list(SgfParser().iter_games(io.BytesIO(sgf), chunk_size=1))
+        self.assertEqual(['Комментарий', 'Второй'], [x.root.comment for x in games])
+
+    def test_mainline_only_tokens(self):
+        sgf = "(;C[root](;B[aa];W[bb](;B[cc]C[x\\](];W[dd])(;B[ee]C[(]))(;B[ff](;W[gg])(;W[hh])))"
+        expected = [[['C', 'root']], [['B', 'aa']], [['W', 'bb']], [['B', 'cc'], ['C', 'x](']], [['W', 'dd']]]
+
+        self.assertSequenceEqual(expected, SgfTokenizer(mainline_only=True).parse_string(sgf))
+
+    def test_mainline_only_game(self):
+        sgf = "(;C[root](;B[aa];W[bb](;B[cc])(;B[ee]))(;B[ff]))"
+        for parser in [SgfParser(mainline_only=True), SgfParser(SgfPyParser(), mainline_only=True)]:
+            node = parser.load_game_from_string(sgf).root
+            moves = []
+            while node is not None:
+                self.assertLessEqual(len(node.next_nodes), 1)
+                moves.append(node.move)
+                node = node.next_node
+            self.assertEqual(4, len(moves))
+            self.assertEqual('(x:3, y:3)', str(moves[-1].point))
+
+    def test_mainline_only_unclosed_variation(self):
+        with self.assertRaises(ValueError):
+            SgfTokenizer(mainline_only=True).parse_string("(;B[aa](;W[bb])(;W[cc]C[)])")
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,48 @@
+import os
+import unittest
+
+from sgftools.board import KoViolation, SuicideMove
+from sgftools.game import Game, GameNode, Move, Point, Stone
+from sgftools.parser import SgfParser
+from sgftools.validation import validate_game, describe_error
+
+
+class ValidationTest(unittest.TestCase):
+    @staticmethod
+    def _node(stone, x, y):
+        node = GameNode()
+        node.move = Move(stone, Point(x, y))
+        return node
+
+    def test_testdata_is_valid(self):
+        for name in ['test9x9.sgf', 'problems9x9.sgf']:
+            game = SgfParser().load_game(os.path.join('testdata', name))
+            self.assertEqual([], validate_game(game))
+
+    def test_first_illegal_node_per_variation(self):
+        game = Game(9)
+        game.root = GameNode()
+        game.root.add_black = [Point(2, 1), Point(1, 2), Point(2, 3)]
+        game.root.add_white = [Point(3, 1), Point(4, 2), Point(3, 3)]
+
+        take = self._node(Stone.Black, 3, 2)
+        retake = self._node(Stone.White, 2, 2)
+        ko = self._node(Stone.Black, 3, 2)
+        ko.add_next_node(self._node(Stone.White, 5, 5))
+        retake.add_next_node(ko)
+        retake.add_next_node(self._node(Stone.Black, 7, 7))
+        take.add_next_node(retake)
+        game.root.add_next_node(take)
+
+        suicide = self._node(Stone.White, 1, 1)
+        game.root.add_next_node(suicide)
+
+        errors = validate_game(game)
+        self.assertEqual([(ko, (0, 0, 0)), (suicide, (1,))], [(x.node, x.path) for x in errors])
+        self.assertIsInstance(errors[0].error, KoViolation)
+        self.assertIsInstance(errors[1].error, SuicideMove)
+        self.assertTrue(describe_error(errors[1]).startswith("node 1 (variations 1:1): SuicideMove"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import io
+import unittest
+
+from sgftools.game import Point, Game, GameNode, Move, Stone
+from sgftools.parser import SgfParser
+from sgftools.writer import SgfWriter, compress_points
+
+
+class SgfWriterTest(unittest.TestCase):
+    def write_bytes(self, game):
+        stream = io.BytesIO()
+        SgfWriter().write_game(game, stream)
+        return stream.getvalue()
+
+    def test_round_trip_testdata_is_byte_stable(self):
+        parser = SgfParser()
+        for name in ['test9x9.sgf', 'problems9x9.sgf', 'test_gameinfo.sgf', 'test_cp1251.sgf']:
+            game = parser.load_game('testdata/' + name)
+            first = self.write_bytes(game)
+            second = self.write_bytes(parser.load_game_from_bytes(first))
+            self.assertEqual(first, second, name)
+
+    def test_round_trip_game(self):
+        parser = SgfParser()
+        game = parser.load_game('testdata/test9x9.sgf')
+        actual = parser.load_game_from_string(SgfWriter().dumps(game))
+
+        self.assertEqual(game.game_info, actual.game_info)
+        node, actual_node = game.root, actual.root
+        while node is not None:
+            # точки расстановки и территории записываются прямоугольниками, поэтому их порядок может измениться
+            for x in [node, actual_node]:
+                for points in [x.add_black, x.extra.get('TB', []), x.extra.get('TW', [])]:
+                    points.sort(key=lambda point: (point.x, point.y))
+            self.assertEqual(node, actual_node)
+            node, actual_node = node.next_node, actual_node.next_node
+        self.assertIsNone(actual_node)
+
+    def test_encoding_from_CA(self):
+        parser = SgfParser()
+        game = parser.load_game('testdata/test_cp1251.sgf')
+        data = self.write_bytes(game)
+
+        self.assertIn('Комментарий'.encode('windows-1251'), data)
+        self.assertEqual('Комментарий', parser.load_game_from_bytes(data).game_info.game_comment)
+
+    def test_variations_and_properties(self):
+        sgf = "(;GM[1]AB[aa:bb][dd]C[x\\]y\\\\](;B[cc]CR[aa]LB[cc:A]GB[]MN[5]PL[W]N[name](;W[dd])(;W[]))(;B[ee]))"
+        expected = "(;SZ[19]GM[1]AB[aa:bb][dd]C[x\\]y\\\\]\n" \
+                   "(;B[cc]PL[W]MN[5]N[name]GB[1]CR[aa]LB[cc:A]\n(;W[dd])\n(;W[]))\n(;B[ee]))\n"
+
+        self.assertEqual(expected, SgfWriter().dumps(SgfParser().load_game_from_string(sgf)))
+
+    def test_chunks(self):
+        sgf = "(;GM[1](;B[cc]C[long comment];W[dd](;B[aa])(;B[];W[Zz]))(;B[ee]))"
+        game = SgfParser().load_game_from_string(sgf)
+        expected = SgfWriter().dumps(game)
+        self.assertIn(";W[Zz]", expected)
+
+        writer = SgfWriter()
+        writer.flush_size = 1
+        chunks = list(writer._iter_chunks(game))
+        self.assertLess(1, len(chunks))
+        self.assertEqual(expected, ''.join(chunks))
+
+    def test_deep_tree(self):
+        game = Game()
+        game.root = GameNode()
+        node = game.root
+        for _ in range(20000):
+            next_node = GameNode()
+            next_node.move = Move(Stone.Black, Point(1, 1))
+            node.add_next_node(next_node)
+            node = next_node
+
+        self.assertEqual(20001, SgfWriter().dumps(game).count(';'))
+
+    def test_compress_points(self):
+        points = [Point(1, 1), Point(1, 2), Point(2, 1), Point(2, 2), Point(4, 4), Point(3, 1)]
+        self.assertEqual(['aa:bb', 'ca', 'dd'], compress_points(points))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+#!/usr/bin/python3
+# Масштабирование batch.load_games по числу процессов и размеру порции (chunksize)
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from position_index import random_game
+from sgftools import batch
+from sgftools.writer import SgfWriter
+
+
+def make_files(directory, count, moves, distinct=50):
+    texts = [SgfWriter().dumps(random_game(moves, seed=x)) for x in range(distinct)]
+    for number in range(count):
+        with open(os.path.join(directory, "{}.sgf".format(number)), 'w') as file:
+            file.write(texts[number % distinct])
+
+
+def measure(directory, processes, chunksize):
+    start = time.perf_counter()
+    for result in batch.load_games(directory, processes=processes, chunksize=chunksize, ordered=False):
+        if result.error is not None:
+            raise RuntimeError(result.error)
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    directory = tempfile.mkdtemp()
+    try:
+        make_files(directory, count, moves=250)
+        print("cpu count: {}, files: {}".format(os.cpu_count(), count))
+        print("{:>9} {:>9} {:>10} {:>8}".format('processes', 'chunksize', 'files/s', 'speedup'))
+        single = measure(directory, 1, 1)
+        print("{:>9} {:>9} {:>10.0f} {:>8.2f}".format(1, '-', count / single, 1.0))
+        for processes in [2, 4, 8]:
+            for chunksize in [1, 8, 32, 128]:
+                seconds = measure(directory, processes, chunksize)
+                print("{:>9} {:>9} {:>10.0f} {:>8.2f}".format(processes, chunksize, count / seconds, single / seconds))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
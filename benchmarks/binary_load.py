@@ -0,0 +1,35 @@
+#!/usr/bin/python3
+# Загрузка игры из sgf и из двоичного формата
+import glob
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sgftools import binaryformat
+from sgftools.parser import SgfParser, SgfPyParser
+
+
+def main():
+    testdata = os.path.join(os.path.dirname(__file__), '..', 'Tests', 'testdata', '*.sgf')
+    files = sorted(glob.glob(sys.argv[1] if len(sys.argv) > 1 else testdata))
+    parsers = [('pyparsing', SgfParser(SgfPyParser())), ('tokenizer', SgfParser())]
+
+    print("{:<20} {:>8} {:>8} {:>14} {:>14} {:>14}".format(
+        'file', 'sgf', 'binary', 'pyparsing ms', 'tokenizer ms', 'binary ms'))
+    for name in files:
+        with open(name, 'rb') as file:
+            data = file.read()
+        packed = binaryformat.dumps(SgfParser().load_game_from_bytes(data))
+        number = max(1, 200000 // len(data))
+
+        times = [min(timeit.repeat(lambda: parser.load_game_from_bytes(data), number=number, repeat=3)) / number
+                 for _, parser in parsers]
+        times.append(min(timeit.repeat(lambda: binaryformat.loads(packed), number=number, repeat=3)) / number)
+        print("{:<20} {:>8} {:>8} {:>14.3f} {:>14.3f} {:>14.3f}".format(
+            os.path.basename(name), len(data), len(packed), *(x * 1000 for x in times)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/python3
+# Проигрывание игр со взятиями на Board и BitBoard для разных размеров доски
+import os
+import random
+import sys
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sgftools.bitboard import BitBoard
+from sgftools.board import Board
+from sgftools.game import GameNode, Move, Point, Stone
+
+
+def random_nodes(size, moves, seed):
+    """ Случайная партия до moves ходов в пустые точки (самоубийство не снимается, так что доска может заполниться) """
+    generator = random.Random(seed)
+    board = Board(size)
+    nodes = []
+    stone = Stone.Black
+    captures = 0
+    while len(nodes) < moves:
+        empty = list(_empty_points(board))
+        if len(empty) == 0:
+            break
+        node = GameNode()
+        node.move = Move(stone, generator.choice(empty))
+        before = sum(1 for _ in board)
+        board.apply(node)
+        captures += before + 1 - sum(1 for _ in board)
+        nodes.append(node)
+        stone = Stone.White if stone == Stone.Black else Stone.Black
+    return nodes, captures
+
+
+def _empty_points(board):
+    for x in range(1, board.size + 1):
+        for y in range(1, board.size + 1):
+            if board[x, y].stone is None:
+                yield Point(x, y)
+
+
+def replay(board_class, size, nodes):
+    board = board_class(size)
+    for node in nodes:
+        board.apply(node)
+
+
+def main():
+    print("{:>5} {:>6} {:>9} {:>10} {:>12}".format('size', 'moves', 'captured', 'Board ms', 'BitBoard ms'))
+    for size in [9, 13, 19]:
+        nodes, captures = random_nodes(size, size * size * 2, seed=size)
+        times = [min(timeit.repeat(lambda: replay(x, size, nodes), number=10, repeat=3)) / 10
+                 for x in (Board, BitBoard)]
+        print("{:>5} {:>6} {:>9} {:>10.2f} {:>12.2f}".format(size, len(nodes), captures, *(x * 1000 for x in times)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/python3
+# Стоимость построения дерева игры в пересчёте на вершину: 100 .. 100000 вершин
+import gc
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sgftools.gamebuilder import GameBuilder
+from sgftools.parser import SgfTokenizer
+
+
+def mainline(count):
+    return "(;GM[1]" + ";B[dd];W[pp]" * (count // 2) + ")"
+
+
+def nested(count):
+    return "(;GM[1]" + "(;B[dd]" * count + ")" * count + ")"
+
+
+def measure(sgf, count):
+    tokenizer = SgfTokenizer()
+    repeat = max(1, 100000 // count)
+    best = None
+    for _ in range(3):
+        tokens = [tokenizer.parse_string(sgf) for _ in range(repeat)]
+        # как и timeit, отключаем сборщик мусора на время замера
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        for x in tokens:
+            GameBuilder().build(x)
+        elapsed = (time.perf_counter() - start) / repeat
+        gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    return best / count * 1e6
+
+
+def main():
+    print("{:>8} {:>16} {:>16}".format('nodes', 'mainline us/node', 'nested us/node'))
+    for count in [100, 1000, 10000, 100000]:
+        print("{:>8} {:>16.2f} {:>16.2f}".format(count, measure(mainline(count), count), measure(nested(count), count)))
+
+
+if __name__ == '__main__':
+    main()
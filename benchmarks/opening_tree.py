@@ -0,0 +1,39 @@
+#!/usr/bin/python3
+# Дерево дебютов по случайным играм: скорость добавления, слияния и размер массивов
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from position_index import random_game
+from sgftools.openingtree import OpeningTree
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    games = [random_game(40, seed=x) for x in range(count)]
+    shards = []
+    start = time.perf_counter()
+    for number in range(4):
+        tree = OpeningTree()
+        for game in games[number::4]:
+            tree.add_game(game)
+        shards.append(tree)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tree = shards[0]
+    for shard in shards[1:]:
+        tree.merge(shard)
+    merge = time.perf_counter() - start
+
+    arrays = [tree._moves, tree._first_child, tree._next_sibling, tree._games, tree._black_wins, tree._white_wins]
+    size = sum(len(x) * x.itemsize for x in arrays)
+    print("games: {}, nodes: {}, arrays: {:.1f} MB ({} bytes/node)".format(
+        tree.games, len(tree), size / 2 ** 20, size // len(tree)))
+    print("add: {:.3f} ms/game, merge: {:.2f} s".format(build / count * 1000, merge))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+#!/usr/bin/python3
+# Сравнение скорости разбора sgf: pyparsing против SgfTokenizer
+import glob
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sgftools.parser import SgfPyParser, SgfTokenizer
+
+
+def load_samples(pattern):
+    samples = []
+    for name in sorted(glob.glob(pattern)):
+        with open(name, 'rb') as file:
+            samples.append((os.path.basename(name), file.read().decode('utf-8-sig', errors='replace')))
+    return samples
+
+
+def main():
+    testdata = os.path.join(os.path.dirname(__file__), '..', 'Tests', 'testdata', '*.sgf')
+    samples = load_samples(sys.argv[1] if len(sys.argv) > 1 else testdata)
+    backends = [('pyparsing', SgfPyParser()), ('tokenizer', SgfTokenizer())]
+
+    print("{:<20} {:>8} {:>14} {:>14} {:>8}".format('file', 'bytes', 'pyparsing MB/s', 'tokenizer MB/s', 'speedup'))
+    for name, data in samples:
+        size = len(data.encode('utf-8'))
+        rates = []
+        for _, backend in backends:
+            number = 200
+            seconds = min(timeit.repeat(lambda: backend.parse_string(data), number=number, repeat=3))
+            rates.append(size * number / seconds / 1e6)
+        print("{:<20} {:>8} {:>14.2f} {:>14.2f} {:>7.1f}x".format(name, size, rates[0], rates[1], rates[1] / rates[0]))
+
+
+if __name__ == '__main__':
+    main()
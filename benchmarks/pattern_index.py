@@ -0,0 +1,47 @@
+#!/usr/bin/python3
+# Построение индекса угловых фрагментов по случайным играм и время поиска
+import os
+import random
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from position_index import random_game
+from sgftools.board import Board
+from sgftools.patternindex import PatternIndex
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'patterns.db')
+        index = PatternIndex(path)
+        start = time.perf_counter()
+        for number in range(count):
+            index.add_game(random_game(250, seed=number), str(number))
+        build = time.perf_counter() - start
+        postings = index._connection.execute("SELECT count(*) FROM postings").fetchone()[0]
+
+        generator = random.Random(0)
+        queries = []
+        for _ in range(100):
+            board = Board(19)
+            for _ in range(generator.randint(1, 3)):
+                board[generator.randint(1, 5), generator.randint(1, 5)] = None
+                if generator.random() < 0.5:
+                    board.black(generator.randint(1, 5), generator.randint(1, 5))
+                else:
+                    board.white(generator.randint(1, 5), generator.randint(1, 5))
+            queries.append(board)
+
+        search = min(timeit.repeat(lambda: [index.search(x) for x in queries], number=1, repeat=3)) / len(queries)
+        print("games: {}, postings: {}, file: {:.1f} MB".format(count, postings, os.path.getsize(path) / 2 ** 20))
+        print("build: {:.2f} ms/game, search: {:.3f} ms".format(build / count * 1000, search * 1000))
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+# Время доступа к позиции после произвольного хода для разных интервалов снимков
+import os
+import random
+import sys
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sgftools.board import Board
+from sgftools.game import Game, GameNode, Move, Point, Stone
+from sgftools.positionindex import GamePositionIndex
+
+
+def random_game(moves=300, size=19, seed=1):
+    generator = random.Random(seed)
+    game = Game(size)
+    game.root = GameNode()
+    board = Board(size)
+    node = game.root
+    stone = Stone.Black
+    while moves > 0:
+        point = Point(generator.randint(1, size), generator.randint(1, size))
+        if board[point].stone is not None:
+            continue
+        next_node = GameNode()
+        next_node.move = Move(stone, point)
+        board.apply(next_node)
+        node.add_next_node(next_node)
+        node = next_node
+        stone = Stone.White if stone == Stone.Black else Stone.Black
+        moves -= 1
+    return game
+
+
+def main():
+    games = [random_game(seed=x) for x in range(10)]
+    generator = random.Random(0)
+    queries = [generator.randint(0, 300) for _ in range(1000)]
+
+    print("{:>8} {:>10} {:>14} {:>12}".format('interval', 'build ms', 'position_at us', 'snapshots KB'))
+    for interval in [1, 4, 8, 16, 32, 64, 301]:
+        build = min(timeit.repeat(lambda: [GamePositionIndex(x, interval=interval) for x in games],
+                                  number=1, repeat=3)) / len(games)
+        indexes = [GamePositionIndex(x, interval=interval) for x in games]
+        query = min(timeit.repeat(lambda: [x.position_at(n) for x in indexes for n in queries],
+                                  number=1, repeat=3)) / (len(indexes) * len(queries))
+        memory = sum(len(x[0]) + sys.getsizeof(x) for x in indexes[0]._checkpoints)
+        print("{:>8} {:>10.2f} {:>14.1f} {:>12.1f}".format(interval, build * 1000, query * 1000000, memory / 1024))
+
+
+if __name__ == '__main__':
+    main()
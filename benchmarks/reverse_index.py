@@ -0,0 +1,41 @@
+#!/usr/bin/python3
+# Построение обратного индекса позиций по случайным играм и время поиска существующих и отсутствующих позиций
+import os
+import sys
+import tempfile
+import time
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from position_index import random_game
+from sgftools.positionindex import GamePositionIndex
+from sgftools.reverseindex import ReversePositionIndex
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'positions.db')
+        index = ReversePositionIndex(path)
+        start = time.perf_counter()
+        for number in range(count):
+            index.add_game(random_game(250, seed=number), str(number))
+        build = time.perf_counter() - start
+        postings = index._connection.execute("SELECT count(*) FROM postings").fetchone()[0]
+        index.close()
+
+        index = ReversePositionIndex(path)
+        positions = GamePositionIndex(random_game(250, seed=0))
+        present = [positions.position_at(x) for x in range(1, len(positions), 5)]
+        missing = [GamePositionIndex(random_game(250, seed=count)).position_at(x) for x in range(20, 250, 5)]
+        for name, queries in (("present", present), ("missing", missing)):
+            search = min(timeit.repeat(lambda: [index.search(x) for x in queries], number=1, repeat=3))
+            print("{}: {:.3f} ms".format(name, search / len(queries) * 1000))
+        print("games: {}, postings: {}, file: {:.1f} MB, build: {:.2f} ms/game".format(
+            count, postings, os.path.getsize(path) / 2 ** 20, build / count * 1000))
+        index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+#!/usr/bin/python3
+# Подсчёт очков: заливка конечной позиции и проверка результата с проигрыванием игры
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from position_index import random_game
+from sgftools.positionindex import GamePositionIndex
+from sgftools.scoring import score_position, verify_result
+
+
+def main():
+    games = [random_game(250, seed=x) for x in range(50)]
+    finals = [GamePositionIndex(x).position_at(-1).stone_values() for x in games]
+
+    score = min(timeit.repeat(lambda: [score_position(x, 19) for x in finals], number=10, repeat=3))
+    score /= 10 * len(finals)
+    verify = min(timeit.repeat(lambda: [verify_result(x) for x in games], number=1, repeat=3)) / len(games)
+    print("score_position: {:.3f} ms, verify_result: {:.2f} ms ({:.1f} M games/hour/process)".format(
+        score * 1000, verify * 1000, 3600 / verify / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/python3
+# Скорость записи sgf: SgfWriter.dumps на файлах и на большом дереве случайных партий
+# Цель - 50 МБ/с на больших деревьях; пока не достигнута: обход вершин на чистом Python даёт около 6 МБ/с
+import glob
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from position_index import random_game
+from sgftools.game import Game, GameNode
+from sgftools.parser import SgfParser
+from sgftools.writer import SgfWriter
+
+
+def variations_game(count=200, moves=300):
+    """ Игра, в которой count случайных партий - варианты первого хода, каждый десятый ход с комментарием """
+    game = Game(19)
+    game.root = GameNode()
+    for seed in range(count):
+        variation = random_game(moves, seed=seed).root.next_node
+        game.root.add_next_node(variation)
+        node = variation
+        while node is not None:
+            if node.move is not None and (node.move.point.x + node.move.point.y) % 10 == 0:
+                node.comment = "comment [{}]".format(seed)
+            node = node.next_node
+    return game
+
+
+def main():
+    testdata = os.path.join(os.path.dirname(__file__), '..', 'Tests', 'testdata', '*.sgf')
+    files = sorted(glob.glob(sys.argv[1] if len(sys.argv) > 1 else testdata))
+    games = [(os.path.basename(x), SgfParser().load_game(x)) for x in files]
+    games.append(('variations', variations_game()))
+    writer = SgfWriter()
+
+    print("{:<20} {:>10} {:>10} {:>8}".format('game', 'bytes', 'ms', 'MB/s'))
+    for name, game in games:
+        size = len(writer.dumps(game).encode('utf-8'))
+        number = max(1, 2000000 // size)
+        seconds = min(timeit.repeat(lambda: writer.dumps(game), number=number, repeat=3)) / number
+        print("{:<20} {:>10} {:>10.3f} {:>8.2f}".format(name, size, seconds * 1000, size / seconds / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,9 +1,18 @@
 #!/usr/bin/python3
 import argparse
+import functools
+import sys
 
+import sgftools.batch
+import sgftools.cache
+import sgftools.dedup
 import sgftools.diagramgenerators
+import sgftools.openingtree
 import sgftools.parser
 import sgftools.problemspdfbuilder
+import sgftools.scoring
+import sgftools.validation
+import sgftools.writer
 
 
 def generate_problems(args):
@@ -18,6 +27,86 @@ def generate_problems(args):
     generator.save(args.output)
 
 
+def ingest(args):
+    games = 0
+    errors = 0
+    illegal = 0
+    cache = sgftools.cache.GameCache(args.cache) if args.cache is not None else None
+    if args.validate:
+        results = sgftools.batch.map_files(functools.partial(sgftools.validation.validate_file, cache=cache),
+                                           args.input, processes=args.jobs, chunksize=args.chunksize,
+                                           ordered=not args.unordered)
+    else:
+        results = sgftools.batch.load_games(args.input, processes=args.jobs, chunksize=args.chunksize,
+                                            ordered=not args.unordered, cache=cache)
+    for result in results:
+        if result.error is not None:
+            errors += 1
+            print("{}: {}".format(result.path, result.error), file=sys.stderr)
+        elif args.validate:
+            games += 1
+            if len(result.result) != 0:
+                illegal += 1
+            for problem in result.result:
+                print("{}: {}".format(result.path, problem), file=sys.stderr)
+        else:
+            games += 1
+            if args.verbose:
+                info = result.result.game_info
+                print("{}: {} - {} {}".format(result.path, info.black_player, info.white_player, info.result))
+
+    if args.validate:
+        print("Loaded: {}, errors: {}, with illegal moves: {}".format(games, errors, illegal))
+    else:
+        print("Loaded: {}, errors: {}".format(games, errors))
+
+
+def dedup(args):
+    cache = sgftools.cache.GameCache(args.cache) if args.cache is not None else None
+    report = sgftools.dedup.find_duplicates(args.input, symmetric=args.symmetric, processes=args.jobs,
+                                            chunksize=args.chunksize, cache=cache)
+    for result in report.errors:
+        print("{}: {}".format(result.path, result.error), file=sys.stderr)
+    for cluster in report.clusters:
+        print('\n'.join(cluster) + '\n')
+
+    duplicates = sum(len(x) - 1 for x in report.clusters)
+    print("Loaded: {}, errors: {}, clusters: {}, duplicates: {}".format(
+        report.files, len(report.errors), len(report.clusters), duplicates))
+
+
+def openings(args):
+    cache = sgftools.cache.GameCache(args.cache) if args.cache is not None else None
+    report = sgftools.openingtree.build_opening_tree(args.input, size=args.size, depth=args.depth,
+                                                     symmetric=not args.no_symmetry, processes=args.jobs,
+                                                     cache=cache)
+    for result in report.errors:
+        print("{}: {}".format(result.path, result.error), file=sys.stderr)
+    sgftools.writer.SgfWriter().save_game(report.tree.to_game(args.min_games), args.output)
+    print("Games: {}, skipped: {}, errors: {}, nodes: {}".format(
+        report.tree.games, report.tree.skipped, len(report.errors), len(report.tree)))
+
+
+def results(args):
+    cache = sgftools.cache.GameCache(args.cache) if args.cache is not None else None
+    function = functools.partial(sgftools.scoring.verify_file, hints=not args.no_hints, cache=cache)
+    counts = dict.fromkeys(['match', 'mismatch', 'missing', 'unverifiable'], 0)
+    errors = 0
+    for result in sgftools.batch.map_files(function, args.input, processes=args.jobs, chunksize=args.chunksize,
+                                           ordered=not args.unordered):
+        if result.error is not None:
+            errors += 1
+            print("{}: {}".format(result.path, result.error), file=sys.stderr)
+            continue
+        check = result.result
+        counts[check.status] += 1
+        if check.status == 'mismatch' or (check.status == 'missing' and args.verbose):
+            print("{}: {}: RE[{}], computed {}".format(result.path, check.status, check.recorded, check.computed))
+
+    print("Matched: {match}, mismatched: {mismatch}, missing: {missing}, unverifiable: {unverifiable}, "
+          "errors: {errors}".format(errors=errors, **counts))
+
+
 parser = argparse.ArgumentParser()
 subparsers = parser.add_subparsers()
 
@@ -27,6 +116,49 @@ problems_parser.add_argument('-o', '--output', required=True)
 problems_parser.add_argument('--trim-board', help="cut diagrams in problems")
 problems_parser.set_defaults(func=generate_problems)
 
+ingest_parser = subparsers.add_parser('ingest', help="load many sgf files in parallel and report errors")
+ingest_parser.add_argument('input', nargs='+', help="files, directories or glob patterns")
+ingest_parser.add_argument('-j', '--jobs', type=int, default=None, help="number of worker processes")
+ingest_parser.add_argument('--chunksize', type=int, default=32)
+ingest_parser.add_argument('--unordered', action='store_true', help="report files as soon as they are loaded")
+ingest_parser.add_argument('--cache', help="directory for the cache of parsed games")
+ingest_parser.add_argument('--validate', action='store_true',
+                           help="check moves in all variations: suicide, ko and positional superko")
+ingest_parser.add_argument('-v', '--verbose', action='store_true')
+ingest_parser.set_defaults(func=ingest)
+
+dedup_parser = subparsers.add_parser('dedup', help="find files with the same game")
+dedup_parser.add_argument('input', nargs='+', help="files, directories or glob patterns")
+dedup_parser.add_argument('-j', '--jobs', type=int, default=None, help="number of worker processes")
+dedup_parser.add_argument('--chunksize', type=int, default=32)
+dedup_parser.add_argument('--cache', help="directory for the cache of parsed games")
+dedup_parser.add_argument('--symmetric', action='store_true',
+                          help="treat rotated and reflected games as the same")
+dedup_parser.set_defaults(func=dedup)
+
+openings_parser = subparsers.add_parser('openings', help="merge first moves of many games into one sgf tree")
+openings_parser.add_argument('input', nargs='+', help="files, directories or glob patterns")
+openings_parser.add_argument('-o', '--output', required=True)
+openings_parser.add_argument('-j', '--jobs', type=int, default=None, help="number of worker processes")
+openings_parser.add_argument('--cache', help="directory for the cache of parsed games")
+openings_parser.add_argument('--size', type=int, default=19, help="board size of games to include")
+openings_parser.add_argument('--depth', type=int, default=sgftools.openingtree.DEFAULT_DEPTH,
+                             help="number of moves from each game")
+openings_parser.add_argument('--min-games', type=int, default=1, help="omit moves played in fewer games")
+openings_parser.add_argument('--no-symmetry', action='store_true',
+                             help="do not merge rotated and reflected openings")
+openings_parser.set_defaults(func=openings)
+
+results_parser = subparsers.add_parser('results', help="score final positions and compare them with RE")
+results_parser.add_argument('input', nargs='+', help="files, directories or glob patterns")
+results_parser.add_argument('-j', '--jobs', type=int, default=None, help="number of worker processes")
+results_parser.add_argument('--chunksize', type=int, default=32)
+results_parser.add_argument('--unordered', action='store_true', help="report files as soon as they are scored")
+results_parser.add_argument('--cache', help="directory for the cache of parsed games")
+results_parser.add_argument('--no-hints', action='store_true', help="ignore TB/TW territory marks")
+results_parser.add_argument('-v', '--verbose', action='store_true', help="also list games without RE")
+results_parser.set_defaults(func=results)
+
 
 if __name__ == "__main__":
     args = parser.parse_args()
@@ -23,5 +23,6 @@ setup(
     keywords="go game baduk weiqi kifu",
     packages=["sgftools"],
     py_modules=["kifugen"],
-    install_requires=["FPDF >=1.7.2", "pyparsing >=2.0.7", "svgwrite"]
+    install_requires=["FPDF >=1.7.2", "pyparsing >=2.0.7", "svgwrite"],
+    extras_require={"numpy": ["numpy"]}
 )
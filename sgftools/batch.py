@@ -0,0 +1,62 @@
+import functools
+import glob
+import multiprocessing
+import os
+from collections import namedtuple
+
+from sgftools.parser import SgfParser
+
+BatchResult = namedtuple("BatchResult", "path result error")
+
+
+def expand_inputs(inputs, pattern="*.sgf"):
+    """ Раскрывает каталоги (рекурсивно, по pattern) и маски в список файлов """
+    if isinstance(inputs, (str, os.PathLike)):
+        inputs = [inputs]
+
+    for item in inputs:
+        item = os.fspath(item)
+        if os.path.isdir(item):
+            yield from sorted(glob.glob(os.path.join(item, "**", pattern), recursive=True))
+        elif glob.has_magic(item):
+            yield from sorted(glob.glob(item, recursive=True))
+        else:
+            yield item
+
+
+def map_files(function, inputs, processes=None, chunksize=32, ordered=True):
+    """ Применяет function к каждому файлу в пуле процессов.
+
+    function должна быть доступна на уровне модуля (передаётся в рабочие процессы через pickle).
+    Исключения не прерывают обработку, а возвращаются в BatchResult.error.
+    """
+    paths = expand_inputs(inputs)
+    call = functools.partial(_call_guarded, function)
+    if processes == 1:
+        yield from map(call, paths)
+        return
+
+    with multiprocessing.Pool(processes) as pool:
+        mapper = pool.imap if ordered else pool.imap_unordered
+        yield from mapper(call, paths, chunksize)
+
+
+def load_games(inputs, processes=None, chunksize=32, ordered=True, cache=None):
+    """ Загружает игры из файлов параллельно; BatchResult.result - Game или None при ошибке.
+
+    cache - GameCache, общий для всех процессов (счётчики попаданий при этом ведутся в каждом процессе свои).
+    """
+    function = load_game if cache is None else functools.partial(load_game, cache=cache)
+    return map_files(function, inputs, processes, chunksize, ordered)
+
+
+def load_game(path, cache=None):
+    return SgfParser(cache=cache).load_game(path)
+
+
+def _call_guarded(function, path):
+    try:
+        return BatchResult(path, function(path), None)
+    except Exception as ex:
+        # исключения передаются строкой: не все они переживают pickle
+        return BatchResult(path, None, "{}: {}".format(type(ex).__name__, ex))
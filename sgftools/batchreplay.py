@@ -0,0 +1,184 @@
+from collections import namedtuple
+
+import numpy as np
+
+from sgftools.game import Stone
+
+BatchReplayResult = namedtuple("BatchReplayResult", "final positions failed")
+
+# индекс хода за пределами доски
+_OUT_OF_BOARD = -2
+
+# Stone.value без обращения к атрибуту перечисления на каждом ходе
+_colors = {Stone.White: Stone.White.value, Stone.Black: Stone.Black.value}
+
+
+def replay_games(games, record=()):
+    """ Проигрывает основные варианты игр одного размера доски одновременно.
+
+    Результат совпадает с последовательным Board.apply: final - массив (N, size, size) int8
+    со значениями Stone.value (0 - пусто) по индексам [x - 1, y - 1]; positions - массив (N, len(record), size, size)
+    с позициями после record[i] ходов (пас тоже ход; для коротких игр - последняя позиция) или None;
+    failed - номер невозможного хода (занятая точка или точка вне доски) или -1.
+    После невозможного хода игра дальше не проигрывается.
+    Расстановка (AB, AW, AE) допускается только в корне.
+    """
+    games = list(games)
+    sizes = set(x.game_info.board_size for x in games)
+    if len(sizes) > 1:
+        raise ValueError("Games have different board sizes: {}".format(sorted(sizes)))
+    size = sizes.pop() if len(sizes) != 0 else 19
+
+    initial = np.zeros((len(games), size * size), np.int8)
+    moves = []
+    for number, game in enumerate(games):
+        moves.append(_mainline_moves(game, size, initial[number]))
+    return _replay(initial.reshape(len(games), size, size), moves, record)
+
+
+def replay_moves(moves, size=19, initial=None, record=()):
+    """ Как replay_games, но по последовательностям Move; initial - начальные позиции (N, size, size) """
+    moves = [[_move_index(x, size) for x in game_moves] for game_moves in moves]
+    if initial is None:
+        initial = np.zeros((len(moves), size, size), np.int8)
+    return _replay(np.array(initial, np.int8), moves, record)
+
+
+def _mainline_moves(game, size, initial):
+    moves = []
+    node = game.root
+    while node is not None:
+        if node.empty or node.add_black or node.add_white:
+            if node is not game.root:
+                raise ValueError("Setup properties outside the root are not supported")
+            for value, points in ((0, node.empty), (Stone.Black.value, node.add_black),
+                                  (Stone.White.value, node.add_white)):
+                for point in points:
+                    index = _point_index(point, size)
+                    if index < 0:
+                        raise IndexError("point {} out of board. Board size: {}".format(point, size))
+                    initial[index] = value
+
+        if node.move is not None:
+            moves.append(_move_index(node.move, size))
+        node = node.next_nodes[0] if len(node.next_nodes) != 0 else None
+    return moves
+
+
+def _move_index(move, size):
+    point = move.point
+    if point is None:
+        return _colors[move.stone], -1
+    if 0 < point.x <= size and 0 < point.y <= size:
+        return _colors[move.stone], (point.x - 1) * size + point.y - 1
+    return _colors[move.stone], _OUT_OF_BOARD
+
+
+def _point_index(point, size):
+    if point.x <= 0 or point.x > size or point.y <= 0 or point.y > size:
+        return _OUT_OF_BOARD
+    return (point.x - 1) * size + point.y - 1
+
+
+def _replay(boards, moves, record):
+    count, size = boards.shape[0], boards.shape[1]
+    length = max((len(x) for x in moves), default=0)
+
+    # ходы всех игр: цвет (0 - ходов больше нет) и индекс точки (-1 - пас)
+    colors = np.zeros((count, length), np.int8)
+    indices = np.full((count, length), -1, np.intp)
+    for number, game_moves in enumerate(moves):
+        if len(game_moves) != 0:
+            colors[number, :len(game_moves)], indices[number, :len(game_moves)] = zip(*game_moves)
+
+    positions = np.zeros((count, len(record), size, size), np.int8) if len(record) != 0 else None
+    failed = np.full(count, -1, np.int32)
+    flat = boards.reshape(count, size * size)
+    neighbours = _neighbour_array(size)
+
+    for step in range(length):
+        _record(positions, record, step, boards)
+
+        color = colors[:, step]
+        index = indices[:, step]
+        active = (color != 0) & (failed < 0)
+        failed[active & (index == _OUT_OF_BOARD)] = step
+
+        games = np.nonzero(active & (index >= 0))[0]
+        points = index[games]
+        occupied = flat[games, points] != 0
+        failed[games[occupied]] = step
+        games = games[~occupied]
+        points = points[~occupied]
+
+        flat[games, points] = color[games]
+        _capture(boards, flat, neighbours, games, points, color[games])
+
+    for number, moves_count in enumerate(record):
+        if moves_count >= length:
+            positions[:, number] = boards
+    return BatchReplayResult(boards, positions, failed)
+
+
+def _record(positions, record, step, boards):
+    for number, moves_count in enumerate(record):
+        if moves_count == step:
+            positions[:, number] = boards
+
+
+def _neighbour_array(size):
+    """ Соседи точек (size * size, 4); отсутствующий сосед указывает на саму точку """
+    table = np.arange(size * size).repeat(4).reshape(size * size, 4)
+    x, y = np.divmod(np.arange(size * size), size)
+    table[x > 0, 0] -= size
+    table[x < size - 1, 1] += size
+    table[y > 0, 2] -= 1
+    table[y < size - 1, 3] += 1
+    return table
+
+
+def _capture(boards, flat, neighbours, games, points, color):
+    """ Снимает цепочки противника без дамэ, соседние с только что поставленными камнями """
+    enemy = (3 - color).astype(np.int8)  # Stone.White.value + Stone.Black.value
+    adjacent = neighbours[points]
+    candidates = flat[games[:, None], adjacent] == enemy[:, None]
+
+    # у камня с пустым соседом цепочка точно жива
+    free = (flat[games[:, None, None], neighbours[adjacent]] == 0).any(axis=2)
+    rows, slots = np.nonzero(candidates & ~free)
+    if len(rows) == 0:
+        return
+
+    # по цепочке на каждого подозрительного соседа; растим их, пока не найдётся дамэ или рост не остановится
+    games = games[rows]
+    seeds = adjacent[rows, slots]
+    size = boards.shape[1]
+    region = boards[games]
+    stones = region == enemy[rows, None, None]
+    empty = region == 0
+    chains = np.zeros_like(stones)
+    chains[np.arange(len(rows)), seeds // size, seeds % size] = True
+
+    dead = np.ones(len(rows), bool)
+    active = np.arange(len(rows))
+    while len(active) != 0:
+        current = chains[active]
+        grown = _dilate(current)
+        free = (grown & empty[active]).any(axis=(1, 2))
+        grown &= stones[active]
+        stopped = (grown == current).all(axis=(1, 2))
+        dead[active[free]] = False
+        chains[active] = grown
+        active = active[~(free | stopped)]
+
+    for number in np.nonzero(dead)[0]:
+        boards[games[number]][chains[number]] = 0
+
+
+def _dilate(mask):
+    result = mask.copy()
+    result[:, 1:, :] |= mask[:, :-1, :]
+    result[:, :-1, :] |= mask[:, 1:, :]
+    result[:, :, 1:] |= mask[:, :, :-1]
+    result[:, :, :-1] |= mask[:, :, 1:]
+    return result
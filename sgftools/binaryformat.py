@@ -0,0 +1,524 @@
+""" Компактный двоичный формат дерева игры.
+
+Вершины хранятся в прямом порядке обхода, поэтому дерево задаётся числом детей каждой вершины.
+Ходы - массив 16-битных ключей (цвет, x, y), комментарии и имена вершин - индексы в общей таблице строк.
+Каждый массив записывается самым узким типом, в который помещаются его значения (пустой - не записывается).
+Редкие поля вершин (расстановка, пометки, extra и т.п.) и GameInfo записываются в виде записей с тегами
+в поток целых чисел переменной длины (varint), длины строк - тоже.
+"""
+import gc
+import struct
+import sys
+from array import array
+from itertools import repeat
+
+from sgftools.game import Game, GameInfo, GameNode, Move, Point, Stone, Circle, Square, Cross, Triangle, Label, \
+    GoodForBlack, GoodForWhite, PositionIsEven, PositionIsUnclear
+
+FORMAT_VERSION = 2
+MAGIC = b'SGFB'
+
+# сигнатура, версия, число вершин, число строк, размеры строк и записей в байтах, типы массивов вершин
+_header = struct.Struct('<4sHIIII3s')
+# тип пустого массива: он не записывается
+_ABSENT = b'-'
+# координата в ключе хода - 6 бит, в sgf их не больше 52
+_MAX_COORDINATE = 63
+
+_stones = (None, Stone.White, Stone.Black)
+
+# поля вершины
+_ADD_BLACK = 1
+_ADD_WHITE = 2
+_EMPTY = 3
+_MOVE_NUMBER = 4
+_TURN_TO_PLAY = 5
+_ANNOTATION = 6
+_MARKUPS = 7
+_EXTRA = 8
+_ATTRIBUTE = 9
+# поля GameInfo
+_INFO_ITEM = 10
+_INFO_ATTRIBUTE = 11
+
+# теги значений
+_NONE = 0
+_STR = 1
+_INT = 2
+_FLOAT = 4
+_POINT = 5
+_LIST = 6
+_STONE = 7
+_MOVE = 8
+_BOOL = 9
+
+_annotations = [GoodForBlack, GoodForWhite, PositionIsEven, PositionIsUnclear]
+_markups = [Circle, Square, Cross, Triangle, Label]
+
+# строки, которые есть почти в каждой игре: в файл не записываются, таблица строк начинается с них.
+# Менять только вместе с FORMAT_VERSION
+_predefined_strings = (
+    '', 'author', 'black_player', 'black_rank', 'black_team', 'white_player', 'white_rank', 'white_team',
+    'copyright', 'date', 'event', 'game_name', 'result', 'round', 'game_comment', 'place',
+    'SZ', 'GM', 'FF', 'CA', 'AP', 'ST', 'RU', 'HA', 'KM', 'TM', 'OT', 'BL', 'WL', 'OB', 'OW', 'TB', 'TW')
+
+# атрибуты GameInfo со значениями по умолчанию не записываются
+_default_info = GameInfo().__dict__
+
+_node_fields = {'extra', 'move', 'add_black', 'add_white', 'empty', 'move_number', 'turn_to_play',
+                'node_name', 'comment', 'annotation', '_markups', 'next_nodes'}
+
+
+def dumps(game):
+    return _Writer().write(game)
+
+
+def dump(game, stream):
+    stream.write(dumps(game))
+
+
+def loads(data):
+    return _Reader(data).read()
+
+
+def load(stream):
+    return loads(stream.read())
+
+
+class _Writer:
+    def __init__(self):
+        self._strings = {x: i for i, x in enumerate(_predefined_strings)}
+        self._ops = []
+        # вершина последней записи: в записи хранится разность с ней
+        self._last = 0
+
+    def write(self, game):
+        children = []
+        moves = array('H')
+        comments = []
+        names = []
+        ops = self._ops
+
+        stack = [game.root] if game.root is not None else []
+        index = 0
+        while len(stack) > 0:
+            node = stack.pop()
+            next_nodes = [x for x in node.next_nodes if x is not None]
+            children.append(len(next_nodes))
+            moves.append(_move_key(node.move))
+            comments.append(self._string(node.comment))
+            names.append(self._string(node.node_name))
+            self._write_rare_fields(index, node)
+            stack.extend(reversed(next_nodes))
+            index += 1
+
+        info = game.game_info
+        for key, value in info._info.items():
+            ops.extend((_INFO_ITEM, self._string(key)))
+            self._value(value)
+        for key, value in info.__dict__.items():
+            if key != '_info' and (key not in _default_info or value != _default_info[key]):
+                ops.extend((_INFO_ATTRIBUTE, self._string(key)))
+                self._value(value)
+
+        strings = list(self._strings)[len(_predefined_strings):]
+        lengths = _to_varints(len(x) for x in strings)
+        blob = ''.join(strings).encode('utf-8', 'surrogatepass')
+        ops = _to_varints(ops)
+
+        columns = [_narrow(x) for x in (children, comments, names)]
+        header = _header.pack(MAGIC, FORMAT_VERSION, len(children), len(strings), len(lengths) + len(blob),
+                              len(ops), b''.join(x.typecode.encode('ascii') if x is not None else _ABSENT
+                                                 for x in columns))
+        return b''.join([header, _to_bytes(moves)] + [_to_bytes(x) for x in columns if x is not None] +
+                        [lengths, blob, ops])
+
+    def _record(self, index, field):
+        """ Начало записи поля вершины: номер вершины пишется разностью с предыдущей записью """
+        self._ops.extend((field, index - self._last))
+        self._last = index
+
+    def _write_rare_fields(self, index, node):
+        ops = self._ops
+        for field, points in ((_ADD_BLACK, node.add_black), (_ADD_WHITE, node.add_white), (_EMPTY, node.empty)):
+            if len(points) != 0:
+                self._record(index, field)
+                ops.append(len(points))
+                for point in points:
+                    # None ('tt' в старых файлах) записывается как (0, 0)
+                    ops.extend((point.x, point.y) if point is not None else (0, 0))
+
+        if node.move_number is not None:
+            self._record(index, _MOVE_NUMBER)
+            self._value(node.move_number)
+
+        if node.turn_to_play is not None:
+            self._record(index, _TURN_TO_PLAY)
+            ops.append(node.turn_to_play.value)
+
+        if node.annotation is not None:
+            self._record(index, _ANNOTATION)
+            ops.append(_annotations.index(type(node.annotation)))
+
+        if len(node.markups) != 0:
+            self._record(index, _MARKUPS)
+            ops.append(len(node.markups))
+            for markup, point in node.markups:
+                label = self._string(markup.label) if isinstance(markup, Label) else 0
+                ops.extend((_markups.index(type(markup)), label) + ((point.x, point.y) if point is not None else (0, 0)))
+
+        for key, value in node.extra.items():
+            self._record(index, _EXTRA)
+            ops.append(self._string(key))
+            self._value(value)
+
+        if len(node.__dict__) != len(_node_fields):
+            # атрибуты, которые GameBuilder выставляет корневой вершине (black_player и т.п.)
+            for key, value in node.__dict__.items():
+                if key not in _node_fields:
+                    self._record(index, _ATTRIBUTE)
+                    ops.append(self._string(key))
+                    self._value(value)
+
+    def _string(self, value):
+        index = self._strings.get(value)
+        if index is None:
+            index = len(self._strings)
+            self._strings[value] = index
+        return index
+
+    def _value(self, value):
+        ops = self._ops
+        if value is None:
+            ops.append(_NONE)
+        elif isinstance(value, str):
+            ops.extend((_STR, self._string(value)))
+        elif isinstance(value, bool):
+            ops.extend((_BOOL, int(value)))
+        elif isinstance(value, int):
+            # varint без знака: отрицательные числа чередуются с положительными (zigzag)
+            ops.extend((_INT, value * 2 if value >= 0 else -value * 2 - 1))
+        elif isinstance(value, float):
+            ops.extend((_FLOAT, self._string(repr(value))))
+        elif isinstance(value, Point):
+            ops.extend((_POINT, value.x, value.y))
+        elif isinstance(value, Stone):
+            ops.extend((_STONE, value.value))
+        elif isinstance(value, Move):
+            if value.point is None:
+                ops.extend((_MOVE, value.stone.value, 0, 0))
+            else:
+                ops.extend((_MOVE, value.stone.value, value.point.x, value.point.y))
+        elif isinstance(value, list):
+            ops.extend((_LIST, len(value)))
+            for item in value:
+                self._value(item)
+        else:
+            raise TypeError("Unsupported value type: {}".format(type(value).__name__))
+
+
+class _Reader:
+    def __init__(self, data):
+        self._data = data
+        self._strings = None
+        self._ops = None
+        self._pos = 0
+
+    def read(self):
+        data = self._data
+        if len(data) < _header.size:
+            raise ValueError("Not a binary game: data is too short")
+        magic, version, count, string_count, strings_size, ops_size, typecodes = _header.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a binary game")
+        if version != FORMAT_VERSION:
+            raise ValueError("Unsupported binary game version: {}".format(version))
+
+        offset = _header.size
+        moves, offset = _from_bytes('H', data, offset, count)
+        children, offset = _read_column(typecodes[0:1], data, offset, count)
+        comments, offset = _read_column(typecodes[1:2], data, offset, count)
+        names, offset = _read_column(typecodes[2:3], data, offset, count)
+        if offset + strings_size + ops_size != len(data):
+            raise ValueError("Binary game is corrupted")
+
+        lengths, start = _from_varints(data, offset, offset + strings_size, string_count)
+        text = bytes(data[start:offset + strings_size]).decode('utf-8', 'surrogatepass')
+        offset += strings_size
+        self._ops, _ = _from_varints(data, offset, len(data))
+
+        strings = list(_predefined_strings)
+        start = 0
+        for length in lengths:
+            strings.append(text[start:start + length])
+            start += length
+        if start != len(text):
+            raise ValueError("Binary game is corrupted")
+        self._strings = strings
+
+        # при создании десятков тысяч объектов сборщик мусора отнимает больше времени, чем сама загрузка
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            game = Game()
+            nodes = self._read_nodes(children, moves, comments, names)
+            game.root = nodes[0] if count != 0 else None
+            self._read_rare_fields(nodes, game.game_info)
+        except (IndexError, TypeError, RecursionError):
+            # ссылки за пределы таблиц и записи, обрезанные посередине
+            raise ValueError("Binary game is corrupted")
+        finally:
+            if gc_enabled:
+                gc.enable()
+        return game
+
+    def _read_nodes(self, children, moves, comments, names):
+        nodes = []
+        append = nodes.append
+        strings = self._strings
+        stones = _stones
+        new_node = GameNode.__new__
+        # вершины, у которых ещё не все дети прочитаны, и сколько детей им осталось
+        parents = []
+        left = []
+        for count, key, comment, name in zip(children, moves, comments, names):
+            stone = key >> 12
+            if stone == 0:
+                move = None
+            else:
+                x = (key >> 6) & 63
+                move = Move(stones[stone], Point(x, key & 63) if x != 0 else None)
+
+            node = new_node(GameNode)
+            # то же, что GameNode.__init__, но без лишних вызовов
+            node.__dict__ = {
+                'extra': {},
+                'move': move,
+                'add_black': [],
+                'add_white': [],
+                'empty': [],
+                'move_number': None,
+                'turn_to_play': None,
+                'node_name': strings[name],
+                'comment': strings[comment],
+                'annotation': None,
+                '_markups': set(),
+                'next_nodes': []
+            }
+            # в прямом порядке родитель вершины - последняя вершина с непрочитанными детьми
+            if len(parents) != 0:
+                parents[-1].next_nodes.append(node)
+                left[-1] -= 1
+                if left[-1] == 0:
+                    parents.pop()
+                    left.pop()
+            elif len(nodes) != 0:
+                raise ValueError("Binary game is corrupted")
+            append(node)
+            if count != 0:
+                parents.append(node)
+                left.append(count)
+
+        if len(parents) != 0:
+            raise ValueError("Binary game is corrupted")
+        return nodes
+
+    def _read_rare_fields(self, nodes, info):
+        ops = self._ops
+        strings = self._strings
+        end = len(ops)
+        pos = 0
+        index = 0
+        info_items = {}
+        while pos < end:
+            field = ops[pos]
+            if field < _INFO_ITEM:
+                index += ops[pos + 1]
+                pos += 2
+            else:
+                pos += 1
+            node = _item(nodes, index) if field < _INFO_ITEM else None
+            if field in (_ADD_BLACK, _ADD_WHITE, _EMPTY):
+                count = ops[pos]
+                points = [_point(ops[i], ops[i + 1]) for i in range(pos + 1, pos + 1 + 2 * count, 2)]
+                pos += 1 + 2 * count
+                if field == _ADD_BLACK:
+                    node.add_black = points
+                elif field == _ADD_WHITE:
+                    node.add_white = points
+                else:
+                    node.empty = points
+            elif field == _MOVE_NUMBER:
+                self._pos = pos
+                node.move_number = self._value()
+                pos = self._pos
+            elif field == _TURN_TO_PLAY:
+                node.turn_to_play = _item(_stones, ops[pos])
+                pos += 1
+            elif field == _ANNOTATION:
+                node.annotation = _item(_annotations, ops[pos])()
+                pos += 1
+            elif field == _MARKUPS:
+                count = ops[pos]
+                markups = set()
+                for i in range(pos + 1, pos + 1 + 4 * count, 4):
+                    kind = _item(_markups, ops[i])
+                    markup = kind(_item(strings, ops[i + 1])) if kind is Label else kind()
+                    markups.add((markup, _point(ops[i + 2], ops[i + 3])))
+                node._markups = markups
+                pos += 1 + 4 * count
+            elif field in (_EXTRA, _ATTRIBUTE, _INFO_ITEM, _INFO_ATTRIBUTE):
+                key = _item(strings, ops[pos])
+                self._pos = pos + 1
+                value = self._value()
+                pos = self._pos
+                if field == _EXTRA:
+                    node.extra[key] = value
+                elif field == _ATTRIBUTE:
+                    setattr(node, key, value)
+                elif field == _INFO_ITEM:
+                    info_items[key] = value
+                else:
+                    setattr(info, key, value)
+            else:
+                raise ValueError("Binary game is corrupted: unknown field {}".format(field))
+
+        info._info = info_items
+
+    def _value(self):
+        ops = self._ops
+        pos = self._pos
+        tag = ops[pos]
+        if tag == _NONE:
+            self._pos = pos + 1
+            return None
+        if tag == _STR:
+            self._pos = pos + 2
+            return _item(self._strings, ops[pos + 1])
+        if tag == _INT:
+            self._pos = pos + 2
+            value = ops[pos + 1]
+            return value >> 1 if value & 1 == 0 else -(value >> 1) - 1
+        if tag == _BOOL:
+            self._pos = pos + 2
+            return bool(ops[pos + 1])
+        if tag == _FLOAT:
+            self._pos = pos + 2
+            return float(_item(self._strings, ops[pos + 1]))
+        if tag == _POINT:
+            self._pos = pos + 3
+            return Point(ops[pos + 1], ops[pos + 2])
+        if tag == _STONE:
+            self._pos = pos + 2
+            return _item(_stones, ops[pos + 1])
+        if tag == _MOVE:
+            self._pos = pos + 4
+            point = Point(ops[pos + 2], ops[pos + 3]) if ops[pos + 2] != 0 else None
+            return Move(_item(_stones, ops[pos + 1]), point)
+        if tag == _LIST:
+            self._pos = pos + 2
+            return [self._value() for _ in range(ops[pos + 1])]
+
+        raise ValueError("Binary game is corrupted: unknown value tag {}".format(tag))
+
+
+def _item(table, index):
+    """ Элемент таблицы по индексу из данных; отрицательный индекс не отсчитывается с конца """
+    if index < 0 or index >= len(table):
+        raise ValueError("Binary game is corrupted: index {} out of range".format(index))
+    return table[index]
+
+
+def _point(x, y):
+    return Point(x, y) if x != 0 else None
+
+
+def _move_key(move):
+    """ Ход как 16-битное целое: цвет и координаты (0, 0 - пас); 0 - нет хода """
+    if move is None:
+        return 0
+    if move.point is None:
+        return move.stone.value << 12
+    x, y = move.point.x, move.point.y
+    if not (0 < x <= _MAX_COORDINATE and 0 < y <= _MAX_COORDINATE):
+        raise ValueError("Move is out of range: {}".format(move))
+    return (move.stone.value << 12) | (x << 6) | y
+
+
+def _narrow(values):
+    """ Массив значений самого узкого типа или None, если все значения нулевые """
+    largest = max(values, default=0)
+    if largest == 0:
+        return None
+    for typecode in 'BHI':
+        column = array(typecode)
+        if largest < 1 << (8 * column.itemsize):
+            column.extend(values)
+            return column
+    raise ValueError("Too many nodes or strings")
+
+
+def _read_column(typecode, data, offset, count):
+    if typecode == _ABSENT:
+        return repeat(0, count), offset
+    if typecode not in (b'B', b'H', b'I'):
+        raise ValueError("Binary game is corrupted")
+    return _from_bytes(typecode.decode('ascii'), data, offset, count)
+
+
+def _to_varints(values):
+    """ Целые без знака в байтах по 7 бит, старший бит - есть ли продолжение """
+    result = bytearray()
+    for value in values:
+        if value < 0:
+            raise ValueError("Negative value can not be written: {}".format(value))
+        while value >= 0x80:
+            result.append((value & 0x7f) | 0x80)
+            value >>= 7
+        result.append(value)
+    return result
+
+
+def _from_varints(data, start, end, count=None):
+    """ Читает count целых (все до end, если count не задан); возвращает (список, позиция после них) """
+    stop = end if count is None else min(end, start + count)
+    segment = bytes(data[start:stop])
+    if max(segment, default=0) < 0x80 and (count is None or len(segment) == count):
+        # обычный случай: все значения - однобайтовые
+        return list(segment), stop
+
+    values = []
+    value = 0
+    shift = 0
+    pos = start
+    while pos < end and (count is None or len(values) < count):
+        byte = data[pos]
+        pos += 1
+        if byte < 0x80:
+            values.append(value | (byte << shift))
+            value = 0
+            shift = 0
+        else:
+            value |= (byte & 0x7f) << shift
+            shift += 7
+    if shift != 0 or (count is not None and len(values) != count):
+        raise ValueError("Binary game is corrupted")
+    return values, pos
+
+
+def _to_bytes(values):
+    if sys.byteorder == 'big':
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_bytes(typecode, data, offset, count):
+    values = array(typecode)
+    end = offset + values.itemsize * count
+    if end > len(data):
+        raise ValueError("Binary game is corrupted")
+    values.frombytes(data[offset:end])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return values, end
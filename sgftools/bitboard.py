@@ -0,0 +1,436 @@
+from sgftools.board import Board, Node, ImpossibleMove, SuicideMove, KoViolation, SuperkoViolation, \
+    zobrist_table, _Cell, _opponent, _stones, _turn_keys
+from sgftools.game import Point, Stone, Circle, Square, Cross, Triangle, Label
+
+
+def _layout(size):
+    """ Бит точки с индексом (x - 1) * size + (y - 1) и маска доски.
+
+    Строки дополнены пустым столбцом, поэтому сдвиг на 1 не переносит камни с края на соседнюю строку.
+    """
+    layout = _layouts.get(size)
+    if layout is None:
+        width = size + 1
+        bits = tuple(1 << (x * width + y) for x in range(size) for y in range(size))
+        layout = (width, bits, sum(bits))
+        _layouts[size] = layout
+    return layout
+
+
+_layouts = dict()
+
+
+class BitBoard:
+    """ Доска на битовых множествах: камни каждого цвета - целое число Python, бит на точку.
+
+    Цепочки и дамэ находятся сдвигами и масками, записей цепочек и массива камней нет.
+    Интерфейс тот же, что у Board (apply, undo, copy, snapshot, строгий режим и т.д.),
+    снимки доски совместимы с Board.
+    """
+    def __init__(self, size: int=19, strict=False):
+        self.name = ''
+        self._size = size
+        self._width, self._bits, self._mask = _layout(size)
+        # множества камней по Stone.value, элемент 0 не используется
+        self._sets = [0, 0, 0]
+        self._markers = dict()
+        self._zobrist = zobrist_table(size)
+        self._hash = 0
+        # изменения, сделанные каждым apply: (камни, пометки, очередь хода и ко до применения, запомнена ли позиция)
+        self._history = []
+        self.strict = strict
+        self._ko = None
+        self._positions = {0: 1}
+        self.turn_to_play = None
+        self.comment = ''
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def position_hash(self):
+        """ Хэш Зобриста расположения камней """
+        return self._hash
+
+    @property
+    def zobrist_hash(self):
+        """ Хэш Зобриста расположения камней вместе с очередью хода """
+        if self.turn_to_play is None:
+            return self._hash
+        return self._hash ^ _turn_keys[self.turn_to_play.value]
+
+    def bounding_box(self):
+        """ (min_x, min_y, max_x, max_y) занятых точек - с камнем или пометкой; None для пустой доски """
+        occupied = self._sets[1] | self._sets[2]
+        bits = self._bits
+        for index in self._markers:
+            occupied |= bits[index]
+        if occupied == 0:
+            return None
+
+        width = self._width
+        row = (1 << self._size) - 1
+        rows = [x for x in range(self._size) if (occupied >> (x * width)) & row != 0]
+        columns = 0
+        for x in rows:
+            columns |= (occupied >> (x * width)) & row
+        return rows[0] + 1, (columns & -columns).bit_length(), rows[-1] + 1, columns.bit_length()
+
+    def stone_values(self):
+        """ Камни как bytes: Stone.value (0 - пусто) по индексам (x - 1) * size + (y - 1) """
+        values = bytearray(self._size * self._size)
+        for value in (Stone.White.value, Stone.Black.value):
+            for index in self._indices(self._sets[value]):
+                values[index] = value
+        return bytes(values)
+
+    def copy(self):
+        """ Копия доски без истории apply """
+        board = type(self)(self._size)
+        board.name = self.name
+        board.comment = self.comment
+        board._sets = list(self._sets)
+        board._markers = dict(self._markers)
+        board._hash = self._hash
+        board.turn_to_play = self.turn_to_play
+        board.strict = self.strict
+        board._ko = self._ko
+        board._positions = dict(self._positions)
+        return board
+
+    def snapshot(self):
+        """ Компактное неизменяемое состояние доски (камни, пометки, очередь хода) для restore() """
+        return self.stone_values(), tuple(self._markers.items()), self._hash, self.turn_to_play
+
+    def restore(self, snapshot):
+        """ Восстанавливает состояние из snapshot() доски того же размера; история apply очищается """
+        stones, markers, position_hash, turn_to_play = snapshot
+        sets = [0, 0, 0]
+        bits = self._bits
+        for index, value in enumerate(stones):
+            if value != 0:
+                sets[value] |= bits[index]
+        self._sets = sets
+        self._markers = dict(markers)
+        self._hash = position_hash
+        self.turn_to_play = turn_to_play
+        self._history = []
+        self._ko = None
+        self._positions = {position_hash: 1}
+
+    def black(self, x, y):
+        self._put(self._index(x, y), Stone.Black.value)
+        return self
+
+    def white(self, x, y):
+        self._put(self._index(x, y), Stone.White.value)
+        return self
+
+    def circle(self, x, y):
+        return self._marker(x, y, Circle())
+
+    def square(self, x, y):
+        return self._marker(x, y, Square())
+
+    def cross(self, x, y):
+        return self._marker(x, y, Cross())
+
+    def triangle(self, x, y):
+        return self._marker(x, y, Triangle())
+
+    def label(self, x: int, y: int, label: str):
+        return self._marker(x, y, Label(label))
+
+    def _marker(self, x, y, marker):
+        self._set_marker(self._index(x, y), marker)
+        return self
+
+    def _set_marker(self, index, marker):
+        """ Ставит пометку; None - убирает """
+        if marker is None:
+            self._markers.pop(index, None)
+        else:
+            self._markers[index] = marker
+
+    def apply(self, game_node):
+        """ Применяет узел к доске. Изменения запоминаются, последний apply отменяется вызовом undo() """
+        stones = []
+        markers = []
+        # суперко касается только позиций после ходов: позиции после расстановки не запоминаются
+        counted = self.strict and game_node.move is not None
+        delta = (stones, markers, self.turn_to_play, self._ko, counted)
+        try:
+            self._apply(game_node, stones, markers)
+        except (ImpossibleMove, IndexError):
+            # узел не применяется частично
+            self._revert(delta)
+            raise
+
+        self._history.append(delta)
+        if counted:
+            self._positions[self._hash] = self._positions.get(self._hash, 0) + 1
+
+    def _apply(self, game_node, stones, markers):
+        if game_node.empty or game_node.add_black or game_node.add_white:
+            self._apply_setup(game_node, stones, markers)
+
+        for markup in game_node.markups:
+            index = self._point_index(markup[1])
+            markers.append((index, self._markers.get(index)))
+            self._set_marker(index, markup[0])
+
+        if game_node.turn_to_play is not None:
+            self.turn_to_play = game_node.turn_to_play
+
+        move = game_node.move
+        if move is None:
+            return
+
+        # pass
+        if move.point is None:
+            self.turn_to_play = _opponent(move.stone)
+            return
+
+        index = self._point_index(move.point)
+        sets = self._sets
+        if (sets[1] | sets[2]) & self._bits[index]:
+            raise ImpossibleMove("Here already is the stone: {}".format(move.point))
+
+        color = move.stone.value
+        ko = self._ko
+        self._ko = None
+        removed = self._play(index, color)
+        stones.append((index, 0))
+        if len(removed) != 0:
+            enemy = 3 - color  # Stone.White.value + Stone.Black.value
+            stones.extend((x, enemy) for x in removed)
+        if self.strict:
+            self._check_move(index, color, removed, ko, move.point)
+        self.turn_to_play = _opponent(move.stone)
+
+    def _check_move(self, index, color, removed, ko, point):
+        if ko == (index, color):
+            raise KoViolation("Ko can not be retaken immediately: {}".format(point))
+        bit = self._bits[index]
+        empty = self._mask & ~(self._sets[1] | self._sets[2])
+        if len(removed) == 0 and self._dilate(self._flood(bit, self._sets[color])) & empty == 0:
+            raise SuicideMove("Suicide is not allowed: {}".format(point))
+        if self._hash in self._positions:
+            raise SuperkoViolation("The move repeats a previous position: {}".format(point))
+
+        # одиночный камень с единственным дамэ, взявший один камень, - ко
+        neighbours = self._dilate(bit) & ~bit
+        liberties = neighbours & empty
+        if len(removed) == 1 and neighbours & self._sets[color] == 0 and liberties & (liberties - 1) == 0:
+            self._ko = (removed[0], 3 - color)
+
+    def _apply_setup(self, game_node, stones, markers):
+        changed = False
+        for value, points in ((0, game_node.empty), (Stone.Black.value, game_node.add_black),
+                              (Stone.White.value, game_node.add_white)):
+            for point in points:
+                index = self._point_index(point)
+                old = self._value(index)
+                stones.append((index, old))
+                changed |= old != value
+                self._put(index, value)
+                if value == 0 and index in self._markers:
+                    markers.append((index, self._markers[index]))
+                    self._set_marker(index, None)
+
+        # расстановка, изменившая доску, снимает запрет ко
+        if changed:
+            self._ko = None
+
+    def undo(self):
+        """ Отменяет последний apply за время, пропорциональное числу изменённых им точек """
+        if len(self._history) == 0:
+            raise IndexError("Nothing to undo")
+
+        delta = self._history.pop()
+        if delta[4]:
+            count = self._positions.get(self._hash, 0)
+            if count > 1:
+                self._positions[self._hash] = count - 1
+            else:
+                self._positions.pop(self._hash, None)
+        self._revert(delta)
+
+    def _revert(self, delta):
+        stones, markers, turn_to_play, ko, _ = delta
+        for index, value in reversed(stones):
+            self._put(index, value)
+        for index, marker in reversed(markers):
+            self._set_marker(index, marker)
+        self.turn_to_play = turn_to_play
+        self._ko = ko
+
+    def clear_history(self):
+        self._history = []
+
+    def last_changes(self):
+        """ Камни, изменённые последним apply: список (Point, было, стало) со значениями Stone или None """
+        if len(self._history) == 0:
+            return []
+        size = self._size
+        result = []
+        seen = set()
+        # точка может меняться несколько раз (AE и AB в одном узле) - берём первое старое значение
+        for index, old in self._history[-1][0]:
+            if index not in seen:
+                seen.add(index)
+                new = self._value(index)
+                if old != new:
+                    result.append((Point(index // size + 1, index % size + 1), _stones[old], _stones[new]))
+        return result
+
+    def _value(self, index):
+        bit = self._bits[index]
+        if self._sets[Stone.Black.value] & bit:
+            return Stone.Black.value
+        if self._sets[Stone.White.value] & bit:
+            return Stone.White.value
+        return 0
+
+    def _put(self, index, value):
+        old = self._value(index)
+        if old == value:
+            return
+        bit = self._bits[index]
+        sets = self._sets
+        zobrist = self._zobrist
+        self._hash ^= zobrist[old][index] ^ zobrist[value][index]
+        if old != 0:
+            sets[old] ^= bit
+        if value != 0:
+            sets[value] |= bit
+
+    def _play(self, index, color):
+        """ Ставит камень и снимает соседние цепочки без дамэ. Возвращает индексы снятых камней """
+        sets = self._sets
+        bit = self._bits[index]
+        sets[color] |= bit
+        self._hash ^= self._zobrist[color][index]
+
+        enemy_color = 3 - color  # Stone.White.value + Stone.Black.value
+        enemy = sets[enemy_color]
+        candidates = self._dilate(bit) & enemy
+        if candidates == 0:
+            return []
+
+        empty = self._mask & ~(sets[1] | sets[2])
+        width = self._width
+        dead = 0
+        while candidates != 0:
+            seed = candidates & -candidates
+            # у камня есть своё дамэ - цепочку можно не искать
+            if ((seed << 1) | (seed >> 1) | (seed << width) | (seed >> width)) & empty != 0:
+                candidates ^= seed
+                continue
+            chain = self._flood(seed, enemy)
+            candidates &= ~chain
+            if self._dilate(chain) & empty == 0:
+                dead |= chain
+        if dead == 0:
+            return []
+
+        sets[enemy_color] = enemy & ~dead
+        removed = self._indices(dead)
+        zobrist = self._zobrist[enemy_color]
+        position_hash = self._hash
+        for x in removed:
+            position_hash ^= zobrist[x]
+        self._hash = position_hash
+        return removed
+
+    def _dilate(self, bits):
+        """ Соседи точек множества (вместе с ними самими) """
+        width = self._width
+        return (bits | (bits << 1) | (bits >> 1) | (bits << width) | (bits >> width)) & self._mask
+
+    def _flood(self, seed, stones):
+        """ Цепочка камней из stones, содержащая seed """
+        width = self._width
+        while True:
+            grown = (seed | (seed << 1) | (seed >> 1) | (seed << width) | (seed >> width)) & stones
+            if grown == seed:
+                return seed
+            seed = grown
+
+    def _indices(self, bits):
+        width = self._width
+        size = self._size
+        result = []
+        while bits != 0:
+            low = bits & -bits
+            position = low.bit_length() - 1
+            result.append(position // width * size + position % width)
+            bits ^= low
+        return result
+
+    def _index(self, x, y):
+        if x <= 0 or x > self._size or y <= 0 or y > self._size:
+            raise IndexError("point {} out of board. Board size: {}".format(Point(x, y), self.size))
+        return (x - 1) * self._size + y - 1
+
+    def _point_index(self, point):
+        return self._index(point.x, point.y)
+
+    def _pos_index(self, pos):
+        if isinstance(pos, Point):
+            return self._index(pos.x, pos.y)
+        return self._index(*pos)
+
+    def __setitem__(self, pos, value):
+        index = self._pos_index(pos)
+        if value is None:
+            self._put(index, 0)
+            self._set_marker(index, None)
+            return
+
+        self._put(index, value.stone.value if value.stone is not None else 0)
+        self._set_marker(index, value.marker)
+
+    def __getitem__(self, pos):
+        index = self._pos_index(pos)
+        return Node(_stones[self._value(index)], self._markers.get(index))
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __eq__(self, other):
+        if other is None:
+            return False
+
+        if not isinstance(other, (BitBoard, Board)):
+            return NotImplemented
+
+        return other.size == self._size and \
+               other.name == self.name and \
+               other.comment == self.comment and \
+               other.position_hash == self._hash and \
+               other._markers == self._markers and \
+               other.stone_values() == self.stone_values()
+
+    def __hash__(self):
+        return self._hash
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __str__(self):
+        return {Point(x.x, x.y): x.node for x in self}.__str__()
+
+    def __iter__(self):
+        return self._iteration()
+
+    def _iteration(self):
+        stones = self.stone_values()
+        markers = self._markers
+        size = self._size
+        occupied = set(self._indices(self._sets[1] | self._sets[2]))
+        occupied.update(markers)
+        for index in sorted(occupied):
+            yield _Cell(index // size + 1, index % size + 1, Node(_stones[stones[index]], markers.get(index)))
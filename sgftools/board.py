@@ -1,5 +1,5 @@
 
-import itertools
+import random
 from collections import namedtuple
 
 from sgftools.game import Point, Stone, Circle, Square, Cross, Triangle, Label
@@ -20,6 +20,18 @@ class ImpossibleMove(Exception):
         return self.message
 
 
+class SuicideMove(ImpossibleMove):
+    pass
+
+
+class KoViolation(ImpossibleMove):
+    pass
+
+
+class SuperkoViolation(ImpossibleMove):
+    pass
+
+
 class Node:
     def __init__(self, stone=None, marker=None):
         self.marker = marker
@@ -56,17 +68,181 @@ class Node:
         return "{}/{}".format(self.stone, self.marker)
 
 
+def neighbour_table(size):
+    """ Соседи каждой точки доски size x size по индексам, общие для всех досок этого размера """
+    table = _neighbour_tables.get(size)
+    if table is None:
+        table = []
+        for x in range(size):
+            for y in range(size):
+                neighbours = []
+                if x > 0:
+                    neighbours.append((x - 1) * size + y)
+                if x < size - 1:
+                    neighbours.append((x + 1) * size + y)
+                if y > 0:
+                    neighbours.append(x * size + y - 1)
+                if y < size - 1:
+                    neighbours.append(x * size + y + 1)
+                table.append(tuple(neighbours))
+        table = tuple(table)
+        _neighbour_tables[size] = table
+    return table
+
+
+_neighbour_tables = dict()
+
+
+def zobrist_table(size):
+    """ Случайные 64-битные ключи Зобриста для доски size x size: table[значение камня][индекс точки].
+
+    Генератор инициализируется постоянным зерном, поэтому хэши совпадают между запусками и процессами.
+    """
+    table = _zobrist_tables.get(size)
+    if table is None:
+        generator = random.Random("sgftools-zobrist-{}".format(size))
+        points = size * size
+        table = (
+            (0,) * points,
+            tuple(generator.getrandbits(64) for _ in range(points)),
+            tuple(generator.getrandbits(64) for _ in range(points))
+        )
+        _zobrist_tables[size] = table
+    return table
+
+
+_zobrist_tables = dict()
+
+
+def _make_turn_keys():
+    generator = random.Random("sgftools-zobrist-turn")
+    return 0, generator.getrandbits(64), generator.getrandbits(64)
+
+
+# ключи очереди хода по Stone.value, 0 - очередь не известна
+_turn_keys = _make_turn_keys()
+
+
+class _Chain:
+    """ Цепочка камней одного цвета и её дамэ (индексы точек) """
+    __slots__ = ('color', 'stones', 'liberties')
+
+    def __init__(self, color, stones, liberties):
+        self.color = color
+        self.stones = stones
+        self.liberties = liberties
+
+
+def _opponent(stone):
+    return Stone.White if stone == Stone.Black else Stone.Black
+
+
+# значение в массиве камней - Stone.value, 0 - пусто
+_stones = (None, Stone.White, Stone.Black)
+
+
 class Board:
-    def __init__(self, size:int=19):
+    """ Доска: камни хранятся в bytearray по индексу (x - 1) * size + (y - 1), пометки - в словаре по индексу.
+
+    В строгом режиме (strict) apply отвергает кроме хода на занятую точку самоубийство, взятие ко
+    и повторение позиции (позиционное суперко); режим задаётся при создании доски.
+    """
+    def __init__(self, size:int=19, strict=False):
         self.name = ''
         self._size = size
-        self._grid = dict()
+        self._stones = bytearray(size * size)
+        self._markers = dict()
+        self._neighbours = neighbour_table(size)
+        # цепочка для каждого камня; None - пустая точка или цепочка ещё не найдена (после расстановки)
+        self._chains = [None] * (size * size)
+        self._zobrist = zobrist_table(size)
+        self._hash = 0
+        # изменения, сделанные каждым apply: (камни, пометки, очередь хода и ко до применения, запомнена ли позиция)
+        self._history = []
+        self.strict = strict
+        # в строгом режиме: запрещённое ко (индекс, Stone.value) и сколько раз встречалась каждая позиция
+        self._ko = None
+        self._positions = {0: 1}
+        # кто ходит следующим: меняется ходами и свойством PL, None - не известно
+        self.turn_to_play = None
+        # занятые точки (с камнем или пометкой) и их число по вертикалям и горизонталям; None - пересчитать
+        self._occupied = set()
+        self._rows = [0] * size
+        self._columns = [0] * size
+        self._box = None
+        self._box_dirty = False
         self.comment = ''
 
     @property
     def size(self):
         return self._size
 
+    @property
+    def position_hash(self):
+        """ Хэш Зобриста расположения камней """
+        return self._hash
+
+    @property
+    def zobrist_hash(self):
+        """ Хэш Зобриста расположения камней вместе с очередью хода """
+        if self.turn_to_play is None:
+            return self._hash
+        return self._hash ^ _turn_keys[self.turn_to_play.value]
+
+    def bounding_box(self):
+        """ (min_x, min_y, max_x, max_y) занятых точек - с камнем или пометкой; None для пустой доски """
+        if self._occupied is None:
+            self._count_occupied()
+        if self._box_dirty:
+            rows = [x for x in range(self._size) if self._rows[x] != 0]
+            columns = [y for y in range(self._size) if self._columns[y] != 0]
+            self._box = (rows[0] + 1, columns[0] + 1, rows[-1] + 1, columns[-1] + 1) if len(rows) != 0 else None
+            self._box_dirty = False
+        return self._box
+
+    def stone_values(self):
+        """ Камни как bytes: Stone.value (0 - пусто) по индексам (x - 1) * size + (y - 1) """
+        return bytes(self._stones)
+
+    def copy(self):
+        """ Копия доски без истории apply; цепочки копии строятся заново при первом ходе на ней """
+        board = type(self)(self._size)
+        board.name = self.name
+        board.comment = self.comment
+        board._stones[:] = self._stones
+        board._markers = dict(self._markers)
+        board._hash = self._hash
+        board.turn_to_play = self.turn_to_play
+        board.strict = self.strict
+        board._ko = self._ko
+        board._positions = dict(self._positions)
+        if self._occupied is None:
+            board._occupied = None
+        else:
+            board._occupied = set(self._occupied)
+            board._rows = list(self._rows)
+            board._columns = list(self._columns)
+            board._box = self._box
+            board._box_dirty = self._box_dirty
+        return board
+
+    def snapshot(self):
+        """ Компактное неизменяемое состояние доски (камни, пометки, очередь хода) для restore() """
+        return bytes(self._stones), tuple(self._markers.items()), self._hash, self.turn_to_play
+
+    def restore(self, snapshot):
+        """ Восстанавливает состояние из snapshot() доски того же размера; история apply очищается """
+        stones, markers, position_hash, turn_to_play = snapshot
+        self._stones[:] = stones
+        self._markers = dict(markers)
+        self._hash = position_hash
+        self.turn_to_play = turn_to_play
+        self._chains = [None] * len(self._stones)
+        self._history = []
+        self._ko = None
+        self._positions = {position_hash: 1}
+        self._occupied = None
+
     def black(self, x, y):
         return self._node(x, y, Stone.Black)
 
@@ -89,131 +265,334 @@ class Board:
         return self._marker(x, y, Label(label))
 
     def _marker(self, x, y, marker):
-        node = self[x, y]
-        node.marker = marker
-        self[x, y] = node
+        self._set_marker(self._index(x, y), marker)
         return self
 
+    def _set_marker(self, index, marker):
+        """ Ставит пометку; None - убирает """
+        markers = self._markers
+        marked = index in markers
+        if marker is None:
+            if marked:
+                del markers[index]
+        else:
+            markers[index] = marker
+        if marked != (marker is not None) and self._stones[index] == 0:
+            self._occupy(index, not marked)
+
+    def _count_occupied(self):
+        self._occupied = set()
+        self._rows = [0] * self._size
+        self._columns = [0] * self._size
+        self._box_dirty = True
+        markers = self._markers
+        for index, stone in enumerate(self._stones):
+            if stone != 0 or index in markers:
+                self._occupy(index, True)
+
+    def _occupy(self, index, occupied):
+        """ Учитывает, что точка стала занятой или свободной """
+        if self._occupied is None:
+            return
+        x, y = divmod(index, self._size)
+        if occupied:
+            self._occupied.add(index)
+            self._rows[x] += 1
+            self._columns[y] += 1
+            if self._rows[x] == 1 or self._columns[y] == 1:
+                self._box_dirty = True
+        else:
+            self._occupied.discard(index)
+            self._rows[x] -= 1
+            self._columns[y] -= 1
+            if self._rows[x] == 0 or self._columns[y] == 0:
+                self._box_dirty = True
+
     def _node(self, x, y, color):
-        node = self[x, y]
-        node.stone = color
-        self[x, y] = node
+        index = self._index(x, y)
+        self._put(index, color.value)
+        self._forget_chains((index,))
         return self
 
     def apply(self, game_node):
-        for point in game_node.empty:
-            del self._grid[point]
-
-        for point in game_node.add_black:
-            self.black(point.x, point.y)
-
-        for point in game_node.add_white:
-            self.white(point.x, point.y)
+        """ Применяет узел к доске. Изменения запоминаются, последний apply отменяется вызовом undo() """
+        stones = []
+        markers = []
+        # суперко касается только позиций после ходов: позиции после расстановки не запоминаются
+        counted = self.strict and game_node.move is not None
+        delta = (stones, markers, self.turn_to_play, self._ko, counted)
+        try:
+            self._apply(game_node, stones, markers)
+        except (ImpossibleMove, IndexError):
+            # узел не применяется частично
+            self._revert(delta)
+            raise
+
+        self._history.append(delta)
+        if counted:
+            self._positions[self._hash] = self._positions.get(self._hash, 0) + 1
+
+    def _apply(self, game_node, stones, markers):
+        if game_node.empty or game_node.add_black or game_node.add_white:
+            self._apply_setup(game_node, stones, markers)
 
         for markup in game_node.markups:
-            point = markup[1]
-            node = self[point]
-            node.marker = markup[0]
-            self[point] = node
+            index = self._point_index(markup[1])
+            markers.append((index, self._markers.get(index)))
+            self._set_marker(index, markup[0])
+
+        if game_node.turn_to_play is not None:
+            self.turn_to_play = game_node.turn_to_play
 
         if game_node.move is None:
             return
 
         # pass
         if game_node.move.point is None:
+            self.turn_to_play = _opponent(game_node.move.stone)
             return
 
-        node = self[game_node.move.point]
-        if node.stone is not None:
+        index = self._point_index(game_node.move.point)
+        if self._stones[index] != 0:
             raise ImpossibleMove("Here already is the stone: {}".format(game_node.move.point))
 
-        node.stone = game_node.move.stone
-        self[game_node.move.point] = node
-        self._execute_take_stones(game_node.move.point, game_node.move.stone)
-
-    def _execute_take_stones(self, point, stone):
-        # 1. Собрать соседние группы камней другого цвета
-        groups = []
-        neighbor_points = self._get_neighbours(point)
-        for pnt in neighbor_points:
-            already_in_any_group = any(pnt in grp for grp in groups)
-            if self[pnt].stone is not None and self[pnt].stone != stone and not already_in_any_group:
-                group = self._find_stone_group(pnt)
-                if len(group) > 0:
-                    groups.append(group)
-
-        # 2. Подсчитать дамэ групп
-        for grp in groups:
-            cnt = self._count_dame(grp)
-            # 3. Снять группы с дамэ = 0
-            if cnt == 0:
-                self._remove_group(grp)
-
-    def _remove_group(self, group):
-        for x in group:
-            self[x].stone = None
-
-    def _count_dame(self, group):
-        dame_set = set(y for y in
-                       itertools.chain.from_iterable(self._get_neighbours(x) for x in group)
-                       if self[y].stone is None)
-
-        return len(dame_set)
-
-    def _find_stone_group(self, pnt):
-        result = set()
-        stone = self[pnt].stone
-        candidates = [pnt]
-        while len(candidates) > 0:
-            result.update(candidates)
-            candidates = list(itertools.chain.from_iterable([self._get_neighbours(x) for x in candidates]))
-            candidates = [x for x in set(candidates) if not self._out_of_board(x)]
-            candidates = [x for x in candidates if self[x].stone == stone]
-            candidates = [x for x in candidates if x not in result]
-
+        color = game_node.move.stone.value
+        ko = self._ko
+        self._ko = None
+        removed = self._play(index, color)
+        stones.append((index, 0))
+        enemy = 3 - color  # Stone.White.value + Stone.Black.value
+        for x in removed:
+            stones.append((x, enemy))
+        if self.strict:
+            self._check_move(index, color, removed, ko, game_node.move.point)
+        self.turn_to_play = _opponent(game_node.move.stone)
+
+    def _check_move(self, index, color, removed, ko, point):
+        if ko == (index, color):
+            raise KoViolation("Ko can not be retaken immediately: {}".format(point))
+        if len(removed) == 0 and not self._has_liberties(index):
+            raise SuicideMove("Suicide is not allowed: {}".format(point))
+        if self._hash in self._positions:
+            raise SuperkoViolation("The move repeats a previous position: {}".format(point))
+
+        if len(removed) == 1 and self._is_lonely(index, color):
+            self._ko = (removed[0], 3 - color)
+
+    def _has_liberties(self, index):
+        return len(self._chains[index].liberties) != 0
+
+    def _is_lonely(self, index, color):
+        """ Одиночный камень с единственным дамэ: если он взял один камень, получилось ко """
+        liberties = 0
+        for neighbour in self._neighbours[index]:
+            value = self._stones[neighbour]
+            if value == color:
+                return False
+            if value == 0:
+                liberties += 1
+        return liberties == 1
+
+    def _apply_setup(self, game_node, stones, markers):
+        for point in game_node.empty:
+            index = self._point_index(point)
+            stones.append((index, self._stones[index]))
+            self._put(index, 0)
+            if index in self._markers:
+                markers.append((index, self._markers[index]))
+                self._set_marker(index, None)
+
+        for value, points in ((Stone.Black.value, game_node.add_black), (Stone.White.value, game_node.add_white)):
+            for point in points:
+                index = self._point_index(point)
+                stones.append((index, self._stones[index]))
+                self._put(index, value)
+
+        # расстановка, изменившая доску, снимает запрет ко
+        if any(self._stones[index] != old for index, old in stones):
+            self._ko = None
+        self._forget_chains([x[0] for x in stones])
+
+    def undo(self):
+        """ Отменяет последний apply за время, пропорциональное числу изменённых им точек """
+        if len(self._history) == 0:
+            raise IndexError("Nothing to undo")
+
+        delta = self._history.pop()
+        if delta[4]:
+            count = self._positions.get(self._hash, 0)
+            if count > 1:
+                self._positions[self._hash] = count - 1
+            else:
+                self._positions.pop(self._hash, None)
+        self._revert(delta)
+
+    def _revert(self, delta):
+        stones, markers, turn_to_play, ko, _ = delta
+        for index, value in reversed(stones):
+            self._put(index, value)
+        for index, marker in reversed(markers):
+            self._set_marker(index, marker)
+        self.turn_to_play = turn_to_play
+        self._ko = ko
+
+        self._forget_chains([x[0] for x in stones])
+
+    def clear_history(self):
+        self._history = []
+
+    def last_changes(self):
+        """ Камни, изменённые последним apply: список (Point, было, стало) со значениями Stone или None """
+        if len(self._history) == 0:
+            return []
+        size = self._size
+        stones = self._stones
+        result = []
+        seen = set()
+        # точка может меняться несколько раз (AE и AB в одном узле) - берём первое старое значение
+        for index, old in self._history[-1][0]:
+            if index not in seen:
+                seen.add(index)
+                if old != stones[index]:
+                    result.append((Point(index // size + 1, index % size + 1), _stones[old], _stones[stones[index]]))
         return result
 
-    def _get_neighbours(self, point):
-        points = [Point(point.x - 1, point.y),
-                  Point(point.x + 1, point.y),
-                  Point(point.x, point.y - 1),
-                  Point(point.x, point.y + 1)]
-        return [pnt for pnt in points if not self._out_of_board(pnt)]
-
-    def __setitem__(self, pos, value):
+    def _put(self, index, value):
+        stones = self._stones
+        old = stones[index]
+        zobrist = self._zobrist
+        self._hash ^= zobrist[old][index] ^ zobrist[value][index]
+        stones[index] = value
+        if (old == 0) != (value == 0) and index not in self._markers:
+            self._occupy(index, value != 0)
+
+    def _play(self, index, color):
+        """ Ставит камень и снимает соседние цепочки без дамэ. Возвращает индексы снятых камней """
+        stones = self._stones
+        chains = self._chains
+        neighbours = self._neighbours
+
+        chain = _Chain(color, {index}, set())
+        merged = []
+        captured = []
+        for neighbour in neighbours[index]:
+            value = stones[neighbour]
+            if value == 0:
+                chain.liberties.add(neighbour)
+                continue
+
+            other = chains[neighbour]
+            if other is None:
+                other = self._flood(neighbour)
+            if value == color:
+                if other not in merged:
+                    merged.append(other)
+            else:
+                other.liberties.discard(index)
+                if len(other.liberties) == 0 and other not in captured:
+                    captured.append(other)
+        self._put(index, color)
+
+        if len(merged) != 0:
+            # присоединяем меньшие цепочки к самой большой
+            largest = max(merged, key=lambda x: len(x.stones))
+            for other in merged:
+                if other is not largest:
+                    largest.stones |= other.stones
+                    largest.liberties |= other.liberties
+                    for x in other.stones:
+                        chains[x] = largest
+            largest.stones.add(index)
+            largest.liberties |= chain.liberties
+            largest.liberties.discard(index)
+            chain = largest
+        chains[index] = chain
+
+        removed = []
+        for dead in captured:
+            for x in dead.stones:
+                self._put(x, 0)
+                chains[x] = None
+            for x in dead.stones:
+                for neighbour in neighbours[x]:
+                    other = chains[neighbour]
+                    if other is not None:
+                        other.liberties.add(x)
+            removed.extend(dead.stones)
+
+        return removed
+
+    def _flood(self, start):
+        """ Находит цепочку, содержащую камень start, и запоминает её для всех её камней """
+        stones = self._stones
+        chains = self._chains
+        neighbours = self._neighbours
+        color = stones[start]
+        chain = _Chain(color, {start}, set())
+        chains[start] = chain
+        candidates = [start]
+        while len(candidates) > 0:
+            current = candidates.pop()
+            for neighbour in neighbours[current]:
+                value = stones[neighbour]
+                if value == 0:
+                    chain.liberties.add(neighbour)
+                elif value == color and chains[neighbour] is not chain:
+                    chains[neighbour] = chain
+                    chain.stones.add(neighbour)
+                    candidates.append(neighbour)
+        return chain
+
+    def _forget_chains(self, indices):
+        """ Забывает цепочки, проходящие через изменённые точки и их соседей; они найдутся заново при ходе рядом """
+        chains = self._chains
+        neighbours = self._neighbours
+        for index in indices:
+            for point in (index,) + neighbours[index]:
+                chain = chains[point]
+                if chain is not None:
+                    for x in chain.stones:
+                        chains[x] = None
+
+    def _index(self, x, y):
+        if x <= 0 or x > self._size or y <= 0 or y > self._size:
+            raise IndexError("point {} out of board. Board size: {}".format(Point(x, y), self.size))
+        return (x - 1) * self._size + y - 1
+
+    def _point_index(self, point):
+        return self._index(point.x, point.y)
+
+    def _pos_index(self, pos):
         if isinstance(pos, Point):
-            point = pos
-        else:
-            point = Point(*pos)
+            return self._index(pos.x, pos.y)
+        return self._index(*pos)
 
-        if self._out_of_board(point):
-            raise IndexError("point {} out of board. Board size: {}".format(point, self.size))
+    def __setitem__(self, pos, value):
+        index = self._pos_index(pos)
+        self._forget_chains((index,))
+        if value is None:
+            self._put(index, 0)
+            self._set_marker(index, None)
+            return
 
-        self._grid[point] = value
+        self._put(index, value.stone.value if value.stone is not None else 0)
+        self._set_marker(index, value.marker)
 
     def __getitem__(self, pos):
-        if isinstance(pos, Point):
-            point = pos
-        else:
-            point = Point(*pos)
-
-        if self._out_of_board(point):
-            raise IndexError("point {} out of board. Board size: {}".format(point, self.size))
-
-        return self._grid.get(point, Node())
-
-    def _out_of_board(self, point):
-        return point.x <= 0 or point.x > self._size or point.y <= 0 or point.y > self._size
+        index = self._pos_index(pos)
+        return Node(_stones[self._stones[index]], self._markers.get(index))
 
     def __ne__(self, other):
-        return not self.__eq__(other)
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
 
     def __eq__(self, other):
         if other is None:
             return False
 
-        if not isinstance(other, type(self)):
-            return False
+        # любые доски сравниваются по содержимому в обе стороны, остальное решает другой объект
+        if not isinstance(other, Board):
+            return NotImplemented
 
         return other.size == self._size and \
                other.name == self.name and \
@@ -221,26 +600,25 @@ class Board:
                self._grid_eq(other)
 
     def _grid_eq(self, other):
-        node_set = set(self._grid.keys()).union(other._grid.keys())
+        return self._hash == other._hash and self._stones == other._stones and self._markers == other._markers
 
-        return all(self[point] == other[point] for point in node_set)
+    def __hash__(self):
+        return self._hash
 
     def __repr__(self):
         return self.__str__()
 
     def __str__(self):
-        return self._grid.__str__()
+        return {Point(x.x, x.y): x.node for x in self}.__str__()
 
     def __iter__(self):
         return self._iteration()
 
     def _iteration(self):
-        for x in range(1, self.size  +1):
-            for y in range(1, self.size + 1):
-                node = self[x, y]
-                if not node.is_empty():
-                    yield _Cell(x, y, node)
-
-
-
-
+        stones = self._stones
+        markers = self._markers
+        size = self._size
+        if self._occupied is None:
+            self._count_occupied()
+        for index in sorted(self._occupied):
+            yield _Cell(index // size + 1, index % size + 1, Node(_stones[stones[index]], markers.get(index)))
@@ -0,0 +1,134 @@
+import hashlib
+import os
+import tempfile
+import zlib
+
+from sgftools import binaryformat
+from sgftools.parser import PARSER_VERSION
+
+CACHE_FORMAT_VERSION = 3
+
+
+class GameCache:
+    """ Кэш разобранных игр на диске.
+
+    Ключ - хэш содержимого файла вместе с версиями разборщика и формата кэша.
+    При превышении max_size удаляются давно не использованные записи (по времени изменения файла,
+    которое обновляется при каждом попадании), пока размер не опустится до low_water * max_size.
+
+    Размер кэша берётся из обхода каталога: между обходами процесс прибавляет к нему только свои записи,
+    а каталог обходится заново, когда эта оценка превысит max_size. Поэтому при нескольких процессах
+    кэш может временно превысить max_size не больше чем на (1 - low_water) * max_size на процесс.
+    """
+    suffix = '.game'
+    low_water = 0.9
+
+    def __init__(self, directory, max_size=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = None
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(bytes_data, options=''):
+        digest = hashlib.sha1("{}:{}:{}:".format(PARSER_VERSION, CACHE_FORMAT_VERSION, options).encode('ascii'))
+        digest.update(bytes_data)
+        return digest.hexdigest()
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as file:
+                game = self._loads(file.read())
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError, zlib.error):
+            # повреждённая запись - считаем промахом
+            self._remove(path)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return game
+
+    def put(self, key, game):
+        data = self._dumps(game)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(handle, 'wb') as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+
+        if self._size is not None:
+            self._size += len(data)
+        self._evict()
+
+    def clear(self):
+        for path, _, _ in self._entries():
+            self._remove(path)
+        self._size = 0
+
+    def stats(self):
+        entries = list(self._entries())
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(entries),
+            'size': sum(x[2] for x in entries)
+        }
+
+    def _evict(self):
+        if self._size is not None and self._size <= self.max_size:
+            return
+
+        entries = list(self._entries())
+        self._size = sum(x[2] for x in entries)
+        if self._size <= self.max_size:
+            return
+
+        limit = self.max_size * self.low_water
+        entries.sort(key=lambda x: x[1])
+        for path, _, size in entries:
+            if self._size <= limit:
+                break
+            if self._remove(path):
+                self._size -= size
+                self.evictions += 1
+
+    def _entries(self):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(self.suffix):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_mtime, stat.st_size
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + self.suffix)
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    @staticmethod
+    def _dumps(game):
+        return zlib.compress(binaryformat.dumps(game))
+
+    @staticmethod
+    def _loads(data):
+        return binaryformat.loads(zlib.decompress(data))
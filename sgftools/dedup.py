@@ -0,0 +1,111 @@
+""" Поиск одинаковых игр в архивах: отпечаток основного варианта и группировка файлов по отпечаткам.
+
+Отпечаток - 64-битный хэш размера доски и последовательности основного варианта: расстановки (AB, AW, AE)
+и ходов; заголовки, комментарии, пометки, варианты и кодировка файла на него не влияют.
+Пасы в конце игры отбрасываются, ход за доску считается пасом.
+"""
+import functools
+import hashlib
+from collections import namedtuple
+
+from sgftools import batch
+from sgftools.parser import SgfParser
+
+DuplicateReport = namedtuple("DuplicateReport", "clusters files errors")
+
+# коды элементов последовательности; у ходов код - Stone.value
+_ADD_BLACK = 3
+_ADD_WHITE = 4
+_EMPTY = 5
+
+
+def symmetries(size):
+    """ 8 преобразований доски: (x, y) -> (x, y) с отражениями и транспонированием """
+    last = size + 1
+    return (
+        lambda x, y: (x, y),
+        lambda x, y: (last - x, y),
+        lambda x, y: (x, last - y),
+        lambda x, y: (last - x, last - y),
+        lambda x, y: (y, x),
+        lambda x, y: (last - y, x),
+        lambda x, y: (y, last - x),
+        lambda x, y: (last - y, last - x),
+    )
+
+
+def _mainline(game):
+    """ Узлы основного варианта как списки (код, x, y); пас - (цвет, 0, 0) """
+    size = game.game_info.board_size
+    nodes = []
+    node = game.root
+    while node is not None:
+        items = []
+        for code, points in ((_ADD_BLACK, node.add_black), (_ADD_WHITE, node.add_white), (_EMPTY, node.empty)):
+            items.extend((code, x.x, x.y) for x in points)
+        move = node.move
+        if move is not None:
+            point = move.point
+            if point is not None and 0 < point.x <= size and 0 < point.y <= size:
+                items.append((move.stone.value, point.x, point.y))
+            else:
+                items.append((move.stone.value, 0, 0))
+        if len(items) != 0:
+            nodes.append(items)
+        node = node.next_node
+
+    while len(nodes) != 0 and len(nodes[-1]) == 1 and nodes[-1][0][1] == 0 and nodes[-1][0][0] < _ADD_BLACK:
+        nodes.pop()
+    return nodes
+
+
+def _digest(size, nodes, transform):
+    data = bytearray([size])
+    for items in nodes:
+        # порядок точек расстановки внутри узла не важен
+        moved = sorted((code,) + (transform(x, y) if x != 0 else (0, 0)) for code, x, y in items)
+        for item in moved:
+            data.extend(item)
+        data.append(0)
+    return int.from_bytes(hashlib.blake2b(bytes(data), digest_size=8).digest(), 'big')
+
+
+def fingerprint(game, symmetric=False):
+    """ Отпечаток игры или None, если в основном варианте нет ни ходов, ни расстановки.
+
+    symmetric - отпечаток не зависит от поворотов и отражений доски (минимум по 8 симметриям).
+    """
+    nodes = _mainline(game)
+    if len(nodes) == 0:
+        return None
+    size = game.game_info.board_size
+    transforms = symmetries(size) if symmetric else symmetries(size)[:1]
+    return min(_digest(size, nodes, x) for x in transforms)
+
+
+def file_fingerprint(path, symmetric=False, cache=None):
+    """ Для batch.map_files """
+    return fingerprint(SgfParser(cache=cache).load_game(path), symmetric)
+
+
+def find_duplicates(inputs, symmetric=False, processes=None, chunksize=32, cache=None):
+    """ Группирует файлы с одинаковыми отпечатками; игры разбираются в пуле процессов и в памяти не хранятся.
+
+    Возвращает DuplicateReport(clusters, files, errors): clusters - отсортированные списки путей
+    из двух и более файлов, files - число разобранных файлов, errors - BatchResult файлов с ошибками.
+    Игры без ходов и расстановки не группируются.
+    """
+    function = functools.partial(file_fingerprint, symmetric=symmetric, cache=cache)
+    groups = dict()
+    files = 0
+    errors = []
+    for result in batch.map_files(function, inputs, processes, chunksize, ordered=False):
+        if result.error is not None:
+            errors.append(result)
+            continue
+        files += 1
+        if result.result is not None:
+            groups.setdefault(result.result, []).append(result.path)
+
+    clusters = sorted(sorted(x) for x in groups.values() if len(x) > 1)
+    return DuplicateReport(clusters, files, errors)
@@ -1,4 +1,5 @@
 from sgftools.board import Board
+from sgftools.game import GameNode
 
 
 class ProblemsBookGenerator(object):
@@ -7,9 +8,15 @@ class ProblemsBookGenerator(object):
 
     def generate(self, game, title=None):
         size = game.game_info.board_size
+        # из корня в каждую задачу переносится только расстановка камней: пометки относятся к одной вершине
+        setup = GameNode()
+        setup.add_black = game.root.add_black
+        setup.add_white = game.root.add_white
+        setup.empty = game.root.empty
         num = 1
         for node in [x for x in game.root.next_nodes if x.move is None]:
             board = Board(size)
+            board.apply(setup)
             board.apply(node)
             if title is not None:
                 board.name = "{} {}".format(title, num)
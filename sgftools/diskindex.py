@@ -0,0 +1,95 @@
+import abc
+import functools
+import sqlite3
+
+from sgftools import batch
+from sgftools.parser import SgfParser
+
+
+class DiskIndex(abc.ABC):
+    """ Основа индексов игр в файле sqlite: таблица игр, параметры индекса и таблица записей postings.
+
+    Первый столбец записей - ключ поиска, второй - номер игры; записи упорядочены по ключу (WITHOUT ROWID),
+    так что поиск - один проход по B-дереву. Файл читается через отображение в память (mmap_size байт),
+    новые игры дописываются в тот же файл. Параметры индекса запоминаются при создании и потом берутся из файла.
+    """
+    format_version = 1
+    # столбцы записей после ключа и номера игры: (имя, тип sqlite)
+    postings_columns = ()
+
+    def __init__(self, path, mmap_size=1 << 34, **options):
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA mmap_size = {}".format(int(mmap_size)))
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS info (name TEXT PRIMARY KEY, value);
+            CREATE TABLE IF NOT EXISTS games (id INTEGER PRIMARY KEY, name TEXT UNIQUE);
+            CREATE TABLE IF NOT EXISTS postings (key INTEGER, game INTEGER{0},
+                PRIMARY KEY (key, game{1})) WITHOUT ROWID;
+            -- для удаления записей игры при повторном добавлении
+            CREATE INDEX IF NOT EXISTS postings_game ON postings (game);
+        """.format(''.join(", {} {}".format(*x) for x in self.postings_columns),
+                   ''.join(", " + x[0] for x in self.postings_columns)))
+
+        info = dict(self._connection.execute("SELECT name, value FROM info"))
+        if len(info) == 0:
+            info = dict(options, version=self.format_version)
+            self._connection.executemany("INSERT INTO info VALUES (?, ?)", info.items())
+            self._connection.commit()
+        if info['version'] != self.format_version:
+            raise ValueError("Unsupported {} version: {}".format(type(self).__name__, info['version']))
+        self.options = {x: info[x] for x in options}
+
+    def close(self):
+        self._connection.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT count(*) FROM games").fetchone()[0]
+
+    def add_game(self, game, name):
+        self._add_postings(name, self._postings_function()(game))
+        self._connection.commit()
+
+    def add_files(self, inputs, processes=None, chunksize=32, cache=None):
+        """ Добавляет игры из файлов, считая записи в пуле процессов; возвращает BatchResult с ошибками """
+        function = functools.partial(_file_postings, self._postings_function(), cache=cache)
+        errors = []
+        for result in batch.map_files(function, inputs, processes, chunksize, ordered=False):
+            if result.error is not None:
+                errors.append(result)
+            else:
+                self._add_postings(result.path, result.result)
+        self._connection.commit()
+        return errors
+
+    @abc.abstractmethod
+    def _postings_function(self):
+        """ Функция уровня модуля (для рабочих процессов): Game -> записи (ключ, столбцы postings_columns...) """
+
+    def _add_postings(self, name, postings):
+        row = self._connection.execute("SELECT id FROM games WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            game_id = self._connection.execute("INSERT INTO games (name) VALUES (?)", (name,)).lastrowid
+        else:
+            game_id = row[0]
+            self._connection.execute("DELETE FROM postings WHERE game = ?", (game_id,))
+
+        values = ', '.join('?' * (len(self.postings_columns) + 2))
+        self._connection.executemany("INSERT OR IGNORE INTO postings VALUES ({})".format(values),
+                                     ((x[0], game_id) + tuple(x[1:]) for x in postings))
+
+    def _lookup(self, key):
+        """ Записи ключа: (имя игры, столбцы postings_columns...) по порядку игр """
+        columns = ''.join(", postings." + x[0] for x in self.postings_columns)
+        return self._connection.execute("""
+            SELECT games.name{0} FROM postings JOIN games ON games.id = postings.game
+            WHERE postings.key = ? ORDER BY games.name{0}
+        """.format(columns), (key,)).fetchall()
+
+
+def _file_postings(function, path, cache=None):
+    return function(SgfParser(cache=cache).load_game(path))
+
+
+def signed(value):
+    """ 64-битный хэш как целое со знаком, которое хранит sqlite """
+    return value - (1 << 64) if value >= 1 << 63 else value
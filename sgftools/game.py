@@ -165,6 +165,44 @@ class Game:
         self.game_info.board_size = board_size
         self.root = None
 
+    def __getstate__(self):
+        # дерево сохраняется плоским списком в прямом порядке обхода, иначе pickle упирается в предел рекурсии
+        nodes = []
+        stack = [self.root] if self.root is not None else []
+        while len(stack) > 0:
+            node = stack.pop()
+            next_nodes = [x for x in node.next_nodes if x is not None]
+            state = node.__dict__.copy()
+            state['next_nodes'] = len(next_nodes)
+            nodes.append(state)
+            stack.extend(reversed(next_nodes))
+
+        state = self.__dict__.copy()
+        state['root'] = nodes
+        return state
+
+    def __setstate__(self, state):
+        nodes = state['root']
+        self.__dict__.update(state)
+        self.root = None
+
+        parents = []  # [вершина, сколько детей ещё не добавлено]
+        for node_state in nodes:
+            node = GameNode.__new__(GameNode)
+            node.__dict__.update(node_state)
+            node.next_nodes = []
+            if len(parents) == 0:
+                self.root = node
+            else:
+                parent = parents[-1]
+                parent[0].next_nodes.append(node)
+                parent[1] -= 1
+                if parent[1] == 0:
+                    parents.pop()
+
+            if node_state['next_nodes'] != 0:
+                parents.append([node, node_state['next_nodes']])
+
 
 #############################################
 class GameInfo:
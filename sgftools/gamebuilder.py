@@ -13,7 +13,8 @@ class UnsupportedGameException(Exception):
 
 
 class GameBuilder:
-    def __init__(self):
+    def __init__(self, mainline_only=False):
+        self.mainline_only = mainline_only
         self._property_parsers = self._create_property_parsers_map()
         self._node_map = self._create_node_map()
         self._only_root_properties = ['GC', 'FF', 'GM', 'AP', 'ST', 'SZ', 'CA', 'AN', 'BR', 'BT', 'MULTIGOGM',
@@ -22,7 +23,8 @@ class GameBuilder:
 
         self._non_root_properties = ['B', 'BL', 'BM', 'DO', 'IT', 'KO', 'MN', 'OB',
                                      'OW', 'TE', 'W', 'WL', 'AB', 'AE', 'AW', 'PL', 'AR', 'C', 'CR', 'DD', 'DM',
-                                     'FG', 'GB', 'GW', 'HO', 'LB', 'LN', 'MA', 'N', 'PM', 'SQ', 'TR', 'UC', 'V', 'VW']
+                                     'FG', 'GB', 'GW', 'HO', 'LB', 'LN', 'MA', 'N', 'PM', 'SQ', 'TR', 'UC', 'V', 'VW',
+                                     'TB', 'TW']
 
         self._mark_constructors = {
             'CR': Circle,
@@ -77,6 +79,8 @@ class GameBuilder:
             'AB': self.parse_coordinates,
             'AW': self.parse_coordinates,
             'AE': self.parse_coordinates,
+            'TB': self.parse_coordinates,
+            'TW': self.parse_coordinates,
             'MN': lambda x: int(x[0]),
             'GB': lambda x: GoodForBlack(),
             'GW': lambda x: GoodForWhite(),
@@ -143,19 +147,30 @@ class GameBuilder:
 
         return game
 
-    def load_game_nodes(self, nodes):
-        if len(nodes) == 0:
-            return [None]
+    def build_game_info(self, properties):
+        info = Game().game_info
+        self._fill_game_info(info, properties)
+        return info
 
-        if len(nodes[0]) == 0:
+    def load_game_nodes(self, nodes):
+        # обход без рекурсии: стек пар (дерево, список куда добавлять первую вершину дерева)
+        result = []
+        stack = [(nodes, result)]
+        while len(stack) > 0:
+            tree, next_nodes = stack.pop()
+            for item in tree:
+                if len(item) != 0 and item[0] == 'variations':  # TODO: использовать специальный тип списка
+                    variations = item[1:2] if self.mainline_only else item[1:]
+                    stack.extend((x, next_nodes) for x in reversed(variations))
+                    break
+
+                gamenode = self.create_game_node(item)
+                next_nodes.append(gamenode)
+                next_nodes = gamenode.next_nodes
+
+        if len(result) == 0:
             return [None]
-
-        if nodes[0][0] == 'variations':  # TODO: использовать специальный тип списка
-            return [self.load_game_nodes(x)[0] for x in nodes[0][1:]]
-
-        gamenode = self.create_game_node(nodes[0])
-        gamenode.next_nodes = self.load_game_nodes(nodes[1:])
-        return [gamenode]
+        return result
 
     @staticmethod
     def group_by_key(properties):
@@ -0,0 +1,223 @@
+""" Дерево дебютов: первые ходы многих игр, слитые в одно дерево с числом игр и побед в каждой вершине.
+
+Вершины хранятся в массивах array (ход, первый ребёнок, следующий брат, счётчики) - 24 байта на вершину
+вместо объекта GameNode. При symmetric ходы приводятся к одной ориентации доски: из 8 симметрий
+выбирается та, что даёт наименьшую последовательность ходов, так что дебюты, сыгранные в разных углах, совпадают.
+"""
+import functools
+import multiprocessing
+import os
+from array import array
+from collections import namedtuple
+
+from sgftools import batch
+from sgftools.dedup import symmetries
+from sgftools.game import Game, GameNode, Move, Point, Stone
+
+DEFAULT_DEPTH = 20
+
+OpeningNode = namedtuple("OpeningNode", "move games black_wins white_wins")
+OpeningTreeReport = namedtuple("OpeningTreeReport", "tree errors")
+
+
+def _move_key(stone_value, x, y):
+    """ Ход как целое: цвет и координаты (0, 0 - пас) """
+    return (stone_value << 12) | (x << 6) | y
+
+
+def _decode_move(key):
+    x = (key >> 6) & 63
+    y = key & 63
+    return Move(Stone(key >> 12), Point(x, y) if x != 0 else None)
+
+
+def winner(result):
+    """ Stone победителя по свойству RE или None (ничья, неизвестный или пустой результат) """
+    result = result.strip().upper()
+    if result.startswith('B+'):
+        return Stone.Black
+    if result.startswith('W+'):
+        return Stone.White
+    return None
+
+
+class OpeningTree:
+    """ Дерево первых depth ходов основных вариантов игр одного размера доски.
+
+    Игры другого размера и с расстановкой (AB, AW, AE, в том числе форой) не добавляются
+    и учитываются в skipped. Вершина 0 - корень, её счётчик игр - число добавленных игр.
+    """
+    def __init__(self, size=19, depth=DEFAULT_DEPTH, symmetric=True):
+        self.size = size
+        self.depth = depth
+        self.symmetric = symmetric
+        self.skipped = 0
+        self._moves = array('i', [-1])
+        self._first_child = array('i', [-1])
+        self._next_sibling = array('i', [-1])
+        self._games = array('I', [0])
+        self._black_wins = array('I', [0])
+        self._white_wins = array('I', [0])
+
+    def __len__(self):
+        return len(self._moves)
+
+    @property
+    def games(self):
+        return self._games[0]
+
+    def add_game(self, game):
+        """ Добавляет первые ходы игры; False, если игра пропущена """
+        keys = self._opening(game) if game.game_info.board_size == self.size else None
+        if keys is None:
+            self.skipped += 1
+            return False
+
+        black, white = self._wins(winner(game.game_info.result or ''))
+        node = 0
+        self._count(node, 1, black, white)
+        for key in keys:
+            node = self._child(node, key)
+            self._count(node, 1, black, white)
+        return True
+
+    def merge(self, other):
+        """ Добавляет к дереву вершины и счётчики другого дерева с теми же параметрами """
+        if (other.size, other.depth, other.symmetric) != (self.size, self.depth, self.symmetric):
+            raise ValueError("Opening trees have different parameters")
+
+        self.skipped += other.skipped
+        self._count(0, other._games[0], other._black_wins[0], other._white_wins[0])
+        stack = [(0, 0)]
+        while len(stack) > 0:
+            other_node, node = stack.pop()
+            for child in other.children(other_node):
+                merged = self._child(node, other._moves[child])
+                self._count(merged, other._games[child], other._black_wins[child], other._white_wins[child])
+                stack.append((child, merged))
+
+    def node(self, index):
+        """ OpeningNode(move, games, black_wins, white_wins) вершины; у корня move - None """
+        key = self._moves[index]
+        return OpeningNode(_decode_move(key) if key >= 0 else None,
+                           self._games[index], self._black_wins[index], self._white_wins[index])
+
+    def children(self, index):
+        child = self._first_child[index]
+        while child >= 0:
+            yield child
+            child = self._next_sibling[child]
+
+    def to_game(self, min_games=1):
+        """ Дерево как Game: варианты по убыванию числа игр, статистика вершины - в комментарии """
+        game = Game(self.size)
+        game.root = GameNode()
+        game.root.comment = self._describe(0)
+        stack = [(0, game.root)]
+        while len(stack) > 0:
+            index, parent = stack.pop()
+            children = sorted(self.children(index), key=lambda x: (-self._games[x], self._moves[x]))
+            for child in children:
+                if self._games[child] < min_games:
+                    break
+                node = GameNode()
+                node.move = _decode_move(self._moves[child])
+                node.comment = self._describe(child)
+                parent.add_next_node(node)
+                stack.append((child, node))
+        return game
+
+    def _describe(self, index):
+        games = self._games[index]
+        if games == 0:
+            return "Games: 0"
+        return "Games: {}, B+: {:.0%}, W+: {:.0%}".format(
+            games, self._black_wins[index] / games, self._white_wins[index] / games)
+
+    def _opening(self, game):
+        """ Ключи первых ходов основного варианта или None, если встретилась расстановка """
+        size = self.size
+        transforms = symmetries(size) if self.symmetric else symmetries(size)[:1]
+        keys = []
+        node = game.root
+        while node is not None and len(keys) < self.depth:
+            if node.add_black or node.add_white or node.empty:
+                return None
+            move = node.move
+            if move is not None:
+                point = move.point
+                if point is None or not (0 < point.x <= size and 0 < point.y <= size):
+                    keys.append(_move_key(move.stone.value, 0, 0))
+                else:
+                    # оставляем только симметрии, дающие наименьшую последовательность
+                    moved = [(x(point.x, point.y), x) for x in transforms]
+                    best = min(x[0] for x in moved)
+                    transforms = [x for position, x in moved if position == best]
+                    keys.append(_move_key(move.stone.value, best[0], best[1]))
+            node = node.next_node
+        return keys
+
+    @staticmethod
+    def _wins(stone):
+        return int(stone == Stone.Black), int(stone == Stone.White)
+
+    def _count(self, index, games, black, white):
+        self._games[index] += games
+        self._black_wins[index] += black
+        self._white_wins[index] += white
+
+    def _child(self, index, key):
+        """ Ребёнок вершины с ходом key; создаётся при отсутствии """
+        child = self._first_child[index]
+        while child >= 0:
+            if self._moves[child] == key:
+                return child
+            child = self._next_sibling[child]
+
+        child = len(self._moves)
+        self._moves.append(key)
+        self._first_child.append(-1)
+        self._next_sibling.append(self._first_child[index])
+        self._first_child[index] = child
+        self._games.append(0)
+        self._black_wins.append(0)
+        self._white_wins.append(0)
+        return child
+
+
+def build_opening_tree(inputs, size=19, depth=DEFAULT_DEPTH, symmetric=True, processes=None, cache=None):
+    """ Строит дерево дебютов по файлам: файлы делятся на части по числу процессов,
+    каждый процесс строит своё дерево, затем деревья сливаются.
+
+    Возвращает OpeningTreeReport(tree, errors), errors - BatchResult файлов, которые не удалось разобрать.
+    """
+    paths = list(batch.expand_inputs(inputs))
+    processes = processes or os.cpu_count() or 1
+    shards = [paths[x::processes] for x in range(processes)]
+    function = functools.partial(_build_shard, size=size, depth=depth, symmetric=symmetric, cache=cache)
+
+    tree = OpeningTree(size, depth, symmetric)
+    if processes == 1:
+        return _merge_shards(tree, map(function, shards))
+    with multiprocessing.Pool(processes) as pool:
+        return _merge_shards(tree, pool.imap_unordered(function, shards))
+
+
+def _merge_shards(tree, results):
+    errors = []
+    for shard_tree, shard_errors in results:
+        tree.merge(shard_tree)
+        errors.extend(shard_errors)
+    errors.sort()
+    return OpeningTreeReport(tree, errors)
+
+
+def _build_shard(paths, size, depth, symmetric, cache=None):
+    tree = OpeningTree(size, depth, symmetric)
+    errors = []
+    for result in batch.load_games(paths, processes=1, cache=cache):
+        if result.error is not None:
+            errors.append(result)
+        else:
+            tree.add_game(result.result)
+    return tree, errors
@@ -1,10 +1,15 @@
 ﻿# -*- coding: utf_8 -*-
 import codecs
+import os
+import re
 import string
 
 from pyparsing import OneOrMore, Word, QuotedString, Group, TokenConverter, Forward, Literal, ZeroOrMore, ParseBaseException
 from sgftools.gamebuilder import GameBuilder
 
+# увеличивать при любом изменении того, как строится Game (используется в ключах кэша)
+PARSER_VERSION = 2
+
 
 def _deep_to_list(alist):
     if isinstance(alist, str):
@@ -69,25 +74,363 @@ class SgfPyParser:
         return Group(prop_ident + OneOrMore(value))
 
 
+class SgfTokenizer:
+    """ Однопроходный разборщик sgf без pyparsing.
+
+    Возвращает ту же структуру вложенных списков, что и SgfPyParser:
+    дерево - список вершин, вершина - список свойств [имя, значение, ...],
+    варианты - список ['variations', дерево, дерево, ...] в конце дерева.
+
+    С mainline_only=True все варианты, кроме первого, пропускаются простым подсчётом скобок
+    без разбора, а вершины первого варианта добавляются в то же дерево - получается одна линия.
+    """
+    _token = re.compile(r'\s*(?:\[([^\\\]]*(?:\\.[^\\\]]*)*)\]|([A-Z]+)|([;()]))', re.DOTALL)
+    _escape = re.compile(r'\\(.)', re.DOTALL)
+
+    def __init__(self, mainline_only=False):
+        self.mainline_only = mainline_only
+
+    def parse_file(self, file_name_or_file):
+        if isinstance(file_name_or_file, str):
+            with open(file_name_or_file) as file:
+                return self.parse_string(file.read())
+
+        return self.parse_string(file_name_or_file.read())
+
+    def parse_string(self, string):
+        if not isinstance(string, str):
+            raise TypeError("'string' must be str type")
+
+        for tree in self.iter_trees(string):
+            return tree
+
+        raise ValueError("Game tree not found")
+
+    def read_root_node(self, string):
+        """ Возвращает свойства первой вершины первого дерева.
+
+        string может быть началом файла: если вершина в нём не закончилась, возвращается None.
+        """
+        match = self._token.match
+        pos = 0
+        node = None
+        prop = None
+        while True:
+            m = match(string, pos)
+            if m is None:
+                return None
+
+            kind = m.lastindex
+            if kind == 1:
+                if prop is None:
+                    raise ValueError("Property value without identifier at position {}".format(m.start(1) - 1))
+                value = m.group(1)
+                if '\\' in value:
+                    value = self._escape.sub(r'\1', value)
+                prop.append(value)
+            elif kind == 2:
+                if node is None:
+                    raise ValueError("Property outside of node at position {}".format(m.start(2)))
+                if prop is not None and len(prop) == 1:
+                    raise ValueError("Property {} has no value".format(prop[0]))
+                prop = [m.group(2)]
+                node.append(prop)
+            else:
+                symbol = m.group(3)
+                if node is not None:
+                    if prop is not None and len(prop) == 1:
+                        raise ValueError("Property {} has no value".format(prop[0]))
+                    return node
+                if pos == 0 and symbol == '(':
+                    pass
+                elif pos != 0 and symbol == ';':
+                    node = []
+                else:
+                    raise ValueError("Unexpected symbol at position {}".format(m.start(3)))
+
+            pos = m.end()
+
+    def iter_trees(self, string):
+        """ Возвращает деревья верхнего уровня по мере их закрытия """
+        match = self._token.match
+        unescape = self._escape.sub
+        mainline_only = self.mainline_only
+        pos = 0
+        stack = []
+        tree = None
+        variations = None
+        count = 0  # число вершин текущего дерева
+        node = None
+        prop = None
+
+        while True:
+            m = match(string, pos)
+            if m is None:
+                if string[pos:].strip() != '':
+                    raise ValueError("Unexpected symbol at position {}".format(pos))
+                if tree is not None:
+                    raise ValueError("Unexpected end of data: game tree is not closed")
+                return
+
+            kind = m.lastindex
+            if kind == 1:
+                if prop is None:
+                    raise ValueError("Property value without identifier at position {}".format(m.start(1) - 1))
+                value = m.group(1)
+                if '\\' in value:
+                    value = unescape(r'\1', value)
+                prop.append(value)
+                pos = m.end()
+                continue
+
+            if prop is not None and len(prop) == 1:
+                raise ValueError("Property {} has no value".format(prop[0]))
+            prop = None
+
+            if kind == 2:
+                if node is None:
+                    raise ValueError("Property outside of node at position {}".format(m.start(2)))
+                prop = [m.group(2)]
+                node.append(prop)
+            else:
+                symbol = m.group(3)
+                if symbol == ';':
+                    if tree is None or variations is not None:
+                        raise ValueError("Unexpected node at position {}".format(m.start(3)))
+                    node = []
+                    tree.append(node)
+                    count += 1
+                elif symbol == '(':
+                    if tree is not None:
+                        if count == 0:
+                            raise ValueError("Game tree without nodes at position {}".format(m.start(3)))
+                        if mainline_only:
+                            if variations is not None:
+                                pos = _skip_game_tree(string, m.end())
+                                continue
+                            # первый вариант продолжает то же дерево
+                            stack.append((tree, True, count))
+                        else:
+                            if variations is None:
+                                variations = ['variations']
+                                tree.append(variations)
+                            subtree = []
+                            variations.append(subtree)
+                            stack.append((tree, variations, count))
+                            tree = subtree
+                    else:
+                        tree = []
+                    variations = None
+                    count = 0
+                    node = None
+                else:
+                    if tree is None or count == 0:
+                        raise ValueError("Unexpected ')' at position {}".format(m.start(3)))
+                    if len(stack) == 0:
+                        yield tree
+                        tree = None
+                        variations = None
+                    else:
+                        tree, variations, count = stack.pop()
+                    node = None
+
+            pos = m.end()
+
+
+def _skip_game_tree(string, pos):
+    """ Возвращает позицию после скобки, закрывающей дерево, которое начинается перед pos """
+    depth = 1
+    while True:
+        m = _tree_stop.search(string, pos)
+        if m is None:
+            raise ValueError("Unexpected end of data: game tree is not closed")
+
+        symbol = m.group()
+        if symbol == '[':
+            m = _value_end.search(string, m.end())
+            if m is None:
+                raise ValueError("Unexpected end of data: property value is not closed")
+        elif symbol == '(':
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return m.end()
+        pos = m.end()
+
+
 class SgfParser:
-    def __init__(self):
-        self.tokenParser = SgfPyParser()
+    def __init__(self, token_parser=None, cache=None, mainline_only=False):
+        """ mainline_only - загружать только основной вариант: дерево игры будет одной линией """
+        if token_parser is None:
+            token_parser = SgfTokenizer(mainline_only)
+        self.tokenParser = token_parser
+        self.cache = cache
+        self.mainline_only = mainline_only
 
     def load_game_from_string(self, string_data):
         tokens = self.tokenParser.parse_string(string_data)
-        return GameBuilder().build(tokens)
+        return GameBuilder(self.mainline_only).build(tokens)
 
     def load_game(self, filename):
-        with get_sgf_reader(open(filename, "rb")) as file:
-            return self.load_game_from_string(file.read())
+        with open(filename, "rb") as file:
+            return self.load_game_from_bytes(file.read())
 
     def load_game_from_stream(self, binary_stream):
-        file = get_sgf_reader(binary_stream)
-        return self.load_game_from_string(file.read())
+        return self.load_game_from_bytes(binary_stream.read())
+
+    def load_game_from_bytes(self, bytes_data):
+        if self.cache is None:
+            return self.load_game_from_string(decode_sgf(bytes_data))
+
+        key = self.cache.key(bytes_data, 'mainline' if self.mainline_only else '')
+        game = self.cache.get(key)
+        if game is None:
+            game = self.load_game_from_string(decode_sgf(bytes_data))
+            self.cache.put(key, game)
+        return game
+
+    def load_game_info(self, filename, prefix_size=4096):
+        """ Читает только корневую вершину и возвращает GameInfo, не строя дерево игры """
+        with open(filename, "rb") as file:
+            return self.load_game_info_from_stream(file, prefix_size)
+
+    def load_game_info_from_stream(self, binary_stream, prefix_size=4096):
+        tokenizer = SgfTokenizer()
+        buffer = binary_stream.read(prefix_size)
+        final = False
+        while True:
+            # CA может оказаться дальше начала буфера, поэтому кодировка определяется заново по всему буферу
+            decoder = get_incremental_decoder(extract_encoding(buffer))
+            try:
+                properties = tokenizer.read_root_node(decoder.decode(buffer, final=final))
+            except UnicodeDecodeError:
+                # CA ещё не прочитан, и начало не декодируется кодировкой по умолчанию
+                if final:
+                    raise
+                properties = None
+            if properties is not None:
+                return GameBuilder().build_game_info(properties)
+            if final:
+                raise ValueError("Root node not found")
+
+            # читаем дальше, только если корневая вершина не поместилась в буфер
+            chunk = binary_stream.read(max(len(buffer), 1))
+            final = len(chunk) == 0
+            buffer += chunk
+
+    def iter_games(self, path_or_stream, chunk_size=65536):
+        """ Последовательно возвращает все игры коллекции (;...)(;...)
+
+        Файл читается кусками, в памяти держится только текущее дерево.
+        """
+        if isinstance(path_or_stream, (str, os.PathLike)):
+            with open(path_or_stream, "rb") as stream:
+                yield from self.iter_games(stream, chunk_size)
+            return
+
+        for tree in split_game_trees(iter_decoded_chunks(path_or_stream, chunk_size)):
+            yield self.load_game_from_string(tree)
+
+
+_value_stop = re.compile(r'[\\\]]')
+_value_end = re.compile(r'(?<!\\)(?:\\\\)*\]')
+_tree_stop = re.compile(r'[\[()]')
+
+
+def split_game_trees(chunks):
+    """ Делит последовательность кусков текста на деревья верхнего уровня, не разбирая их """
+    buffer = ''
+    pos = 0
+    start = None
+    depth = 0
+    in_value = False
+    for chunk in chunks:
+        buffer += chunk
+        while True:
+            if in_value:
+                m = _value_stop.search(buffer, pos)
+                if m is None:
+                    pos = len(buffer)
+                    break
+                if m.group() == '\\':
+                    if m.end() == len(buffer):
+                        # экранированный символ придёт в следующем куске
+                        pos = m.start()
+                        break
+                    pos = m.end() + 1
+                    continue
+                in_value = False
+                pos = m.end()
+                continue
+
+            m = _tree_stop.search(buffer, pos)
+            if m is None:
+                if start is None and buffer[pos:].strip() != '':
+                    raise ValueError("Unexpected data between game trees")
+                pos = len(buffer)
+                break
+
+            symbol = m.group()
+            if start is None:
+                if symbol != '(' or buffer[pos:m.start()].strip() != '':
+                    raise ValueError("Unexpected data between game trees")
+                start = m.start()
+
+            if symbol == '[':
+                in_value = True
+            elif symbol == '(':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    yield buffer[start:m.end()]
+                    start = None
+
+            pos = m.end()
+
+        if start is None:
+            buffer = ''
+            pos = 0
+        else:
+            buffer = buffer[start:]
+            pos -= start
+            start = 0
+
+    if start is not None:
+        raise ValueError("Unexpected end of data: game tree is not closed")
+
+
+# CA - свойство корневой вершины, поэтому ищем его только в начале файла
+ENCODING_SCAN_LIMIT = 65536
+_charset_property = re.compile(rb'(?<![A-Z])CA\s*\[([^\]]*)\]')
+
+
+def decode_sgf(bytes_data):
+    """ Определяет кодировку по началу данных и декодирует их одним вызовом """
+    encoding = extract_encoding(bytes_data)
+    try:
+        return bytes_data.decode(encoding)
+    except LookupError:
+        return bytes_data.decode("ascii")
+
+
+def iter_decoded_chunks(binary_stream, chunk_size=65536):
+    chunk = binary_stream.read(max(chunk_size, ENCODING_SCAN_LIMIT))
+    decoder = get_incremental_decoder(extract_encoding(chunk))
+    while len(chunk) != 0:
+        text = decoder.decode(chunk)
+        if len(text) != 0:
+            yield text
+        chunk = binary_stream.read(chunk_size)
+
+    text = decoder.decode(b'', final=True)
+    if len(text) != 0:
+        yield text
 
 
 def get_sgf_reader(binary_stream):
-    buffer = binary_stream.readline()
+    buffer = binary_stream.read(ENCODING_SCAN_LIMIT)
     encoding = extract_encoding(buffer)
 
     try:
@@ -98,6 +441,13 @@ def get_sgf_reader(binary_stream):
     return reader_creator(BufferedReader(binary_stream, buffer))
 
 
+def get_incremental_decoder(encoding):
+    try:
+        return codecs.getincrementaldecoder(encoding)()
+    except LookupError:
+        return codecs.getincrementaldecoder("ascii")()
+
+
 def extract_encoding(bytes_data):
     if bytes_data.startswith(codecs.BOM_UTF32_LE):
         return 'utf-32-le'
@@ -110,11 +460,13 @@ def extract_encoding(bytes_data):
     if bytes_data.startswith(codecs.BOM_UTF8):
         return 'utf-8-sig'
 
+    match = _charset_property.search(bytes_data, 0, ENCODING_SCAN_LIMIT)
+    if match is None:
+        return 'utf-8'
+
     try:
-        ind = bytes_data.index(b'CA[')
-        close_index = bytes_data.index(b']', ind + 1)
-        return str(bytes_data[ind + 3:close_index], encoding='ascii')
-    except ValueError:
+        return str(match.group(1), encoding='ascii').strip()
+    except UnicodeDecodeError:
         return 'utf-8'
 
 
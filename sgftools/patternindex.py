@@ -0,0 +1,127 @@
+""" Индекс угловых фрагментов позиций для поиска игр по форме или дзёсэки.
+
+Для каждой позиции основного варианта считается ключ каждого угла доски: хэш Зобриста квадрата window x window
+у этого угла, приведённый к одному углу и минимальный по транспонированию и замене цвета камней.
+Так все 8 симметрий доски и обмен цветов дают один ключ. Запись (ключ, игра, номер узла) делается,
+когда фрагмент угла изменился. Записи хранятся в sqlite, отсортированными по ключу.
+Ключ описывает весь квадрат, поэтому находятся только точные совпадения квадрата, а не его части.
+"""
+import functools
+
+from sgftools.board import zobrist_table
+from sgftools.diskindex import DiskIndex, signed
+from sgftools.parser import SgfParser
+from sgftools.replay import replay
+
+FORMAT_VERSION = 1
+DEFAULT_WINDOW = 7
+
+# отражения по x и y, переводящие угол в угол (1, 1)
+_corners = ((False, False), (True, False), (False, True), (True, True))
+
+
+class _CornerHashes:
+    """ Хэши четырёх вариантов (как есть, транспонированный, с обменом цветов и оба) фрагмента каждого угла """
+    def __init__(self, size, window):
+        self.size = size
+        self.window = window
+        self.table = zobrist_table(window)
+        self.hashes = [[0, 0, 0, 0] for _ in _corners]
+        self.stones = [0] * len(_corners)
+
+    def update(self, x, y, old, new):
+        """ Учитывает смену значения точки (Stone.value, 0 - пусто); возвращает номера затронутых углов """
+        touched = []
+        window = self.window
+        table = self.table
+        for corner, (flip_x, flip_y) in enumerate(_corners):
+            local_x = self.size - x if flip_x else x - 1
+            local_y = self.size - y if flip_y else y - 1
+            if local_x >= window or local_y >= window:
+                continue
+
+            index = local_x * window + local_y
+            transposed = local_y * window + local_x
+            hashes = self.hashes[corner]
+            for value, sign in ((old, -1), (new, 1)):
+                if value != 0:
+                    hashes[0] ^= table[value][index]
+                    hashes[1] ^= table[value][transposed]
+                    hashes[2] ^= table[3 - value][index]
+                    hashes[3] ^= table[3 - value][transposed]
+                    self.stones[corner] += sign
+            touched.append(corner)
+        return touched
+
+    def key(self, corner):
+        """ Ключ фрагмента угла или None, если в нём нет камней """
+        if self.stones[corner] == 0:
+            return None
+        return signed(min(self.hashes[corner]))
+
+
+def _value(stone):
+    return stone.value if stone is not None else 0
+
+
+def corner_keys(board, window=DEFAULT_WINDOW):
+    """ Ключи фрагментов четырёх углов доски; None для угла без камней """
+    hashes = _CornerHashes(board.size, window)
+    for cell in board:
+        if cell.node.stone is not None:
+            hashes.update(cell.x, cell.y, 0, cell.node.stone.value)
+    return [hashes.key(x) for x in range(len(_corners))]
+
+
+def game_postings(game, window=DEFAULT_WINDOW):
+    """ Пары (ключ, номер узла) основного варианта: ключ угла записывается, когда его фрагмент изменился """
+    postings = []
+    hashes = _CornerHashes(game.game_info.board_size, window)
+    for item in replay(game, mainline_only=True):
+        touched = set()
+        for point, old, new in item.board.last_changes():
+            touched.update(hashes.update(point.x, point.y, _value(old), _value(new)))
+        for corner in sorted(touched):
+            key = hashes.key(corner)
+            if key is not None:
+                postings.append((key, len(item.path)))
+    return postings
+
+
+def file_postings(path, window=DEFAULT_WINDOW, cache=None):
+    """ Для batch.map_files """
+    return game_postings(SgfParser(cache=cache).load_game(path), window)
+
+
+class PatternIndex(DiskIndex):
+    """ Индекс угловых фрагментов в файле sqlite; размер фрагмента запоминается при создании индекса """
+    format_version = FORMAT_VERSION
+    postings_columns = (('node', 'INTEGER'),)
+
+    def __init__(self, path, window=DEFAULT_WINDOW, **kwargs):
+        super().__init__(path, window=window, **kwargs)
+        self.window = self.options['window']
+
+    def _postings_function(self):
+        return functools.partial(game_postings, window=self.window)
+
+    def search(self, board):
+        """ Игры, где встретился угловой фрагмент board: список (имя игры, номер узла основного варианта).
+
+        Все камни board должны помещаться в квадрат window x window у одного угла;
+        совпадение - точное по всему квадрату с учётом симметрий и обмена цветов.
+        Поиск подфрагментов не поддерживается: пустые точки квадрата в board тоже должны быть пустыми в игре,
+        так что форма с лишним камнем где-либо в квадрате (даже далеко от камней board) не найдётся.
+        """
+        corner = self._pattern_corner(board)
+        return self._lookup(corner_keys(board, self.window)[corner])
+
+    def _pattern_corner(self, board):
+        stones = [x for x in board if x.node.stone is not None]
+        size = board.size
+        window = self.window
+        for corner, (flip_x, flip_y) in enumerate(_corners):
+            if len(stones) != 0 and all((size - x.x if flip_x else x.x - 1) < window and
+                                        (size - x.y if flip_y else x.y - 1) < window for x in stones):
+                return corner
+        raise ValueError("Pattern must be in one corner window of size {}".format(window))
@@ -0,0 +1,62 @@
+from sgftools.board import Board
+
+
+class GamePositionIndex:
+    """ Быстрый доступ к позиции после n-го узла пути в дереве игры.
+
+    Путь задаётся индексами вариантов от корня (как ReplayItem.path), дальше идёт по первым вариантам;
+    по умолчанию - основной вариант. Узел 0 - корень, так что для игры без узлов расстановки n - номер хода.
+    Снимки доски хранятся через каждые interval узлов: больше interval - меньше памяти,
+    но до interval применений узлов на каждый запрос. board_class - класс досок с интерфейсом Board.
+    """
+    def __init__(self, game, path=(), interval=16, board_class=Board):
+        if interval < 1:
+            raise ValueError("interval must be positive: {}".format(interval))
+
+        self.interval = interval
+        self._board_class = board_class
+        self._size = game.game_info.board_size
+        self._nodes = self._path_nodes(game.root, path)
+        self._checkpoints = []
+
+        board = board_class(self._size)
+        for number, node in enumerate(self._nodes):
+            board.apply(node)
+            board.clear_history()
+            if number % interval == 0:
+                self._checkpoints.append(board.snapshot())
+
+    @staticmethod
+    def _path_nodes(root, path):
+        nodes = []
+        node = root
+        path = iter(path)
+        while node is not None:
+            nodes.append(node)
+            if len(node.next_nodes) == 0:
+                break
+            node = node.next_nodes[next(path, 0)]
+        return nodes
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def node_at(self, number):
+        return self._nodes[self._check(number)]
+
+    def position_at(self, number):
+        """ Новая доска с позицией после применения узла number """
+        number = self._check(number)
+        checkpoint = number // self.interval
+        board = self._board_class(self._size)
+        board.restore(self._checkpoints[checkpoint])
+        for node in self._nodes[checkpoint * self.interval + 1:number + 1]:
+            board.apply(node)
+        return board
+
+    def _check(self, number):
+        if number < 0:
+            number += len(self._nodes)
+        if number < 0 or number >= len(self._nodes):
+            raise IndexError("node {} out of path. Path length: {}".format(number, len(self._nodes)))
+        return number
@@ -70,10 +70,8 @@ class ProblemsPdfBuilder:
         if not self.trim_board:
             return board.size
 
-        for y in reversed(range(1, board.size + 1)):
-            if any(not board[x, y].is_empty() for x in range(1, board.size + 1)):
-                return y
-        return 1
+        box = board.bounding_box()
+        return box[3] if box is not None else 1
 
     def draw_board(self, board: Board, pdf):
         pdf.set_font(self.font_name, '', self.label_font_size)
@@ -101,15 +99,13 @@ class ProblemsPdfBuilder:
                      pos_y + step_size)
 
         # draw nodes
-        for x in range(1, board.size + 1):
-            for y in range(1, last_line_to_draw + 1):
-                node = board[x, y]
-                if node.is_empty():
-                    continue
-
-                myx = pos_x + (x - 1) * cell_size
-                myy = pos_y + (y - 1) * cell_size
-                self.draw_node(myx, myy, cell_size, node, pdf)
+        for cell in board:
+            if cell.y > last_line_to_draw:
+                continue
+
+            myx = pos_x + (cell.x - 1) * cell_size
+            myy = pos_y + (cell.y - 1) * cell_size
+            self.draw_node(myx, myy, cell_size, cell.node, pdf)
 
         self._move_y(board_height)
         if self.draw_diagram_caption:
@@ -0,0 +1,69 @@
+from collections import namedtuple
+
+from sgftools.board import Board, ImpossibleMove
+
+ReplayItem = namedtuple("ReplayItem", "node path board")
+ReplayError = namedtuple("ReplayError", "node path error")
+
+
+def replay(game, mainline_only=False, leaves_only=False, every=1, max_depth=None, snapshots=False,
+           strict=False, errors=None, board_class=Board):
+    """ Обходит дерево игры в глубину и выдаёт ReplayItem(node, path, board) для каждой вершины.
+
+    path - индексы вариантов от корня до вершины (у корня пустой), board - позиция после применения вершины.
+    Фильтры: mainline_only - только первые варианты, leaves_only - только листья,
+    every - только вершины на глубине, кратной every, max_depth - не спускаться глубже.
+
+    Без snapshots обход ведётся на одной доске через apply/undo, а path и board - общие объекты,
+    действительные до следующего шага; изменять их нельзя. С snapshots выдаются независимые копии,
+    которые можно хранить.
+
+    strict - проверять ходы по правилам (см. Board). Если передан список errors, узлы, которые нельзя применить,
+    добавляются в него как ReplayError(node, path, error), и их поддеревья пропускаются;
+    иначе исключение прерывает обход.
+
+    board_class - класс доски с интерфейсом Board, например BitBoard.
+    """
+    if game.root is None:
+        return
+
+    board = board_class(game.game_info.board_size, strict)
+    path = []
+    # элемент стека - (вершина, индекс варианта) или None: отменить вершину и выйти из неё
+    stack = [(game.root, None)]
+    while len(stack) > 0:
+        item = stack.pop()
+        if item is None:
+            board.undo()
+            path.pop()
+            continue
+
+        node, index = item
+        try:
+            board.apply(node)
+        except (ImpossibleMove, IndexError) as ex:
+            if errors is None:
+                raise
+            errors.append(ReplayError(node, tuple(path) + ((index,) if index is not None else ()), ex))
+            continue
+
+        if index is not None:
+            path.append(index)
+            if not mainline_only:
+                stack.append(None)
+
+        children = node.next_nodes
+        if (not leaves_only or len(children) == 0) and len(path) % every == 0:
+            if snapshots:
+                yield ReplayItem(node, tuple(path), board.copy())
+            else:
+                yield ReplayItem(node, path, board)
+
+        if mainline_only:
+            children = children[:1]
+        if max_depth is not None and len(path) >= max_depth:
+            continue
+
+        for i in range(len(children) - 1, -1, -1):
+            if children[i] is not None:
+                stack.append((children[i], i))
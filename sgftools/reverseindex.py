@@ -0,0 +1,58 @@
+""" Обратный индекс позиций: в каких играх и вершинах встретилась позиция на всей доске.
+
+Ключ - хэш Зобриста камней (Board.position_hash), так что позиция ищется независимо от очерёдности хода
+и пометок. Запись (ключ, игра, номер узла, варианты) делается для каждой вершины всего дерева,
+в которой позиция изменилась; пустая доска не записывается.
+"""
+import re
+
+from sgftools.board import Board
+from sgftools.diskindex import DiskIndex, signed
+from sgftools.replay import replay
+
+FORMAT_VERSION = 1
+
+_variation_pattern = re.compile(r'(\d+):(\d+)')
+
+
+def format_variations(path):
+    """ Не первые варианты пути как строка "глубина:индекс,..." (глубина с 1); для основного варианта пустая """
+    return ','.join("{}:{}".format(depth + 1, index) for depth, index in enumerate(path) if index != 0)
+
+
+def parse_variations(text, node):
+    """ Путь длины node из строки format_variations """
+    path = [0] * node
+    for depth, index in _variation_pattern.findall(text):
+        path[int(depth) - 1] = int(index)
+    return tuple(path)
+
+
+def game_postings(game):
+    """ Записи (хэш позиции, номер узла, варианты) по всем вершинам дерева, где позиция изменилась """
+    postings = []
+    for item in replay(game):
+        board = item.board
+        key = board.position_hash
+        if key != 0 and len(board.last_changes()) != 0:
+            postings.append((signed(key), len(item.path), format_variations(item.path)))
+    return postings
+
+
+class ReversePositionIndex(DiskIndex):
+    """ Индекс позиций на всей доске в файле sqlite.
+
+    Поиск - одно обращение к B-дереву по ключу в файле, отображённом в память, поэтому время поиска
+    почти не зависит от числа записей. Игры можно дописывать в существующий индекс; повторно добавленная
+    игра с тем же именем заменяет прежние записи.
+    """
+    format_version = FORMAT_VERSION
+    postings_columns = (('node', 'INTEGER'), ('variations', 'TEXT'))
+
+    def _postings_function(self):
+        return game_postings
+
+    def search(self, board: Board):
+        """ Вершины, где встретилась позиция board: список (имя игры, путь вариантов от корня) """
+        return [(name, parse_variations(variations, node))
+                for name, node, variations in self._lookup(signed(board.position_hash))]
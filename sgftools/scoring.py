@@ -0,0 +1,204 @@
+""" Подсчёт очков конечной позиции и проверка записанного результата (RE).
+
+Пустые области заливаются по таблице соседей доски; область, граничащая с камнями одного цвета, - территория
+этого цвета, с обоими - нейтральная. Если в последней вершине основного варианта есть подсказки TB/TW
+(их пишут серверы после снятия мёртвых камней), территория берётся из них, а камни на чужой территории
+считаются мёртвыми. По правилам RU Japanese и Korean результат считается по территории с пленными,
+иначе - по площади.
+"""
+import re
+from collections import namedtuple
+
+from sgftools.board import neighbour_table
+from sgftools.game import Stone
+from sgftools.parser import SgfParser
+from sgftools.replay import replay
+
+Score = namedtuple("Score", "black_area white_area black_territory white_territory dame "
+                            "black_captures white_captures dead_black dead_white komi")
+ResultCheck = namedtuple("ResultCheck", "recorded computed status score")
+
+_BLACK = Stone.Black.value
+_WHITE = Stone.White.value
+
+_result_pattern = re.compile(r'^\s*([BW])\+\s*([0-9]+(?:\.[0-9]*)?)?\s*$', re.IGNORECASE)
+_draws = {'0', 'DRAW', 'JIGO'}
+_territory_rules = {'japanese', 'korean'}
+
+
+def score_position(values, size, komi=0.0, dead=(), captures=(0, 0), owners=None):
+    """ Очки позиции; values - Stone.value (0 - пусто) по индексам (x - 1) * size + (y - 1),
+    например Board.stone_values() или bytes конечной позиции batchreplay.
+
+    dead - индексы мёртвых камней, captures - (пленные чёрных, пленные белых) за игру,
+    owners - территория из подсказок, {индекс: Stone.value}; пустые точки не из owners нейтральны.
+    """
+    stones = bytearray(values)
+    dead_counts = [0, 0, 0]
+    for index in dead:
+        dead_counts[stones[index]] += 1
+        stones[index] = 0
+
+    counts = [0, 0, 0]
+    territory = [0, 0, 0, 0]
+    if owners is not None:
+        for index, value in enumerate(stones):
+            if value != 0:
+                counts[value] += 1
+            else:
+                territory[owners.get(index, 0)] += 1
+        return _score(counts, territory, dead_counts, captures, komi)
+
+    neighbours = neighbour_table(size)
+    visited = bytearray(len(stones))
+    stack = []
+    for start, value in enumerate(stones):
+        if value != 0:
+            counts[value] += 1
+            continue
+        if visited[start]:
+            continue
+
+        # заливка пустой области: borders - объединение значений соседних камней (1 | 2 - обоих цветов)
+        visited[start] = 1
+        stack.append(start)
+        area = 0
+        borders = 0
+        while stack:
+            index = stack.pop()
+            area += 1
+            for neighbour in neighbours[index]:
+                value = stones[neighbour]
+                if value != 0:
+                    borders |= value
+                elif not visited[neighbour]:
+                    visited[neighbour] = 1
+                    stack.append(neighbour)
+        territory[borders] += area
+    return _score(counts, territory, dead_counts, captures, komi)
+
+
+def _score(counts, territory, dead_counts, captures, komi):
+    dame = territory[0] + territory[_BLACK | _WHITE]
+    return Score(counts[_BLACK] + territory[_BLACK], counts[_WHITE] + territory[_WHITE],
+                 territory[_BLACK], territory[_WHITE], dame, captures[0], captures[1],
+                 dead_counts[_BLACK], dead_counts[_WHITE], komi)
+
+
+def score_board(board, komi=0.0, dead=(), captures=(0, 0)):
+    """ score_position для Board; dead - точки (Point) мёртвых камней """
+    size = board.size
+    indices = [(x.x - 1) * size + x.y - 1 for x in dead if 0 < x.x <= size and 0 < x.y <= size]
+    return score_position(board.stone_values(), size, komi, indices, captures)
+
+
+def territory_hints(node, board):
+    """ Подсказки TB/TW вершины: (индексы мёртвых камней, owners для score_position) или None без подсказок """
+    if 'TB' not in node.extra and 'TW' not in node.extra:
+        return None
+    stones = board.stone_values()
+    size = board.size
+    dead = []
+    owners = dict()
+    for key, owner in (('TB', _BLACK), ('TW', _WHITE)):
+        for point in node.extra.get(key, ()):
+            if 0 < point.x <= size and 0 < point.y <= size:
+                index = (point.x - 1) * size + point.y - 1
+                owners[index] = owner
+                if stones[index] == _BLACK + _WHITE - owner:
+                    dead.append(index)
+    return dead, owners
+
+
+def margin(score, territory=False):
+    """ Перевес чёрных с коми (отрицательный - победа белых) по площади или по территории с пленными """
+    if territory:
+        black = score.black_territory + score.black_captures + score.dead_white
+        white = score.white_territory + score.white_captures + score.dead_black
+    else:
+        black = score.black_area
+        white = score.white_area
+    return black - white - score.komi
+
+
+def format_result(value):
+    """ Перевес как значение RE: B+3.5, W+0.5 или 0 """
+    if value == 0:
+        return '0'
+    return "{}+{:g}".format('B' if value > 0 else 'W', abs(value))
+
+
+def parse_result(text):
+    """ Перевес чёрных из RE или None, если результат не по очкам (B+R, W+T, Void, ?) или пуст """
+    text = text.strip()
+    if text.upper() in _draws:
+        return 0.0
+    match = _result_pattern.match(text)
+    if match is None or match.group(2) is None:
+        return None
+    value = float(match.group(2))
+    return value if match.group(1).upper() == 'B' else -value
+
+
+def komi(game):
+    try:
+        return float(game.game_info['KM'] or 0)
+    except ValueError:
+        return 0.0
+
+
+def score_game(game, hints=True):
+    """ Проигрывает основной вариант и считает очки конечной позиции по правилам игры.
+
+    Возвращает (Score, territory): territory - считать ли по территории (правила RU).
+    hints - брать территорию и мёртвые камни из TB/TW последней вершины, если они есть.
+    """
+    board = None
+    node = None
+    captures = [0, 0, 0]
+    for item in replay(game, mainline_only=True):
+        board = item.board
+        node = item.node
+        if node.move is not None and node.move.point is not None:
+            for point, old, new in board.last_changes():
+                if new is None and old is not None:
+                    captures[old.value] += 1
+
+    territory = (game.game_info['RU'] or '').strip().lower() in _territory_rules
+    if board is None:
+        size = game.game_info.board_size
+        return score_position(bytes(size * size), size, komi(game)), territory
+
+    # пленные чёрных - снятые белые камни
+    captures = (captures[_WHITE], captures[_BLACK])
+    found = territory_hints(node, board) if hints else None
+    if found is None:
+        return score_position(board.stone_values(), board.size, komi(game), (), captures), territory
+    dead, owners = found
+    return score_position(board.stone_values(), board.size, komi(game), dead, captures, owners), territory
+
+
+def verify_result(game, hints=True):
+    """ Сравнивает RE с подсчётом: ResultCheck(recorded, computed, status, score).
+
+    status: 'match', 'mismatch', 'missing' (RE пуст) или 'unverifiable' (результат не по очкам).
+    """
+    recorded = (game.game_info.result or '').strip()
+    score, territory = score_game(game, hints)
+    computed = format_result(margin(score, territory))
+    if recorded == '':
+        status = 'missing'
+    else:
+        expected = parse_result(recorded)
+        if expected is None:
+            status = 'unverifiable'
+        elif abs(expected - margin(score, territory)) < 1e-6:
+            status = 'match'
+        else:
+            status = 'mismatch'
+    return ResultCheck(recorded, computed, status, score)
+
+
+def verify_file(path, hints=True, cache=None):
+    """ Для batch.map_files """
+    return verify_result(SgfParser(cache=cache).load_game(path), hints)
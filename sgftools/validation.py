@@ -0,0 +1,30 @@
+from sgftools.board import Board
+from sgftools.parser import SgfParser
+from sgftools.replay import replay
+
+
+def validate_game(game, board_class=Board):
+    """ Проверяет все варианты игры по правилам: ход на занятую точку или за доску, самоубийство, взятие ко,
+    позиционное суперко.
+
+    Возвращает список ReplayError(node, path, error) - первый незаконный узел каждого варианта;
+    узел, общий для нескольких вариантов, выдаётся один раз. Пустой список - игра корректна.
+    board_class - класс доски с интерфейсом Board, например BitBoard.
+    """
+    errors = []
+    for _ in replay(game, leaves_only=True, strict=True, errors=errors, board_class=board_class):
+        pass
+    return errors
+
+
+def validate_file(path, cache=None):
+    """ Для batch.map_files: незаконные узлы игры из файла строками """
+    game = SgfParser(cache=cache).load_game(path)
+    return [describe_error(x) for x in validate_game(game)]
+
+
+def describe_error(error):
+    """ Номер узла, выбранные не первые варианты (глубина:индекс) и причина """
+    variations = ', '.join("{}:{}".format(depth + 1, index) for depth, index in enumerate(error.path) if index != 0)
+    place = "node {}".format(len(error.path)) + (" (variations {})".format(variations) if variations else "")
+    return "{}: {}: {}".format(place, type(error.error).__name__, error.error)
@@ -0,0 +1,273 @@
+import codecs
+import io
+
+from sgftools.game import Stone, Point, Move, Circle, Square, Cross, Triangle, Label, GoodForBlack, GoodForWhite, \
+    PositionIsEven, PositionIsUnclear
+
+
+def format_coordinate(point):
+    if point is None:
+        return ''
+    return _coordinate_letter(point.x) + _coordinate_letter(point.y)
+
+
+def _coordinate_letter(value):
+    if value <= 26:
+        return chr(ord('a') + value - 1)
+    return chr(ord('A') + value - 27)
+
+
+def _move_table(key):
+    """ Свойство хода key для каждой точки: table[x][y], x и y от 1 до _MAX_COORDINATE """
+    return tuple(tuple(key + '[' + _coordinate_letter(x) + _coordinate_letter(y) + ']'
+                       for y in range(_MAX_COORDINATE + 1)) for x in range(_MAX_COORDINATE + 1))
+
+
+# наибольшая координата, которую можно записать буквой sgf
+_MAX_COORDINATE = 52
+# готовые строки ходов
+_black_moves = _move_table('B')
+_white_moves = _move_table('W')
+
+
+def escape_value(value):
+    if '\\' in value:
+        value = value.replace('\\', '\\\\')
+    if ']' in value:
+        value = value.replace(']', '\\]')
+    return value
+
+
+def compress_points(points):
+    """ Заменяет прямоугольники из точек на запись вида aa:bb """
+    remaining = set((x.x, x.y) for x in points)
+    result = []
+    for x, y in sorted(remaining):
+        if (x, y) not in remaining:
+            continue
+
+        bottom = y
+        while (x, bottom + 1) in remaining:
+            bottom += 1
+        right = x
+        while all((right + 1, i) in remaining for i in range(y, bottom + 1)):
+            right += 1
+
+        for i in range(x, right + 1):
+            for j in range(y, bottom + 1):
+                remaining.discard((i, j))
+
+        if right == x and bottom == y:
+            result.append(format_coordinate(Point(x, y)))
+        else:
+            result.append(format_coordinate(Point(x, y)) + ':' + format_coordinate(Point(right, bottom)))
+    return result
+
+
+class SgfWriter:
+    flush_size = 65536
+
+    def __init__(self):
+        self._info_properties = [
+            ('game_name', 'GN'),
+            ('game_comment', 'GC'),
+            ('black_player', 'PB'),
+            ('black_rank', 'BR'),
+            ('black_team', 'BT'),
+            ('white_player', 'PW'),
+            ('white_rank', 'WR'),
+            ('white_team', 'WT'),
+            ('date', 'DT'),
+            ('event', 'EV'),
+            ('round', 'RO'),
+            ('place', 'PC'),
+            ('result', 'RE'),
+            ('author', 'AN'),
+            ('copyright', 'CP')
+        ]
+
+        self._markup_properties = [
+            (Circle, 'CR'),
+            (Triangle, 'TR'),
+            (Square, 'SQ'),
+            (Cross, 'MA'),
+            (Label, 'LB')
+        ]
+
+        self._annotation_properties = {
+            GoodForBlack: 'GB',
+            GoodForWhite: 'GW',
+            PositionIsEven: 'DM',
+            PositionIsUnclear: 'UC'
+        }
+
+    def dumps(self, game):
+        stream = io.StringIO()
+        self.write_game(game, stream)
+        return stream.getvalue()
+
+    def save_game(self, game, filename):
+        with open(filename, 'wb') as file:
+            self.write_game(game, file)
+
+    def write_game(self, game, stream):
+        """ Пишет игру в текстовый или двоичный поток; в двоичный - в кодировке из свойства CA """
+        if isinstance(stream, io.TextIOBase):
+            write = stream.write
+        else:
+            encoding = game.game_info['CA'] or 'utf-8'
+            try:
+                encoder = codecs.getincrementalencoder(encoding)()
+            except LookupError:
+                encoder = codecs.getincrementalencoder('utf-8')()
+            write = lambda text: stream.write(encoder.encode(text))
+
+        for chunk in self._iter_chunks(game):
+            write(chunk)
+
+    def _iter_chunks(self, game):
+        """ Текст игры кусками не меньше flush_size символов (кроме последнего) """
+        buffer = ['(;', ''.join(self._game_info_properties(game.game_info))]
+        if game.root is None:
+            buffer.append(')\n')
+            yield ''.join(buffer)
+            return
+
+        buffer.append(self._node_properties(game.root, set(game.game_info._info)))
+        stack = self._children(game.root)
+        if len(game.root.next_nodes) == 1:
+            buffer.append('\n')
+
+        node_properties = self._node_properties
+        children = self._children
+        append = buffer.append
+        flush_size = self.flush_size
+        size = 0
+        while len(stack) > 0:
+            item = stack.pop()
+            if isinstance(item, str):
+                append(item)
+                continue
+
+            # цепочка вершин с единственным продолжением пишется подряд, без стека
+            while True:
+                text = node_properties(item, ())
+                append(';')
+                append(text)
+                size += len(text) + 1
+                next_nodes = item.next_nodes
+                if len(next_nodes) != 1 or next_nodes[0] is None:
+                    break
+                item = next_nodes[0]
+            stack.extend(children(item))
+
+            if size >= flush_size:
+                yield ''.join(buffer)
+                buffer.clear()
+                size = 0
+        append(')\n')
+        yield ''.join(buffer)
+
+    @staticmethod
+    def _children(node):
+        """ Элементы для стека обхода в обратном порядке: вершины и скобки вариантов """
+        next_nodes = [x for x in node.next_nodes if x is not None]
+        if len(next_nodes) <= 1:
+            return next_nodes
+
+        items = []
+        for next_node in reversed(next_nodes):
+            items.extend([')', next_node, '\n('])
+        return items
+
+    def _game_info_properties(self, info):
+        for key, value in info._info.items():
+            yield self._property(key, value)
+
+        for attrname, key in self._info_properties:
+            value = getattr(info, attrname, '')
+            if value != '' and value is not None:
+                yield self._property(key, value)
+
+    def _node_properties(self, node, skip):
+        """ Свойства вершины одной строкой """
+        move = node.move
+        if move is None:
+            text = ''
+        else:
+            point = move.point
+            if point is not None and 0 < point.x <= _MAX_COORDINATE and 0 < point.y <= _MAX_COORDINATE:
+                text = (_black_moves if move.stone is Stone.Black else _white_moves)[point.x][point.y]
+            else:
+                text = ('B[' if move.stone == Stone.Black else 'W[') + format_coordinate(point) + ']'
+
+        # у большинства вершин нет ничего, кроме хода
+        if not (node.add_black or node.add_white or node.empty or node.comment or node.extra or node.markups or
+                node.node_name or node.turn_to_play is not None or node.move_number is not None or
+                node.annotation is not None):
+            return text
+
+        result = [text]
+
+        if node.add_black or node.add_white or node.empty:
+            for key, points in (('AB', node.add_black), ('AW', node.add_white), ('AE', node.empty)):
+                if len(points) != 0:
+                    result.append(key + ''.join('[' + x + ']' for x in compress_points(points)))
+
+        if node.turn_to_play is not None:
+            result.append(self._property('PL', node.turn_to_play))
+
+        if node.move_number is not None:
+            result.append(self._property('MN', node.move_number))
+
+        if node.node_name:
+            result.append(self._property('N', node.node_name))
+
+        if node.annotation is not None:
+            result.append(self._property(self._annotation_properties[type(node.annotation)], '1'))
+
+        if node.markups:
+            result.extend(self._markups(node.markups))
+
+        for key, value in node.extra.items():
+            if key in skip:
+                continue
+            if type(value) is str:
+                result.append(key + '[' + escape_value(value) + ']')
+            else:
+                result.append(self._property(key, value))
+
+        if node.comment:
+            result.append('C[' + escape_value(node.comment) + ']')
+
+        return ''.join(result)
+
+    def _markups(self, markups):
+        for kind, key in self._markup_properties:
+            values = sorted(self._markup_value(markup, point) for markup, point in markups if type(markup) is kind)
+            if len(values) != 0:
+                yield key + ''.join('[' + x + ']' for x in values)
+
+    @staticmethod
+    def _markup_value(markup, point):
+        if isinstance(markup, Label):
+            return format_coordinate(point) + ':' + escape_value(markup.label)
+        return format_coordinate(point)
+
+    def _property(self, key, value):
+        return key + ''.join('[' + x + ']' for x in self._format_values(value))
+
+    def _format_values(self, value):
+        if isinstance(value, str):
+            return [escape_value(value)]
+        if value is None or isinstance(value, Point):
+            return [format_coordinate(value)]
+        if isinstance(value, Stone):
+            return ['B' if value == Stone.Black else 'W']
+        if isinstance(value, Move):
+            return [format_coordinate(value.point)]
+        if isinstance(value, list):
+            if len(value) != 0 and all(isinstance(x, Point) for x in value):
+                return compress_points(value)
+            return [y for x in value for y in self._format_values(x)] or ['']
+        return [escape_value(str(value))]